@@ -2,26 +2,44 @@ from library import SerialUtils
 from library import DataUtils
 from library import ProgramUtils
 from library import BluetoothUtils
+from library import TransferUtils
 
 use_serial = False
+use_blocks = True  # checked, resumable block transfer ('get' command); False: plain 'licks'/'system' dump
+use_cursor = True  # with use_blocks: append only what is new since the last visit to data/<station>/
+use_compressed = False  # without use_blocks: '<kind>,compressed', several times fewer bytes on the link
 
 if use_serial:
     port = SerialUtils.port_selection()
     connection = SerialUtils.connect(port)
+    station = port
 else:
     mac_address = BluetoothUtils.port_selection()
     connection = BluetoothUtils.connect(mac_address)
+    station = mac_address
 
 while True:
     kind = ProgramUtils.request_kind()
-    data = SerialUtils.get_data(connection, kind)
+    if use_blocks and use_cursor:
+        TransferUtils.harvest(connection, kind, ProgramUtils.get_station_folder(station))
+        continue
+    if use_blocks:
+        data = TransferUtils.get_data(connection, kind)
+        if data is None: continue
+        data = data.split('\n')
+        if data and data[-1] == '': data.pop(-1)
+    elif use_compressed:
+        data = TransferUtils.get_compressed(connection, kind)
+        if data is None: continue
+    else:
+        data = SerialUtils.get_data(connection, kind)
 
-    data = data.replace('*', '\n')
-    data = data.split('\n')
-    length = len(data)
-    header = data.pop(0)
-    tail1 = data.pop(-1)
-    tail2 = data.pop(-1)
+        data = data.replace('*', '\n')
+        data = data.split('\n')
+        length = len(data)
+        header = data.pop(0)
+        tail1 = data.pop(-1)
+        tail2 = data.pop(-1)
 
     try:
         data_aligned = ''
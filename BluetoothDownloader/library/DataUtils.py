@@ -67,4 +67,135 @@ def align_lick_data(data_lines):
         line = f"{element0}|{element1}|{element2}|{element3}|{element4}|{element5}"
 
         new_data_lines.append(line)
-    return new_data_lines
\ No newline at end of file
+    return new_data_lines
+
+# ---------- Compressed transfer ('licks,compressed') ----------
+# Decoder for the board's BoardCode/lib/components/TransferEncoding.py; the
+# stream format is described there.
+
+OP_INT, OP_DEC, OP_TIME, OP_HOUR, OP_WORD, OP_TEXT = range(6)
+DICT_SIZE = 64
+MAX_WORD = 64
+
+
+def _unzigzag(z):
+    return (z >> 1) if not z & 1 else -((z + 1) >> 1)
+
+
+def _format_number(value, digits):
+    sign = '-' if value < 0 else ''
+    text = str(abs(value))
+    if digits:
+        text = text.rjust(digits + 1, '0')
+        text = text[:-digits] + '.' + text[-digits:]
+    return sign + text
+
+
+def _format_time(hour, ms, has_ms):
+    text = f"{hour}{ms // 60000:02d}:{ms // 1000 % 60:02d}"
+    if has_ms: text += f".{ms % 1000:03d}"
+    return text
+
+
+def _rescale(value, digits, to_digits):
+    if to_digits >= digits: return value * 10 ** (to_digits - digits)
+    return value // 10 ** (digits - to_digits)
+
+
+class RowDecoder:
+    """Decodes a compressed stream fed in pieces; lines come out as soon as they are complete."""
+
+    def __init__(self):
+        self.buffer = b''
+        self.done = False
+        self.count = 0
+        self.texts, self.numbers, self.digits, self.ms, self.hours = [], [], [], [], []
+        self.words = [None] * DICT_SIZE
+        self.next_slot = 0
+
+    def _varint(self, pos):
+        data = self.buffer
+        n, shift = 0, 0
+        while True:
+            b = data[pos]  # IndexError: the rest has not arrived yet
+            pos += 1
+            n |= (b & 0x7F) << shift
+            if b < 0x80: return n, pos
+            shift += 7
+
+    def _text(self, pos, always=False):
+        length, pos = self._varint(pos)
+        if pos + length > len(self.buffer): raise IndexError
+        data = self.buffer[pos:pos + length]
+        text = data.decode('utf-8')
+        if always or length <= MAX_WORD:
+            self.words[self.next_slot] = text
+            self.next_slot = (self.next_slot + 1) % DICT_SIZE
+        return text, pos + length
+
+    def _line(self, pos):
+        """(line, position after it) of the line at pos; line None at the end of the stream."""
+        head, pos = self._varint(pos)
+        count = self.count
+        if head & 1:
+            count, pos = self._varint(pos)
+            if count == 0: return None, pos
+        mask = head >> 1
+        state = (self.texts[:], self.numbers[:], self.digits[:], self.ms[:], self.hours[:], self.words[:], self.next_slot)
+        try:
+            while len(self.texts) < count:
+                self.texts.append(None); self.numbers.append(0); self.digits.append(0)
+                self.ms.append(0); self.hours.append(None)
+            for i in range(count):
+                if (mask >> i) & 1: continue
+                token, pos = self._varint(pos)
+                op, payload = token & 7, token >> 3
+                if op == OP_INT or op == OP_DEC:
+                    digits = 0 if op == OP_INT else payload & 7
+                    delta = _unzigzag(payload if op == OP_INT else payload >> 3)
+                    value = _rescale(self.numbers[i], self.digits[i], digits) + delta
+                    self.numbers[i], self.digits[i] = value, digits
+                    text = _format_number(value, digits)
+                elif op == OP_TIME:
+                    self.ms[i] += _unzigzag(payload >> 1)
+                    text = _format_time(self.hours[i], self.ms[i], payload & 1)
+                elif op == OP_HOUR:
+                    if payload: hour = self.words[payload - 1]
+                    else: hour, pos = self._text(pos, always=True)
+                    value, pos = self._varint(pos)
+                    self.hours[i], self.ms[i] = hour, value >> 1
+                    text = _format_time(hour, self.ms[i], value & 1)
+                elif op == OP_WORD:
+                    text = self.words[payload]
+                elif op == OP_TEXT:
+                    text, pos = self._text(pos)
+                else:
+                    raise ValueError(f"Unknown field op {op}")
+                self.texts[i] = text
+        except IndexError:
+            self.texts, self.numbers, self.digits, self.ms, self.hours, self.words, self.next_slot = state
+            raise
+        self.count = count
+        return ','.join(self.texts[:count]), pos
+
+    def feed(self, data):
+        """Add received bytes; returns the lines completed by them."""
+        self.buffer += data
+        lines = []
+        pos = 0
+        while not self.done:
+            try: line, end = self._line(pos)
+            except IndexError: break
+            pos = end
+            if line is None: self.done = True
+            else: lines.append(line)
+        self.buffer = self.buffer[pos:]
+        return lines
+
+
+def decode_rows(data):
+    """(lines, bytes after the stream) of a complete compressed stream."""
+    decoder = RowDecoder()
+    lines = decoder.feed(data)
+    if not decoder.done: raise ValueError("Compressed stream is incomplete")
+    return lines, decoder.buffer
@@ -1,3 +1,5 @@
+import os
+
 def request_kind():
     selected_kind = None
     while selected_kind is None:
@@ -31,4 +33,9 @@ def save_data(data, file_name):
             for line in data: file.write(line + '\n')
         print(f"Data saved to {file_name}")
     except Exception as e:
-        print("Error saving data to file:", e)
\ No newline at end of file
+        print("Error saving data to file:", e)
+
+def get_station_folder(station, root='data'):
+    #One folder per board, named after its port or Bluetooth address
+    name = ''.join(c if c.isalnum() or c in '-_.' else '-' for c in str(station))
+    return os.path.join(root, name)
\ No newline at end of file
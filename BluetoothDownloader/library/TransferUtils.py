@@ -0,0 +1,325 @@
+import json
+import os
+import struct
+import sys
+import time
+
+from library import DataUtils
+
+# Block transfer protocol (board side: BoardCode/lib/components/MyBT.py, BlockSender).
+# Frames: 0xA5, kind, offset (uint32), length (uint16), payload, CRC-16/CCITT (uint16),
+# little-endian, the CRC covering kind..payload. The host acknowledges with
+# 'ack,<offset>*' and (re)starts or resumes with 'get,<kind>,<offset>*'.
+# Rotated segments are listed with 'segments,<kind>,<since>*' and fetched
+# with 'get,<kind>,<offset>,<index>*'.
+
+FRAME_SOF = 0xA5
+FRAME_HEADER = ord('H')
+FRAME_DATA = ord('D')
+FRAME_END = ord('E')
+FRAME_ABORT = ord('A')
+FRAME_HEAD_SIZE = 8
+FRAME_CRC_SIZE = 2
+MAX_PAYLOAD = 4096  # longer length fields are treated as corrupt
+CURSOR_FILE = 'cursors.json'
+
+
+def _make_crc_table():
+    table = []
+    for i in range(256):
+        crc = i << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+        table.append(crc & 0xFFFF)
+    return table
+
+
+_crc_table = _make_crc_table()
+
+
+def crc16(data, crc=0xFFFF):
+    table = _crc_table
+    for b in data:
+        crc = ((crc << 8) & 0xFFFF) ^ table[(crc >> 8) ^ b]
+    return crc
+
+
+class FrameParser:
+    """Splits a byte stream into checked frames; resynchronises on the next 0xA5 after a bad frame."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.crc_errors = 0
+        self.skipped = 0  # bytes dropped while looking for a frame
+
+    def feed(self, data):
+        """Add received bytes; return the complete frames as (kind, offset, payload) tuples."""
+        buf = self.buffer
+        buf.extend(data)
+        frames = []
+        while True:
+            start = buf.find(bytes([FRAME_SOF]))
+            if start < 0:
+                self.skipped += len(buf)
+                buf.clear()
+                break
+            if start:
+                self.skipped += start
+                del buf[:start]
+            if len(buf) < FRAME_HEAD_SIZE: break
+            _, kind, offset, length = struct.unpack_from('<BBIH', buf, 0)
+            if length > MAX_PAYLOAD or kind not in (FRAME_HEADER, FRAME_DATA, FRAME_END, FRAME_ABORT):
+                self.crc_errors += 1
+                del buf[:1]
+                continue
+            end = FRAME_HEAD_SIZE + length + FRAME_CRC_SIZE
+            if len(buf) < end: break
+            crc = struct.unpack_from('<H', buf, end - FRAME_CRC_SIZE)[0]
+            if crc != crc16(buf[1:end - FRAME_CRC_SIZE]):
+                self.crc_errors += 1
+                del buf[:1]
+                continue
+            frames.append((kind, offset, bytes(buf[FRAME_HEAD_SIZE:end - FRAME_CRC_SIZE])))
+            del buf[:end]
+        return frames
+
+
+def _write(connection, text):
+    data = text.encode('utf-8')
+    if hasattr(connection, 'write'): connection.write(data)
+    else: connection.send(data)
+
+
+def _read(connection, wait=0.05):
+    """Bytes available now (serial port or Bluetooth socket), waiting at most `wait` s."""
+    if hasattr(connection, 'in_waiting'):
+        n = connection.in_waiting
+        if n: return connection.read(n)
+        time.sleep(wait)
+        return b''
+    connection.settimeout(wait)
+    try:
+        return connection.recv(4096)
+    except Exception as e:
+        if 'timed out' in str(e): return b''
+        raise
+
+
+def _read_message(connection, prefix, timeout=3.0):
+    """The next '*'-terminated message that starts with prefix (None after timeout s)."""
+    buffer = b''
+    end = time.time() + timeout
+    while time.time() < end:
+        buffer += _read(connection)
+        while b'*' in buffer:
+            message, buffer = buffer.split(b'*', 1)
+            message = message.decode('utf-8', errors='replace').strip()
+            if message.startswith(prefix): return message
+    return None
+
+
+def get_file(connection, kind, offset=0, segment=None, idle_timeout=3.0, max_time=600, attempts=5,
+             print_every=0.25, quiet=False):
+    """
+    Download a data file ('licks' or 'system') with the block protocol, or
+    one of its rotated segments if segment (an index) is given.
+
+    After idle_timeout s without a valid frame, or an abort frame, the
+    transfer is resumed from the last byte received, at most `attempts` times.
+    Returns (data, info): the bytes from `offset` to the end of the file (None
+    if the transfer did not complete) and a dict of transfer statistics.
+    """
+    parser = FrameParser()
+    received = bytearray()
+    expected = offset
+    size = None
+    nak_for = None  # offset already asked again after a gap (asked once, then the board times out)
+    info = {'frames': 0, 'duplicates': 0, 'resumes': 0, 'complete': False, 'name': None}
+    start = time.time()
+    last_frame = start
+    last_print = 0.0
+    request = (lambda at: f'get,{kind},{at}*') if segment is None else (lambda at: f'get,{kind},{at},{segment}*')
+    _write(connection, request(offset))
+    while True:
+        now = time.time()
+        if now - start >= max_time: break
+        if now - last_frame >= idle_timeout:
+            if info['resumes'] >= attempts: break
+            info['resumes'] += 1
+            last_frame = now
+            nak_for = None
+            _write(connection, request(expected))
+        for kind_code, frame_offset, payload in parser.feed(_read(connection)):
+            last_frame = time.time()
+            info['frames'] += 1
+            if kind_code == FRAME_HEADER:
+                try: info['name'], size = payload.decode('utf-8').rsplit(',', 1); size = int(size)
+                except (ValueError, UnicodeError): size = None
+            elif kind_code == FRAME_DATA:
+                if frame_offset == expected and payload:
+                    received.extend(payload)
+                    expected += len(payload)
+                    nak_for = None
+                    _write(connection, f'ack,{expected}*')
+                elif frame_offset < expected:
+                    info['duplicates'] += 1
+                elif nak_for != expected:
+                    nak_for = expected
+                    _write(connection, f'ack,{expected}*')
+            elif kind_code == FRAME_END and frame_offset == expected:
+                info['complete'] = True
+            elif kind_code == FRAME_ABORT:
+                last_frame = 0  # resume right away
+        if info['complete']: break
+        if not quiet and (now - last_print) >= print_every:
+            elapsed = now - start
+            rate = (len(received) / elapsed) if elapsed > 0 else 0.0
+            total = f"/{size - offset}" if size is not None else ""
+            sys.stdout.write(f"\rRead {len(received)}{total} bytes in {elapsed:.1f}s (~{int(rate)} B/s).")
+            sys.stdout.flush()
+            last_print = now
+    info.update(bytes=len(received), size=size, crc_errors=parser.crc_errors, seconds=time.time() - start)
+    if not quiet:
+        print()
+        state = "Done" if info['complete'] else "Incomplete"
+        print(f"{state}. {len(received)} bytes, {info['crc_errors']} bad frames, {info['resumes']} resumes.")
+    return (bytes(received) if info['complete'] else None), info
+
+
+def get_data(connection, kind, **kwargs):
+    """Download a data file with the block protocol and return it as text (None on failure)."""
+    data, _ = get_file(connection, kind, **kwargs)
+    if data is None: return None
+    return data.decode('utf-8', errors='replace')
+
+
+def get_compressed(connection, kind, idle_timeout=3.0, max_time=600, print_every=0.25, quiet=False):
+    """
+    Download a data file with '<kind>,compressed' and return its lines (None
+    if the stream did not arrive whole). See DataUtils.RowDecoder.
+    """
+    marker = f'START,{kind},compressed*'.encode()
+    decoder = DataUtils.RowDecoder()
+    buffer = b''
+    started = False
+    lines = []
+    total = 0
+    start = time.time()
+    last_data = start
+    last_print = 0.0
+    _write(connection, f'{kind},compressed*')
+    while not decoder.done:
+        now = time.time()
+        if now - start >= max_time or now - last_data >= idle_timeout: break
+        data = _read(connection)
+        if data:
+            last_data = now
+            total += len(data)
+        if not started:
+            buffer += data
+            at = buffer.find(marker)
+            if at < 0: continue
+            started = True
+            data = buffer[at + len(marker):]
+        lines += decoder.feed(data)
+        if not quiet and (now - last_print) >= print_every:
+            sys.stdout.write(f"\rRead {total} bytes, {len(lines)} lines in {now - start:.1f}s.")
+            sys.stdout.flush()
+            last_print = now
+    if not decoder.done:
+        if not quiet: print("\nIncomplete compressed transfer.")
+        return None
+    tail = decoder.buffer
+    while b'*' not in tail and time.time() - last_data < idle_timeout:
+        data = _read(connection)
+        if data: last_data = time.time()
+        tail += data
+    end = tail.split(b'*', 1)[0].decode('utf-8', errors='replace').split(',')
+    if len(end) > 3 and end[0] == 'END' and end[2] == 'lines':
+        try:
+            expected = int(end[3])
+        except ValueError:
+            if not quiet: print("\nIncomplete compressed transfer (corrupted END).")
+            return None
+        if expected != len(lines):
+            if not quiet: print(f"\nExpected {expected} lines, got {len(lines)}.")
+            return None
+    if not quiet: print(f"\nDone. {len(lines)} lines in {total} bytes, {time.time() - start:.1f}s.")
+    return lines
+
+
+def get_segments(connection, kind, since=1, timeout=3.0):
+    """(index, size) of the board's segments of a data file from index since on, the current file last."""
+    _write(connection, f'segments,{kind},{since}*')
+    message = _read_message(connection, f'SEGMENTS,{kind},', timeout)
+    if message is None: return None
+    segments = []
+    for item in message.split(',')[2:]:
+        try:
+            index, size = item.split(':')
+            segments.append((int(index), int(size)))
+        except ValueError:
+            pass
+    return segments
+
+
+def load_cursors(path):
+    try:
+        with open(path) as f: return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cursors(path, cursors):
+    temporary = path + '.tmp'
+    with open(temporary, 'w') as f: json.dump(cursors, f, indent=1)
+    os.replace(temporary, path)
+
+
+def _set_aside(path):
+    """Move a local copy out of the way when the board's file was replaced (emptied or a new card)."""
+    if not os.path.exists(path): return
+    aside = f"{path}.{time.strftime('%Y%m%d_%H%M%S')}.old"
+    os.replace(path, aside)
+    print(f"Board file was replaced; kept the old copy as {aside}")
+
+
+def harvest(connection, kind, folder, quiet=False, **kwargs):
+    """
+    Download what is new in a data file since the last harvest into folder.
+
+    Each segment is mirrored as <file name>.<index> (the current file under
+    the index it will get when it rotates) and only ever appended to. The
+    cursor per kind, [index, offset], is kept in folder/cursors.json and
+    saved after every segment, so an interrupted harvest loses nothing.
+    Returns the number of new bytes, or None if the board did not answer.
+    """
+    os.makedirs(folder, exist_ok=True)
+    cursor_path = os.path.join(folder, CURSOR_FILE)
+    cursors = load_cursors(cursor_path)
+    index, offset = cursors.get(kind, [1, 0])
+    segments = get_segments(connection, kind, index)
+    if segments is None: return None
+    if segments and segments[-1][0] < index:  # the board's log starts over (new card)
+        print(f"Board has no segment {index} of {kind} any more; starting over")
+        index, offset = 1, 0
+        segments = get_segments(connection, kind, index)
+        if segments is None: return None
+    total = 0
+    for segment, size in segments:
+        start = offset if segment == index else 0
+        if size < start:  # emptied on the board: the bytes after start are new again
+            start = 0
+        if size > start:
+            data, info = get_file(connection, kind, offset=start, segment=segment, quiet=quiet, **kwargs)
+            if data is None: break
+            local = os.path.join(folder, info['name'] or f"{kind}.{segment}")
+            if start == 0: _set_aside(local)
+            with open(local, 'ab') as f: f.write(data)
+            total += len(data)
+            start += len(data)
+        index, offset = segment, start
+        cursors[kind] = [index, offset]
+        save_cursors(cursor_path, cursors)
+    if not quiet: print(f"{kind}: {total} new bytes, cursor at segment {index}, byte {offset}.")
+    return total
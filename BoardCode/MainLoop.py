@@ -2,12 +2,14 @@ import time
 
 import Cats
 import Settings
-from components.MySystemLog import setup_system_log, set_system_log_level, DEBUG, INFO, WARN, ERROR
-from components.MySystemLog import debug, info, warn, error
+from components.MySystemLog import setup_system_log, set_system_log_level, enabled, DEBUG, INFO, WARN, ERROR
+from components.MySystemLog import debug, info, infof, warn, error, sync_if_due, suppressed_summary
 
 from LickSensor import LickSensor
 from TagReader import TagReader     # new non-blocking, scheduled-reset version
 from HydraPurr import HydraPurr
+from Scheduler import Scheduler
+from LoopStats import LoopStats
 
 def now_ms(): return int(time.monotonic() * 1000)
 
@@ -21,6 +23,169 @@ def update_screen(hp,ctr, current_cat):
     hp.show_screen()
 
 
+class LoopState:
+    """Objects and presence/attribution state shared by the main loop tasks."""
+    def __init__(self, hydrapurr, reader, counter, scheduler, stats):
+        self.hydrapurr = hydrapurr
+        self.reader = reader
+        self.counter = counter
+        self.scheduler = scheduler
+        self.stats = stats
+        self.current_cat = 'unknown'
+        self.previous_lick_state_string = None
+        self.previous_active_cat = None  # no cat at start
+        self.previous_bout_count = 0
+        self.previous_printed_tag = None
+
+
+# --- Tasks ------------------------------------------------------------------
+
+def heartbeat_task(st):
+    t0 = st.stats.start()
+    st.hydrapurr.heartbeat()
+    st.stats.stop('heartbeat', t0)
+
+def send_stats(st):
+    hydrapurr = st.hydrapurr
+    lines = st.stats.summary_lines() + [st.counter.ring_summary(), suppressed_summary()]
+    hydrapurr.bluetooth_send('START,stats')
+    for line in lines: hydrapurr.bluetooth_send(line)
+    hydrapurr.bluetooth_send(f'END,stats,lines,{len(lines)}')
+
+def bluetooth_task(st):
+    # --- Check for data requests
+    hydrapurr = st.hydrapurr
+    if hydrapurr.bluetooth_busy(): return  # the running transfer reads the host's acks itself
+    background = Settings.bt_background_transfer
+    t0 = st.stats.start()
+    command = hydrapurr.bluetooth_poll()
+    st.stats.stop('bluetooth_poll', t0)
+    if command is not None:
+        infof('[Main Loop] Processing command: %s', command)
+        if command == 'licks': hydrapurr.bluetooth_send_data(kind='licks', background=background)
+        if command == 'system': hydrapurr.bluetooth_send_data(kind='system', background=background)
+        if command in ('licks,compressed', 'system,compressed'):
+            hydrapurr.bluetooth_send_data(kind=command.split(',')[0], background=background, compressed=True)
+        if command == 'stats': send_stats(st)
+        if command.startswith('get,'):  # block transfer: get,<kind>[,<offset>[,<segment>]]
+            parts = command.split(',')
+            try:
+                offset = int(parts[2]) if len(parts) > 2 else 0
+                segment = int(parts[3]) if len(parts) > 3 else None
+            except ValueError:
+                offset, segment = 0, None
+            hydrapurr.bluetooth_send_blocks(parts[1], offset, segment, background=background)
+        if command.startswith('segments,'):  # segments,<kind>[,<since>]
+            parts = command.split(',')
+            try: since = int(parts[2]) if len(parts) > 2 else 1
+            except ValueError: since = 1
+            hydrapurr.bluetooth_send_segments(parts[1], since)
+        infof('[Main Loop] Processed command: %s', command)
+
+def transfer_task(st):
+    # --- Send the next slice of a background download, between lick samples
+    t0 = st.stats.start()
+    if st.hydrapurr.bluetooth_step(): st.stats.stop('bt_transfer', t0)
+
+def rfid_task(st):
+    # --- Get the active cat --------------------------------------
+    t0 = st.stats.start()
+    pkt = st.reader.poll_active(force=True)
+    st.stats.stop('poll_active', t0)
+    if pkt is None: pkt = {}
+    tag_key = pkt.get("tag_key", None)
+
+    if tag_key is not None and st.previous_printed_tag != tag_key:
+        infof('[Main Loop] Detected key %s', tag_key)
+        st.previous_printed_tag = tag_key
+
+    current_cat = Cats.get_name(tag_key)
+    st.current_cat = current_cat
+    if current_cat != st.previous_active_cat:
+        infof('[Main Loop] Cat switched %-10s-> %-10s', st.previous_active_cat, current_cat)
+        st.previous_active_cat = current_cat
+        st.scheduler.trigger('screen')
+
+def lick_task(st):
+    # --- Process the lick --------------------------------------
+    hydrapurr, counter, current_cat, stats = st.hydrapurr, st.counter, st.current_cat, st.stats
+    counter.set_active_cat(current_cat)
+    if hydrapurr.lick_block is not None:
+        t0 = stats.start()
+        raw_block, timestamps = hydrapurr.read_lick_block()
+        t1 = stats.start()
+        counter.update_block(raw_block, timestamps, hydrapurr.lick_block.full_scale)
+    else:
+        t0 = stats.start()
+        raw_lick_value = hydrapurr.read_lick(binary=False)
+        t1 = stats.start()
+        counter.update(raw_lick_value)
+    stats.stop('read_lick', t0)
+    stats.stop('counter_update', t1)
+    current_lick_state_string = counter.get_state_string()
+    if current_lick_state_string != st.previous_lick_state_string:
+        infof('[Main Loop] %s', current_lick_state_string)
+        st.previous_lick_state_string = current_lick_state_string
+        bout_count = counter.get_bout_count()
+        if st.previous_bout_count != bout_count:
+            st.previous_bout_count = bout_count
+            st.scheduler.trigger('screen')
+
+
+    deployment_bout_count = Settings.deployment_bout_count
+    bout_count = counter.get_bout_count()
+
+    # Access rich bout information for smarter feeding decisions
+    bout_summary = counter.get_last_bout_summary()
+    if bout_summary is not None and enabled(INFO):
+        lick_count = bout_summary.get('lick_count', 0)
+        duration_ms = bout_summary.get('duration_ms', 0)
+        water_extent = bout_summary.get('water_extent', 0)
+        water_delta = bout_summary.get('water_delta', 0)
+
+        infof('[Main Loop] Last bout: %s licks, %sms, extent=%.3fmm, delta=%.3fmm', lick_count, duration_ms, water_extent, water_delta)
+
+        # Example: Only feed if bout shows significant water consumption
+        # if water_extent > Settings.min_water_delta_per_bout:
+        #     info(f'[Main Loop] Significant consumption detected, feeding {current_cat}')
+        #     hydrapurr.feeder_deploy(Settings.deployment_duration_ms)
+        #     counter.reset_counts()
+        #     st.scheduler.trigger('screen')
+
+    if bout_count >= deployment_bout_count and not hydrapurr.feeder_active():
+        # update before feeding to make sure user sees the count reached
+        update_screen(hydrapurr, counter, current_cat)
+
+        infof('[Main Loop] Deployment bout count %s reached, for %s', deployment_bout_count, current_cat)
+        # feeder_task switches the feeder off; detection keeps running meanwhile
+        hydrapurr.feeder_deploy(Settings.deployment_duration_ms)
+        counter.reset_counts()
+        st.scheduler.trigger('screen')
+
+def feeder_task(st):
+    st.hydrapurr.feeder_update()
+
+def store_task(st):
+    # --- Hand ring events to the store and write them once a licking burst is over
+    st.counter.drain_events()
+    st.counter.data_store.flush_if_idle()
+    sync_if_due()
+
+def screen_task(st):
+    # --- Update screen --------------------------------------
+    t0 = st.stats.start()
+    update_screen(st.hydrapurr, st.counter, st.current_cat)
+    st.stats.stop('update_screen', t0)
+
+def stats_task(st):
+    # --- Log and restart the latency window --------------------------------------
+    if enabled(INFO):
+        for line in st.stats.summary_lines(): infof('[Main Loop] Stats %s', line)
+        infof('[Main Loop] Stats %s', st.counter.ring_summary())
+        infof('[Main Loop] Stats %s', suppressed_summary())
+    st.stats.reset()
+
+
 def main_loop(level=DEBUG):
     info("[Main Loop] Start")
     set_system_log_level(level)
@@ -33,96 +198,28 @@ def main_loop(level=DEBUG):
     hydrapurr = HydraPurr()
     reader = TagReader()
     counter = LickSensor(cat_names=all_cat_names)
+    scheduler = Scheduler()
+    stats = LoopStats()
+    counter.data_store.timer = stats
+    st = LoopState(hydrapurr, reader, counter, scheduler, stats)
     info("[Main Loop] Objects created")
 
-    # Presence/attribution state
-    previous_lick_state_string = None
-    previous_active_cat = None  # no cat at start
-    previous_bout_count = 0
-    previous_printed_tag = None
+    # Tasks: lick sampling fastest and first, slow peripherals last
+    rfid_period_ms = int(1000 / Settings.max_tag_read_hz) if Settings.max_tag_read_hz > 0 else 0
+    scheduler.add('lick', lambda: lick_task(st), period_ms=Settings.lick_task_period_ms, priority=100)
+    scheduler.add('feeder', lambda: feeder_task(st), period_ms=Settings.feeder_period_ms, priority=60)
+    scheduler.add('rfid', lambda: rfid_task(st), period_ms=rfid_period_ms, priority=50)
+    scheduler.add('transfer', lambda: transfer_task(st), period_ms=Settings.bt_transfer_period_ms, priority=30)
+    scheduler.add('bluetooth', lambda: bluetooth_task(st), period_ms=Settings.bt_poll_period_ms, priority=20)
+    scheduler.add('heartbeat', lambda: heartbeat_task(st), period_ms=Settings.pixel_period_ms, priority=10)
+    scheduler.add('store', lambda: store_task(st), period_ms=Settings.store_period_ms, priority=8)
+    scheduler.add('screen', lambda: screen_task(st), period_ms=Settings.screen_period_ms, priority=5, on_demand=True)
+    task = scheduler.add('stats', lambda: stats_task(st), period_ms=Settings.stats_log_period_ms, priority=1)
+    task.next_ms = now_ms() + Settings.stats_log_period_ms  # first summary after a full window
 
     info("[Main Loop] Starting monitoring loop")
+    stats.reset()
     while True:
-        cat_changed = False
-        state_changed = False
-        bout_changed = False
-        
-        #current_time = now_ms()
-        hydrapurr.heartbeat()
-        
-        # --- Check for data requests
-        command = hydrapurr.bluetooth_poll()
-        if command is not None:
-            info(f'[Main Loop] Processing command: {command}')
-            if command == 'licks': hydrapurr.bluetooth_send_data(kind='licks')
-            if command == 'system': hydrapurr.bluetooth_send_data(kind='system')
-            info(f'[Main Loop] Processed command: {command}')
-
-        # --- Get the active cat --------------------------------------
-        pkt = reader.poll_active()
-        if pkt is None: pkt = {}
-        tag_key = pkt.get("tag_key", None)
-        
-        if tag_key is not None and previous_printed_tag != tag_key:
-            info(f'[Main Loop] Detected key {str(tag_key)}')
-            previous_printed_tag = tag_key
-            
-        current_cat = Cats.get_name(tag_key)
-        if current_cat != previous_active_cat:
-            p = ("%-10s" % str(previous_active_cat))
-            c = ("%-10s" % str(current_cat))
-            info(f'[Main Loop] Cat switched {p}-> {c}')
-            previous_active_cat = current_cat
-            cat_changed = True
-        
-        # --- Process the lick --------------------------------------
-        raw_lick_value = hydrapurr.read_lick(binary=False)
-        counter.set_active_cat(current_cat)
-        counter.update(raw_lick_value)
-        current_lick_state_string = counter.get_state_string()
-        if current_lick_state_string != previous_lick_state_string:
-            info('[Main Loop] ' + current_lick_state_string)
-            previous_lick_state_string = current_lick_state_string
-            bout_count = counter.get_bout_count()
-            if previous_bout_count != bout_count:
-                previous_bout_count = bout_count
-                bout_changed = True
-
-
-        deployment_bout_count = Settings.deployment_bout_count
-        bout_count = counter.get_bout_count()
-        
-        # Access rich bout information for smarter feeding decisions
-        bout_summary = counter.get_last_bout_summary()
-        if bout_summary is not None:
-            lick_count = bout_summary.get('lick_count', 0)
-            duration_ms = bout_summary.get('duration_ms', 0)
-            water_extent = bout_summary.get('water_extent', 0)
-            water_delta = bout_summary.get('water_delta', 0)
-            
-            info(f'[Main Loop] Last bout: {lick_count} licks, {duration_ms}ms, extent={water_extent:.3f}mm, delta={water_delta:.3f}mm')
-            
-            # Example: Only feed if bout shows significant water consumption
-            # if water_extent > Settings.min_water_delta_per_bout:
-            #     info(f'[Main Loop] Significant consumption detected, feeding {current_cat}')
-            #     hydrapurr.feeder_on()
-            #     time.sleep(Settings.deployment_duration_ms/1000)
-            #     hydrapurr.feeder_off()
-            #     counter.reset_counts()
-            #     bout_changed = True
-        
-        if bout_count >= deployment_bout_count:
-            # update before feeding to make sure user sees the count reached
-            update_screen(hydrapurr, counter, current_cat)
-
-            info(f'[Main Loop] Deployment bout count {deployment_bout_count} reached, for {current_cat}')
-            hydrapurr.feeder_on()
-            time.sleep(Settings.deployment_duration_ms/1000)
-            hydrapurr.feeder_off()
-            counter.reset_counts()
-            bout_changed = True
-
-        # --- Update screen --------------------------------------
-        if cat_changed or bout_changed: update_screen(hydrapurr,counter, current_cat)
-
-            
+        t0 = stats.start()
+        scheduler.run_once()
+        stats.loop_pass(t0)
@@ -30,6 +30,12 @@ try:
 except ImportError:
     PANDAS_AVAILABLE = False
 
+# Event kinds returned by BoutTracker.process_samples
+EVENT_RISE = 0  # Debounced 0->1 edge, value: duration of the 0 state
+EVENT_FALL = 1  # Debounced 1->0 edge, value: duration of the 1 state
+EVENT_LICK = 2  # Valid lick ended, value: lick duration
+EVENT_BOUT = 3  # Bout closed, value: bout summary (None if filtered by water)
+
 def now(): 
     """Placeholder for hardware-specific time function"""
     try:
@@ -128,6 +134,114 @@ class BoutTracker:
         
         return previous, current, duration, lick_added, bout_closed
     
+    def process_samples(self, states, timestamps, water=None):
+        """
+        Process a block of samples in one pass.
+        
+        Gives the same results as calling process_sample for every sample, but
+        keeps the state machine in local variables and only allocates for events.
+        
+        Args:
+            states: Sequence of 0/1 contact states (list, array, bytearray, ...)
+            timestamps: Sequence of timestamps in ms (a range works for fixed-rate blocks)
+            water: Sequence of water levels, a single level for the whole block, or None
+            
+        Returns:
+            list: (index, kind, timestamp_ms, value) tuples, kind being one of
+                  EVENT_RISE, EVENT_FALL, EVENT_LICK or EVENT_BOUT
+        """
+        events = []
+        constant_water = water is None or isinstance(water, (int, float))
+        water_level = water
+        
+        min_lick_ms = self.min_lick_ms
+        max_lick_ms = self.max_lick_ms
+        min_licks_per_bout = self.min_licks_per_bout
+        max_bout_gap_ms = self.max_bout_gap_ms
+        debounce_ms = self.debounce_ms
+        
+        state = self.state
+        state_since = self.state_since
+        candidate_state = self.candidate_state
+        candidate_since = self.candidate_since
+        last_lick_end_ms = self.last_lick_end_ms
+        lick_count = self.lick_count
+        
+        for i in range(len(states)):
+            binary_state = states[i]
+            timestamp_ms = timestamps[i]
+            
+            # Debounce (same rules as _debounce_state)
+            if binary_state != candidate_state:
+                candidate_state = binary_state
+                candidate_since = timestamp_ms
+            elif (candidate_state != state and candidate_since is not None and
+                  (timestamp_ms - candidate_since) >= debounce_ms):
+                previous = state
+                duration = timestamp_ms - state_since
+                state = candidate_state
+                state_since = timestamp_ms
+                if not constant_water:
+                    water_level = water[i]
+                
+                # Falling edge (1->0): potential lick end
+                if previous == 1 and state == 0:
+                    events.append((i, EVENT_FALL, timestamp_ms, duration))
+                    last_lick_end_ms = timestamp_ms
+                    if min_lick_ms <= duration <= max_lick_ms:
+                        lick_count += 1
+                        self.state_since = state_since
+                        self._track_lick(duration, water_level)
+                        events.append((i, EVENT_LICK, timestamp_ms, duration))
+                
+                # Rising edge (0->1): potential bout start
+                elif previous == 0 and state == 1:
+                    events.append((i, EVENT_RISE, timestamp_ms, duration))
+                    if self.current_bout_start_ms is None:
+                        self.current_bout_start_ms = timestamp_ms
+                        self.current_bout_start_water = water_level
+            
+            # Check if bout should be closed (quiet period exceeded)
+            if state == 0 and lick_count > 0 and (timestamp_ms - last_lick_end_ms) >= max_bout_gap_ms:
+                if lick_count >= min_licks_per_bout:
+                    if not constant_water:
+                        water_level = water[i]
+                    self.bout_count += 1
+                    previous_summary = self.last_bout_summary
+                    self._finalize_bout(timestamp_ms, water_level)
+                    summary = self.last_bout_summary
+                    events.append((i, EVENT_BOUT, timestamp_ms,
+                                   None if summary is previous_summary else summary))
+                self._reset_bout_tracking()
+                lick_count = 0
+        
+        self.state = state
+        self.state_since = state_since
+        self.candidate_state = candidate_state
+        self.candidate_since = candidate_since
+        self.last_lick_end_ms = last_lick_end_ms
+        self.lick_count = lick_count
+        return events
+    
+    def fill_gap(self, state, start_ms, end_ms, water=None):
+        """
+        Account for unsampled time between start_ms and end_ms (e.g. between two blocks).
+        
+        If the first sample after the gap is a different state, the edge happened
+        somewhere in the gap: it is timed at the middle of the gap, so the lick
+        it starts or ends is off by at most half the gap.
+        
+        Returns:
+            list: Events as from process_samples
+        """
+        if state == self.candidate_state or end_ms - start_ms < 2:
+            return []
+        middle = (start_ms + end_ms) // 2
+        times = [middle, middle + self.debounce_ms]
+        if times[1] >= end_ms:
+            times.pop()
+        return self.process_samples(bytes([state]) * len(times), times, water)
+    
     def _debounce_state(self, binary_state, timestamp_ms):
         """Debounce algorithm - filters noisy sensor inputs"""
         previous_state = self.state
@@ -177,6 +291,13 @@ class BoutTracker:
         end_water_level = end_water if end_water is not None else self.current_bout_licks[-1][1]
         water_delta = end_water_level - start_water if start_water is not None else None
         
+        # Water extent (max - min during bout)
+        if self.current_bout_licks and start_water is not None:
+            water_levels = [start_water] + [w for _, w in self.current_bout_licks]
+            water_extent = max(water_levels) - min(water_levels)
+        else:
+            water_extent = None
+        
         # Check minimum water consumption using extent (max - min during bout)
         # Positive extent means water level fluctuated (consumption causes fluctuation)
         if self.min_water_delta > 0 and water_extent is not None and water_extent <= self.min_water_delta:
@@ -187,13 +308,6 @@ class BoutTracker:
             self._reset_bout_tracking()
             return
         
-        # Water extent (max - min during bout)
-        if self.current_bout_licks and start_water is not None:
-            water_levels = [start_water] + [w for _, w in self.current_bout_licks]
-            water_extent = max(water_levels) - min(water_levels)
-        else:
-            water_extent = None
-        
         # Store bout summary
         self.last_bout_summary = {
             'cat_name': self.cat_name,
@@ -303,13 +417,8 @@ class BoutManager:
         Returns:
             dict: Processing results including bout summary
         """
-        cat_name = cat_name or self.active_cat
-        tracker = self.trackers.get(cat_name)
-        if tracker is None:
-            # Create tracker for new cat
-            tracker = BoutTracker(cat_name, **self._get_tracker_kwargs())
-            self.trackers[cat_name] = tracker
-            self.cat_names.append(cat_name)
+        tracker = self._get_or_create_tracker(cat_name)
+        cat_name = tracker.cat_name
         
         prev, curr, dur, lick_added, bout_closed = tracker.process_sample(
             binary_state, timestamp_ms, water_level
@@ -327,6 +436,33 @@ class BoutManager:
             'bout_summary': tracker.get_last_bout_summary()
         }
     
+    def process_samples(self, states, timestamps, water=None, cat_name=None):
+        """
+        Process a block of samples for the specified cat (or active cat).
+        
+        See BoutTracker.process_samples for arguments.
+        
+        Returns:
+            list: (index, kind, timestamp_ms, value) event tuples
+        """
+        tracker = self._get_or_create_tracker(cat_name)
+        return tracker.process_samples(states, timestamps, water)
+    
+    def fill_gap(self, state, start_ms, end_ms, water=None, cat_name=None):
+        """Time an edge in unsampled time at the middle of the gap (see BoutTracker.fill_gap)"""
+        return self._get_or_create_tracker(cat_name).fill_gap(state, start_ms, end_ms, water)
+    
+    def _get_or_create_tracker(self, cat_name=None):
+        """Get the tracker for a cat (or active cat), creating it for new cats"""
+        cat_name = cat_name or self.active_cat
+        tracker = self.trackers.get(cat_name)
+        if tracker is None:
+            # Create tracker for new cat
+            tracker = BoutTracker(cat_name, **self._get_tracker_kwargs())
+            self.trackers[cat_name] = tracker
+            self.cat_names.append(cat_name)
+        return tracker
+    
     def _get_tracker_kwargs(self):
         """Get initialization parameters from first tracker"""
         first_tracker = next(iter(self.trackers.values()))
@@ -335,7 +471,8 @@ class BoutManager:
             'max_lick_ms': first_tracker.max_lick_ms,
             'min_licks_per_bout': first_tracker.min_licks_per_bout,
             'max_bout_gap_ms': first_tracker.max_bout_gap_ms,
-            'debounce_ms': first_tracker.debounce_ms
+            'debounce_ms': first_tracker.debounce_ms,
+            'min_water_delta': first_tracker.min_water_delta
         }
     
     def set_active_cat(self, cat_name):
@@ -380,7 +517,8 @@ class BoutManager:
         if cat_name in self.trackers:
             self.trackers[cat_name].reset_counts()
     
-    def process_dataframe(self, df, group_gap_ms=None, min_group_size=None, min_water_delta=None):
+    def process_dataframe(self, df, group_gap_ms=None, min_group_size=None, min_water_delta=None,
+                          engine='numpy'):
         """
         Batch process a dataframe of lick data (offline analysis).
         
@@ -389,12 +527,15 @@ class BoutManager:
             group_gap_ms: Override max_bout_gap_ms for this analysis
             min_group_size: Override min_licks_per_bout for this analysis
             min_water_delta: Override min_water_delta for this analysis
+            engine: 'numpy' (vectorized, default) or 'loop' (row-by-row reference)
             
         Returns:
             tuple: (events_df, summary_df)
         """
         if not PANDAS_AVAILABLE:
             raise ImportError("pandas and numpy required for dataframe processing")
+        if engine not in ('numpy', 'loop'):
+            raise ValueError("engine must be 'numpy' or 'loop'")
         
         # Use provided parameters or fall back to tracker settings
         tracker = next(iter(self.trackers.values()))
@@ -402,25 +543,35 @@ class BoutManager:
         min_group_size = min_group_size or tracker.min_licks_per_bout
         min_water_delta = min_water_delta or tracker.min_water_delta
         
-        # Filter to keep only state transitions
-        lick_events = self._filter_lick_events(df)
-        
-        # Process events
-        results = self._process_lick_events(lick_events, group_gap_ms, min_water_delta)
-        results_df = pd.DataFrame(
-            results,
-            columns=['index', 'time', 'duration', 'water', 'water_delta', 'group']
-        )
+        if engine == 'numpy':
+            # Transitions, onset/offset pairing and grouping in array operations
+            results_df = self._lick_events_vectorized(df, group_gap_ms)
+        else:
+            # Filter to keep only state transitions
+            lick_events = self._filter_lick_events(df)
+            
+            # Process events
+            results = self._process_lick_events(lick_events, group_gap_ms, min_water_delta)
+            results_df = pd.DataFrame(
+                results,
+                columns=['index', 'time', 'duration', 'water', 'water_delta', 'group']
+            )
         
         # Apply minimum group size and water consumption filtering
         if min_group_size > 1 and not results_df.empty:
-            results_df = self._filter_small_groups(results_df, min_group_size, min_water_delta)
+            if engine == 'numpy':
+                results_df = self._filter_small_groups_vectorized(results_df, min_group_size, min_water_delta)
+            else:
+                results_df = self._filter_small_groups(results_df, min_group_size, min_water_delta)
         
         # Add group index
         results_df = self._add_group_indices(results_df)
         
         # Create summary
-        summary_df = self._create_bout_summary(results_df)
+        if engine == 'numpy':
+            summary_df = self._create_bout_summary_vectorized(results_df)
+        else:
+            summary_df = self._create_bout_summary(results_df)
         
         return results_df, summary_df
     
@@ -565,4 +716,108 @@ class BoutManager:
                         "water_extent": group_df["water"].max() - group_df["water"].min()
                     })
         
-        return pd.DataFrame(summary_rows, columns=["group", "duration", "n", "water_delta", "water_extent"])
\ No newline at end of file
+        return pd.DataFrame(summary_rows, columns=["group", "duration", "n", "water_delta", "water_extent"])
+    
+    # ------------------------------------------------------------------
+    # Vectorized engine (same results as the loop methods above)
+    # ------------------------------------------------------------------
+    
+    def _lick_events_vectorized(self, df, group_gap_ms):
+        """Find transitions, pair onsets with offsets and assign groups using array operations"""
+        columns = ['index', 'time', 'duration', 'water', 'water_delta', 'group']
+        if df is None or df.empty:
+            return pd.DataFrame([], columns=columns)
+        
+        # Skip rows with NaN values (same rule as _filter_lick_events)
+        valid = (df['state'].notna() & df['water'].notna()).to_numpy()
+        state = df['state'].to_numpy()[valid].astype(np.int64)
+        water = df['water'].to_numpy()[valid]
+        # Use mono_ms for timestamp if available, otherwise fall back to time
+        time_column = 'mono_ms' if 'mono_ms' in df.columns else 'time'
+        times = df[time_column].to_numpy()[valid]
+        
+        # Keep only 0->1 and 1->0 transitions
+        previous = np.concatenate(([0], state[:-1]))
+        is_edge = ((previous == 0) & (state == 1)) | ((previous == 1) & (state == 0))
+        state, water, times = state[is_edge], water[is_edge], times[is_edge]
+        
+        # Classify the retained events and pair each offset with the latest onset
+        previous = np.concatenate(([0], state[:-1]))
+        is_onset = (previous == 0) & (state == 1)
+        is_offset = (previous == 1) & (state == 0)
+        if not is_offset.any():
+            return pd.DataFrame([], columns=columns)
+        positions = np.arange(len(state))
+        last_onset = np.maximum.accumulate(np.where(is_onset, positions, 0))[is_offset]
+        
+        offset_time = times[is_offset]
+        offset_water = water[is_offset]
+        onset_time = times[last_onset]
+        
+        if np.issubdtype(offset_time.dtype, np.datetime64):
+            one_ms = np.timedelta64(1, 'ms')
+            duration = (offset_time - onset_time) / one_ms
+            gaps = np.diff(offset_time) / one_ms
+        else:
+            duration = offset_time - onset_time
+            gaps = np.diff(offset_time)
+        
+        # A new group starts at the first offset and after every gap > group_gap_ms
+        new_group = np.concatenate(([True], gaps > group_gap_ms))
+        group = np.cumsum(new_group) - 1
+        
+        return pd.DataFrame({
+            'index': np.arange(len(offset_time)),
+            'time': offset_time,
+            'duration': duration,
+            'water': offset_water,
+            'water_delta': offset_water - water[last_onset],
+            'group': group,
+        }, columns=columns)
+    
+    def _filter_small_groups_vectorized(self, results_df, min_group_size, min_water_delta):
+        """Vectorized counterpart of _filter_small_groups"""
+        group = results_df["group"]
+        drop = group.map(group.value_counts()) < min_group_size
+        
+        # Water extent (max - min during bout) must exceed min_water_delta when enabled
+        if min_water_delta > 0:
+            water = results_df["water"].groupby(group)
+            extent = water.transform("max") - water.transform("min")
+            drop |= extent <= min_water_delta
+        
+        results_df.loc[drop, "group"] = np.nan
+        kept_mask = results_df["group"].notna()
+        kept = results_df.loc[kept_mask, "group"]
+        # Renumber kept groups 0..k-1 (groups are non-decreasing along the rows)
+        kept_groups = np.unique(kept.to_numpy())
+        results_df.loc[kept_mask, "group"] = np.searchsorted(kept_groups, kept.to_numpy()).astype(kept.dtype)
+        return results_df
+    
+    def _create_bout_summary_vectorized(self, results_df):
+        """Vectorized counterpart of _create_bout_summary"""
+        columns = ["group", "duration", "n", "water_delta", "water_extent"]
+        if results_df.empty:
+            return pd.DataFrame([], columns=columns)
+        grouped = results_df.dropna(subset=["group"])
+        if grouped.empty:
+            return pd.DataFrame([], columns=columns)
+        
+        # Groups occupy contiguous runs of rows, so reduce over run boundaries
+        group = grouped["group"].to_numpy().astype(int)
+        times = grouped["time"].to_numpy()
+        water = grouped["water"].to_numpy()
+        starts = np.flatnonzero(np.concatenate(([True], group[1:] != group[:-1])))
+        ends = np.concatenate((starts[1:], [len(group)])) - 1
+        
+        duration = times[ends] - times[starts]
+        if np.issubdtype(duration.dtype, np.timedelta64):
+            duration = duration / np.timedelta64(1, 'ms')
+        
+        return pd.DataFrame({
+            "group": group[starts],
+            "duration": duration,
+            "n": ends - starts + 1,
+            "water_delta": water[ends] - water[starts],
+            "water_extent": np.maximum.reduceat(water, starts) - np.minimum.reduceat(water, starts),
+        }, columns=columns)
@@ -4,11 +4,18 @@ import Settings
 from components import MyDigital
 from components import MyOLED
 from components import MyADC
+from components import MyBufferedADC
 from components import MyBT
+from components.MyBT import BlockSender, ChunkSender, segments_message
 from components import MyStore
+from components.MyStore import find_store, flush_path, normalize_to_sd
+from components.LickRecord import LickCodec
+from components.RotationManifest import RotationManifest
+from components.TransferEncoding import RowEncoder
 from components import MyRTC
 from components import MyPixel
-from components.MySystemLog import debug, info, warn, error
+from components.MySystemLog import debug, debugf, info, infof, warn, error
+from components.MySystemLog import flush as flush_system_log
 import time
 
 class HydraPurr:
@@ -17,6 +24,7 @@ class HydraPurr:
         self.indicator = MyDigital(pin=board.D25, direction="output")
         # Defines the relay that controls the feeder
         self.feeder = MyDigital(pin=board.D6, direction='output')
+        self.feeder_off_at_ms = None  # deadline of a timed deployment
         # Defines the OLED screen
 
         self.screen = MyOLED()
@@ -25,11 +33,30 @@ class HydraPurr:
 
         # Defines the Bluetooth hardware module
         self.bluetooth = MyBT()
-        # Defines the lick sensor
-        self.lick = MyADC(1)
+        # Defines the lick sensor (one reading per call, or fixed-rate blocks)
+        self.lick = None
+        self.lick_block = None
+        if getattr(Settings, 'lick_acquisition', 'single') == 'buffered':
+            # read_block() holds up the loop for the whole block: keep it within lick_block_max_ms
+            block_size = Settings.lick_block_size
+            max_size = Settings.lick_block_max_ms * Settings.lick_sample_rate_hz // 1000
+            if block_size > max_size:
+                warn(f"[HydraPurr] lick_block_size {block_size} exceeds lick_block_max_ms, using {max_size}")
+                block_size = max_size
+            self.lick_block = MyBufferedADC(
+                1,
+                sample_rate=Settings.lick_sample_rate_hz,
+                block_size=block_size,
+                full_scale=Settings.lick_adc_full_scale
+            )
+        else:
+            self.lick = MyADC(1)
         self.lick_threshold = 2.0
         # Storing the storage files
         self.stores = {}
+        self._bt_buffer = None  # reused for sending data files
+        self.bt_transfer = None  # background transfer (ChunkSender/BlockSender), see bluetooth_step()
+        self._bt_transfer_done = None
         # Defines the RTC for timekeeping
         self.rtc = MyRTC()
         debug("[HydraPurr] HydraPurr initialized")
@@ -40,12 +67,19 @@ class HydraPurr:
 
     # --- read lick ---
     def read_lick(self, binary=True):
-        lick_value = self.lick.read()
+        if self.lick is None:
+            lick_value = self.lick_block.to_voltage(self.lick_block.buffer[-1])
+        else:
+            lick_value = self.lick.read()
         lick_threshold = self.lick_threshold
         if binary: lick_value = 1 if lick_value < lick_threshold else 0
         #debug(f'[HydraPurr] Lick value: {lick_value}, binary: {binary}')
         return lick_value
 
+    def read_lick_block(self):
+        """Capture one fixed-rate block of raw lick samples. Returns (buffer, timestamps)."""
+        return self.lick_block.read_block()
+
     # --- indicator LED control ---
     def indicator_on(self):
         self.indicator.write(True)
@@ -72,18 +106,34 @@ class HydraPurr:
         self.feeder.toggle()
         debug('[HydraPurr] Feeder toggle')
 
+    def feeder_deploy(self, duration_ms):
+        """Switch the feeder on; feeder_update() switches it off after duration_ms."""
+        self.feeder_on()
+        self.feeder_off_at_ms = int(time.monotonic() * 1000) + duration_ms
+        debugf('[HydraPurr] Feeder deployed for %s ms', duration_ms)
+
+    def feeder_update(self):
+        """Switch the feeder off once a timed deployment is over. Call every loop pass."""
+        if self.feeder_off_at_ms is None: return
+        if int(time.monotonic() * 1000) >= self.feeder_off_at_ms:
+            self.feeder_off_at_ms = None
+            self.feeder_off()
+
+    def feeder_active(self):
+        return self.feeder_off_at_ms is not None
+
     # --- screen ---
     def write(self, text, x=0, y=0):
         self.screen.write(str(text), x, y)
-        debug(f'[HydraPurr] Screen write: {text}')
+        debugf('[HydraPurr] Screen write: %s', text)
     
     def write_line(self, line_nr, text):
         self.screen.write_line(line_nr, str(text))
-        debug(f'[HydraPurr] Line write: {text}')
+        debugf('[HydraPurr] Line write: %s', text)
         
     def clear_screen(self):
         self.screen.clear()
-        debug(f'[HydraPurr] Cleared screen')
+        debug('[HydraPurr] Cleared screen')
     
     def show_screen(self):
         self.screen.show()
@@ -94,53 +144,170 @@ class HydraPurr:
     def bluetooth_send(self, message):
         message = str(message)
         self.bluetooth.send(message)
-        debug(f'[HydraPurr] Bluetooth sent: {message}')
+        debugf('[HydraPurr] Bluetooth sent: %s', message)
 
     def bluetooth_poll(self):
         message = self.bluetooth.poll()
-        if message is not None: debug(f'[HydraPurr] Bluetooth received: {message}')
+        if message is not None: debugf('[HydraPurr] Bluetooth received: %s', message)
         return message
 
-    def bluetooth_send_data(self, kind):
+    def bluetooth_send_data(self, kind, background=False, compressed=False):
+        """
+        Send a data file between START/END messages; background: as
+        bluetooth_step() slices; compressed: lines in TransferEncoding.
+        """
+        chunks = self._data_chunks(kind, compressed)
+        if chunks is None: return None
+        if background: return self._start_transfer(ChunkSender(self.bluetooth, chunks))
+        for chunk in chunks: self.bluetooth.send_bytes(chunk)
+
+    def _data_chunks(self, kind, compressed=False):
         # pick file
-        filename = None
-        if kind == "licks": filename = Settings.lick_data_filename
-        if kind == "system": filename = Settings.system_log_filename
+        filename = self._data_filename(kind)
         print(kind, filename)
-        if filename is None: return
+        if filename is None: return None
 
+        if kind == "system": flush_system_log()  # lines still in the log's open handle
         selected_storage = self.select_data_log(filename)
-        it = selected_storage.iter_lines()
+        buf = self._bt_buffer
+        if buf is None: buf = self._bt_buffer = bytearray(getattr(Settings, 'bt_chunk_bytes', 512))
+        if compressed: return self._iter_compressed_chunks(kind, selected_storage)
+        return self._iter_data_chunks(kind, selected_storage, buf)
 
+    def _iter_data_chunks(self, kind, selected_storage, buf):
+        """The bytes of a data transfer, in chunks that are views of buf where possible."""
         lines = 0
         bytes_out = 0
-        bytes_out += self.bluetooth.send(f"START,{kind}")
-
-        for line in it:
-            message = ",".join(str(x) for x in line)  # one CSV line
-            sent = self.bluetooth.send(message)  # add_crlf=True appends \r\n
-            bytes_out += (sent or 0)
-            lines += 1
-            time.sleep(0.002)
-
-            # # every 100 lines, give receiver a chance to say STOP
-            # if (lines % 100) == 0:
-            #     # non-blocking check for inbound command
-            #     cmd = self.bluetooth.poll()
-            #     if cmd and cmd.strip().upper() == "STOP":
-            #         self.bluetooth.send(f"ABORT,{kind},at_line,{lines}")
-            #         debug(f"[HydraPurr] Bluetooth aborted {kind} at line {lines}")
-            #         return
+        start = self.bluetooth.message_bytes(f"START,{kind}")
+        bytes_out += len(start)
+        yield start
+
+        if selected_storage.codec is None:
+            # Text files go out as stored: file chunks straight to the UART
+            for chunk in selected_storage.read_chunks(buf):
+                lines += buf.count(b"\n", 0, len(chunk))
+                bytes_out += len(chunk)
+                yield chunk
+        else:
+            # Binary files are decoded to CSV lines, packed into the same buffer
+            view = memoryview(buf)
+            n = 0
+            for line in selected_storage.iter_lines(split=False):
+                data = (line + "\n").encode("utf-8")
+                if n + len(data) > len(buf):
+                    bytes_out += n
+                    yield view[:n]
+                    n = 0
+                if len(data) > len(buf):
+                    bytes_out += len(data)
+                    yield data
+                else:
+                    buf[n:n + len(data)] = data
+                    n += len(data)
+                lines += 1
+            if n:
+                bytes_out += n
+                yield view[:n]
 
         # Optional: announce end
-        bytes_out += self.bluetooth.send(f"END,{kind},lines,{lines},bytes,{bytes_out}")
-        info(f"[HydraPurr] Bluetooth sent {kind} data: {lines} lines, {bytes_out} bytes")
+        end = self.bluetooth.message_bytes(f"END,{kind},lines,{lines},bytes,{bytes_out}")
+        bytes_out += len(end)
+        yield end
+        infof("[HydraPurr] Bluetooth sent %s data: %d lines, %d bytes", kind, lines, bytes_out)
         print(f"[HydraPurr] Bluetooth sent {kind} data: {lines} lines, {bytes_out} bytes")
 
+    def _iter_compressed_chunks(self, kind, selected_storage):
+        """The bytes of a compressed data transfer: one encoded line per chunk."""
+        encoder = RowEncoder()
+        start = self.bluetooth.message_bytes(f"START,{kind},compressed")
+        bytes_out = len(start)
+        yield start
+        for line in selected_storage.iter_lines(split=False):
+            data = encoder.encode(line)
+            bytes_out += len(data)
+            yield data
+        data = encoder.end()
+        bytes_out += len(data)
+        yield data
+        end = self.bluetooth.message_bytes(f"END,{kind},lines,{encoder.lines},bytes,{bytes_out}")
+        bytes_out += len(end)
+        yield end
+        infof("[HydraPurr] Bluetooth sent %s data compressed: %d lines, %d bytes", kind, encoder.lines, bytes_out)
+
+    def _data_filename(self, kind):
+        if kind == "licks" and getattr(Settings, 'lick_data_format', 'text') == 'binary': return Settings.lick_binary_filename
+        if kind == "licks": return Settings.lick_data_filename
+        if kind == "system": return Settings.system_log_filename
+        return None
+
+    def _flush_for_transfer(self, kind, filename):
+        if kind == "system": flush_system_log()
+        selected_storage = self.select_data_log(filename)
+        flush_path(selected_storage.file_path)  # every writer of the file, e.g. LickSensor's store
+        return selected_storage.file_path
+
+    def bluetooth_send_segments(self, kind, since=1):
+        """Answer with the rotation segments of a data file from index since on (see MyBT)."""
+        filename = self._data_filename(kind)
+        if filename is None: return None
+        path = self._flush_for_transfer(kind, filename)
+        segments = RotationManifest(path).segments(since)
+        self.bluetooth.send(segments_message(kind, segments))
+        return segments
+
+    def bluetooth_send_blocks(self, kind, offset=0, segment=None, background=False):
+        """
+        Send a data file, or one of its rotated segments, as acknowledged blocks
+        from offset. background: return at once and send as bluetooth_step() slices.
+        """
+        filename = self._data_filename(kind)
+        if filename is None: return None
+        path = self._flush_for_transfer(kind, filename)
+        name = filename
+        if segment is not None:
+            path = RotationManifest(path).segment_path(segment)
+            name = f"{filename}.{segment}"
+        tick_bytes = getattr(Settings, 'bt_tick_bytes', 64) if background else None
+        try:
+            sender = BlockSender(self.bluetooth, path, offset, name=name, tick_bytes=tick_bytes)
+        except OSError as e:
+            warn(f"[HydraPurr] Bluetooth block transfer of {kind} failed: {e}")
+            self.bluetooth.send(f"ERROR,{kind},{e}")
+            return None
+        if background: return self._start_transfer(sender, lambda s: self._log_blocks(s, name, offset))
+        while sender.step(): pass
+        self._log_blocks(sender, name, offset)
+        return sender
+
+    def _log_blocks(self, sender, name, offset):
+        infof("[HydraPurr] Bluetooth blocks %s: %s, bytes %d-%d, %d frames, %d resent",
+              name, "ok" if sender.ok else "aborted", offset, sender.acked, sender.frames_sent, sender.resent)
+
+    # --- Background transfer: one bounded slice per main loop pass ---
+    def _start_transfer(self, sender, done=None):
+        if self.bt_transfer is not None: self.bt_transfer.close()
+        self.bt_transfer = sender
+        self._bt_transfer_done = done
+        return sender
+
+    def bluetooth_busy(self):
+        """True while a background transfer runs (it reads the host's messages itself)."""
+        return self.bt_transfer is not None
+
+    def bluetooth_step(self):
+        """Send the next slice of the background transfer. Returns True while one is running."""
+        sender = self.bt_transfer
+        if sender is None: return False
+        if sender.step(): return True
+        sender.close()
+        self.bt_transfer = None
+        if self._bt_transfer_done is not None: self._bt_transfer_done(sender)
+        return False
+
     # --- RTC time ---
     def set_time(self, yr=None, mt=None, dy=None, hr=None, mn=None, sc=None):
         self.rtc.set_time(yr, mt, dy, hr, mn, sc)
-        debug(f'[HydraPurr] Set time {(yr,mt,dy,hr,mn,sc)}')
+        debugf('[HydraPurr] Set time %s', (yr,mt,dy,hr,mn,sc))
 
     def get_time(self, as_string=False):
         return self.rtc.get_time(as_string=as_string, with_seconds=True)
@@ -165,7 +332,17 @@ class HydraPurr:
     def select_data_log(self, filename):
         exists = filename in self.stores
         if not exists:
-            self.stores[filename] = MyStore(filename, max_lines=Settings.data_log_max_lines)
+            # Share the writer's store: a second one would rotate the file on its own
+            store = find_store(normalize_to_sd(filename))
+            if store is None:
+                codec = None
+                max_lines = Settings.data_log_max_lines
+                if filename == Settings.lick_binary_filename:  # decoded to rows for reading and transfer
+                    codec = LickCodec()
+                if filename == Settings.system_log_filename:  # MySystemLog's sink writes and rotates it
+                    max_lines = 0
+                store = MyStore(filename, max_lines=max_lines, codec=codec)
+            self.stores[filename] = store
         selected_storage = self.stores[filename]
         return selected_storage
 
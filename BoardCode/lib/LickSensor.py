@@ -3,7 +3,7 @@ LickSensor.py - Hardware integration layer for lick detection
 
 This module provides the hardware-specific implementation that:
 - Reads contact and water level sensors
-- Logs data to SD card
+- Logs data to SD card (events wait in a RAM ring until the cat stops licking)
 - Uses BoutDetection for the core algorithm
 - Provides clean interface to MainLoop
 
@@ -12,10 +12,13 @@ interface but with enhanced bout tracking capabilities.
 """
 
 import time
+from array import array
 from components.MyStore import MyStore
-from components.MyADC import MyADC
+from components.LickRecord import LickCodec
+from components.MyADC import MyADC, MyADCAverager
+from components.MySystemLog import warn
 import Settings
-from BoutDetection import BoutManager
+from BoutDetection import BoutManager, EVENT_LICK, EVENT_BOUT
 
 def now(): 
     """Get current time in milliseconds (hardware-specific)"""
@@ -46,12 +49,40 @@ class LickSensor:
         """
         # Hardware components
         self.water_sensor = MyADC(0)  # Water level sensor on channel 0
+        # Running mean, one reading per update() so water averaging never blocks lick sampling
+        self.water_average = MyADCAverager(
+            self.water_sensor,
+            window=Settings.water_average_samples,
+            sample_interval_ms=Settings.water_sample_interval_ms
+        )
+        binary = getattr(Settings, 'lick_data_format', 'text') == 'binary'
         self.data_store = MyStore(
-            Settings.lick_data_filename,
+            Settings.lick_binary_filename if binary else Settings.lick_data_filename,
             auto_header=["cat_name", "state", "lick", "bout", "water"],
-            max_lines=Settings.data_log_max_lines
+            max_lines=Settings.data_log_max_lines,
+            codec=LickCodec() if binary else None
         )
         self.lick_threshold = 2.0  # Voltage threshold for contact detection
+        self._block_states = None  # Reused binary buffer for update_block
+        self._block_last_ms = None  # Time of the last sample of the previous block
+        
+        # Event ring: lick/bout rows wait here (preallocated) and are only added to
+        # data_store by drain_events(), so SD writes stay out of running bouts
+        size = getattr(Settings, 'lick_ring_size', 64)
+        self.ring_size = size
+        self.ring_high_water = min(getattr(Settings, 'lick_ring_high_water', 48), size)
+        self._ring_cat = [None] * size
+        self._ring_state = bytearray(size)
+        self._ring_lick = array('L', [0] * size)
+        self._ring_bout = array('L', [0] * size)
+        self._ring_water = [0.0] * size
+        self._ring_mono = array('L', [0] * size)
+        self._ring_head = 0        # oldest pending event
+        self._ring_count = 0
+        self.ring_peak = 0         # most events pending at once
+        self.ring_dropped = 0      # oldest events overwritten because the ring was full
+        self._dropped_reported = 0
+        self.data_store.source = lambda: self.drain_events(force=True)
         
         # Core detection algorithm
         if min_water_delta is None:
@@ -92,7 +123,8 @@ class LickSensor:
         
         # Get current timestamp and water level
         timestamp_ms = now()
-        water_level = self.water_sensor.mean(10)  # Average 10 samples
+        self.water_average.tick()
+        water_level = self.water_average.value()
         
         # Process through core algorithm
         result = self.bout_manager.process_sample(
@@ -106,7 +138,8 @@ class LickSensor:
                 result['current_state'],
                 result['lick_count'],
                 result['bout_count'],
-                water_level
+                water_level,
+                timestamp_ms
             )
         
         # Add water level to results
@@ -114,10 +147,117 @@ class LickSensor:
         
         return result
     
-    def _log_to_sd_card(self, cat_name, state, lick_count, bout_count, water_level):
-        """Log event data to SD card"""
-        data = [cat_name, state, lick_count, bout_count, water_level]
-        self.data_store.add(data)
+    def update_block(self, raw_values, timestamps, full_scale=65535, cat_name=None):
+        """
+        Process a block of fixed-rate raw ADC samples.
+        
+        Args:
+            raw_values: Raw ADC samples (0-full_scale), e.g. from MyBufferedADC
+            timestamps: Timestamp (ms) of every sample
+            full_scale: Raw value that corresponds to 3.3 V
+            cat_name: Name of cat (optional, uses active cat if None)
+            
+        Returns:
+            list: Lick/bout events from BoutManager.process_samples
+        """
+        # Convert raw ADC to binary states in a reused buffer
+        n = len(raw_values)
+        states = self._block_states
+        if states is None or len(states) != n:
+            states = self._block_states = bytearray(n)
+        threshold = self.lick_threshold / 3.3 * full_scale
+        for i in range(n):
+            states[i] = 1 if raw_values[i] < threshold else 0
+        
+        self.water_average.tick()
+        water_level = self.water_average.value()
+        
+        # Time between blocks is not sampled: an edge in it is timed at the middle of the gap
+        events = []
+        last_ms = self._block_last_ms
+        step_ms = timestamps[1] - timestamps[0] if n > 1 else 1
+        if last_ms is not None and timestamps[0] - last_ms > step_ms:
+            gap_events = self.bout_manager.fill_gap(states[0], last_ms, timestamps[0], water_level, cat_name)
+            events = [(0, kind, timestamp_ms, value) for _, kind, timestamp_ms, value in gap_events]
+        self._block_last_ms = timestamps[n - 1]
+        events += self.bout_manager.process_samples(states, timestamps, water_level, cat_name)
+        
+        # Blocks are shorter than a bout gap, so counts only reset between blocks:
+        # earlier events in the block are the final counts minus the later events
+        logged = [e for e in events if e[1] == EVENT_LICK or e[1] == EVENT_BOUT]
+        if logged:
+            cat_name = cat_name or self.bout_manager.active_cat
+            licks_after = sum(1 for e in logged if e[1] == EVENT_LICK)
+            bouts_after = len(logged) - licks_after
+            lick_count = self.bout_manager.get_lick_count(cat_name)
+            bout_count = self.bout_manager.get_bout_count(cat_name)
+            for event in logged:
+                if event[1] == EVENT_LICK:
+                    licks_after -= 1
+                    self._log_to_sd_card(cat_name, 0, lick_count - licks_after, bout_count - bouts_after, water_level, event[2])
+                else:
+                    bouts_after -= 1
+                    self._log_to_sd_card(cat_name, 0, 0, bout_count - bouts_after, water_level, event[2])
+        return events
+    
+    def _log_to_sd_card(self, cat_name, state, lick_count, bout_count, water_level, timestamp_ms=None):
+        """Queue event data for the SD card (written right away without a ring)"""
+        if self.ring_size == 0:
+            self.data_store.add([cat_name, state, lick_count, bout_count, water_level], timestamp_ms)
+            return
+        if timestamp_ms is None: timestamp_ms = now()
+        size = self.ring_size
+        if self._ring_count == size:
+            # Full: overwrite the oldest event (rows carry running counts, so the newest matter most)
+            self._ring_head = (self._ring_head + 1) % size
+            self._ring_count -= 1
+            self.ring_dropped += 1
+        i = (self._ring_head + self._ring_count) % size
+        self._ring_cat[i] = cat_name
+        self._ring_state[i] = state
+        self._ring_lick[i] = lick_count
+        self._ring_bout[i] = bout_count
+        self._ring_water[i] = water_level
+        self._ring_mono[i] = timestamp_ms
+        self._ring_count += 1
+        if self._ring_count > self.ring_peak: self.ring_peak = self._ring_count
+    
+    def bout_running(self):
+        """True while any cat is in contact or has licks in an open bout"""
+        for tracker in self.bout_manager.trackers.values():
+            if tracker.state == 1 or tracker.lick_count > 0:
+                return True
+        return False
+    
+    def drain_events(self, force=False):
+        """
+        Add pending ring events to the data store (call from the main loop).
+        
+        Events stay in RAM while a bout is running unless the ring holds
+        ring_high_water events or force is True.
+        
+        Returns:
+            int: Number of events handed to the data store
+        """
+        count = self._ring_count
+        if count == 0: return 0
+        if not force and count < self.ring_high_water and self.bout_running(): return 0
+        size = self.ring_size
+        for _ in range(count):
+            i = self._ring_head
+            self.data_store.add([self._ring_cat[i], self._ring_state[i], self._ring_lick[i],
+                                 self._ring_bout[i], self._ring_water[i]], self._ring_mono[i])
+            self._ring_cat[i] = None
+            self._ring_head = (i + 1) % size
+        self._ring_count = 0
+        if self.ring_dropped != self._dropped_reported:
+            warn(f'[LickSensor] Event ring full: {self.ring_dropped - self._dropped_reported} events dropped')
+            self._dropped_reported = self.ring_dropped
+        return count
+    
+    def ring_summary(self):
+        """Ring stats line in the LoopStats summary format"""
+        return f'lick_ring,pending,{self._ring_count},peak,{self.ring_peak},dropped,{self.ring_dropped},size,{self.ring_size}'
     
     def set_active_cat(self, cat_name):
         """Set the active cat (finalizes previous cat's bout)"""
@@ -145,6 +285,7 @@ class LickSensor:
     
     def clear_log(self):
         """Clear the SD card log file"""
+        self._ring_count = 0
         self.data_store.empty()
         # Re-add header
         self.data_store.header(
@@ -168,7 +309,7 @@ class LickSensor:
     def get_state_data(self, cat_name=None):
         """Get state data (backward compatibility)"""
         cat_name = cat_name or self.bout_manager.active_cat
-        water_level = self.water_sensor.mean(10)
+        water_level = self.water_average.value()
         return [
             cat_name,
             self.bout_manager.get_state(cat_name),  # This method needs to be added
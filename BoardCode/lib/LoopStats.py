@@ -0,0 +1,88 @@
+# LoopStats.py — per-stage latency histograms for the main loop
+# - Each stage keeps a fixed histogram (preallocated array) of durations in us
+# - Percentiles are read from the histogram: p50/p99 report the upper edge
+#   of the bucket that holds the percentile, max is exact
+# - Loop rate = loop passes per second since the last reset()
+
+import array
+import time
+
+# Stages timed by the main loop (counter_update includes its own sd_write time)
+STAGES = ('loop', 'heartbeat', 'bluetooth_poll', 'poll_active', 'read_lick',
+          'counter_update', 'update_screen', 'sd_write', 'bt_transfer')
+
+# Bucket upper edges (us); the last bucket collects everything slower
+BUCKET_US = (50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000,
+             50000, 100000, 200000, 500000, 1000000)
+
+
+class StageHistogram:
+    def __init__(self):
+        self.counts = array.array('L', [0] * (len(BUCKET_US) + 1))
+        self.n = 0
+        self.max_us = 0
+
+    def add(self, us):
+        i = 0
+        for edge in BUCKET_US:
+            if us <= edge: break
+            i += 1
+        self.counts[i] += 1
+        self.n += 1
+        if us > self.max_us: self.max_us = us
+
+    def percentile(self, p):
+        """Upper bucket edge (us) below which p percent of the samples fall."""
+        if self.n == 0: return 0
+        target = (self.n * p + 99) // 100  # rank of the sample, rounded up
+        seen = 0
+        for i in range(len(self.counts)):
+            seen += self.counts[i]
+            if seen >= target:
+                return BUCKET_US[i] if i < len(BUCKET_US) else self.max_us
+        return self.max_us
+
+    def reset(self):
+        for i in range(len(self.counts)): self.counts[i] = 0
+        self.n = 0
+        self.max_us = 0
+
+
+class LoopStats:
+    def __init__(self, stages=STAGES):
+        self.hists = {}
+        for name in stages: self.hists[name] = StageHistogram()
+        self.passes = 0
+        self.window_start_ns = time.monotonic_ns()
+
+    # --- timing ---
+    def start(self):
+        return time.monotonic_ns()
+
+    def stop(self, stage, t0):
+        self.hists[stage].add((time.monotonic_ns() - t0) // 1000)
+
+    def loop_pass(self, t0):
+        """Count one main loop pass that started at t0."""
+        self.passes += 1
+        self.stop('loop', t0)
+
+    # --- reporting ---
+    def loop_rate(self):
+        elapsed_ns = time.monotonic_ns() - self.window_start_ns
+        if elapsed_ns <= 0: return 0.0
+        return self.passes * 1e9 / elapsed_ns
+
+    def summary_lines(self):
+        """One line for the loop rate, then one line per stage that ran."""
+        elapsed_s = (time.monotonic_ns() - self.window_start_ns) / 1e9
+        lines = [f'loop_rate,{self.loop_rate():.1f},passes,{self.passes},window_s,{elapsed_s:.1f}']
+        for name, h in self.hists.items():
+            if h.n == 0: continue
+            lines.append(f'{name},n,{h.n},p50_us,{h.percentile(50)},p99_us,{h.percentile(99)},max_us,{h.max_us}')
+        return lines
+
+    def reset(self):
+        for h in self.hists.values(): h.reset()
+        self.passes = 0
+        self.window_start_ns = time.monotonic_ns()
@@ -0,0 +1,71 @@
+# Scheduler.py — cooperative task scheduler for the main loop
+# - Each task has its own period (ms) and priority
+# - run_once() runs every due task in priority order; after each task, any
+#   higher-priority task that is due again runs first, so a period-0 task
+#   (lick sampling) runs between every other task
+# - On-demand tasks only run after trigger(), at most once per period
+# - Late tasks skip missed periods instead of bursting to catch up
+
+import time
+
+
+def now_ms(): return int(time.monotonic() * 1000)
+
+
+class Task:
+    def __init__(self, name, func, period_ms=0, priority=0, on_demand=False):
+        self.name = name
+        self.func = func
+        self.period_ms = period_ms
+        self.priority = priority
+        self.on_demand = on_demand
+        self.pending = not on_demand
+        self.next_ms = 0
+        self.runs = 0
+
+    def due(self, now):
+        return self.pending and now >= self.next_ms
+
+
+class Scheduler:
+    def __init__(self):
+        self.tasks = []      # sorted by priority, highest first
+        self.by_name = {}
+
+    def add(self, name, func, period_ms=0, priority=0, on_demand=False):
+        task = Task(name, func, period_ms, priority, on_demand)
+        self.tasks.append(task)
+        self.tasks.sort(key=lambda t: -t.priority)
+        self.by_name[name] = task
+        return task
+
+    def trigger(self, name):
+        """Mark an on-demand task as pending (runs once its period allows)."""
+        self.by_name[name].pending = True
+
+    def _run(self, task, now):
+        task.func()
+        task.runs += 1
+        if task.on_demand: task.pending = False
+        task.next_ms += task.period_ms
+        if task.next_ms <= now: task.next_ms = now + task.period_ms
+
+    def run_once(self):
+        """Run one pass over the tasks. Returns the number of task runs."""
+        ran = 0
+        tasks = self.tasks
+        for i in range(len(tasks)):
+            task = tasks[i]
+            now = now_ms()
+            if not task.due(now): continue
+            self._run(task, now); ran += 1
+            # Keep higher-priority tasks on schedule between lower ones
+            for j in range(i):
+                higher = tasks[j]
+                now = now_ms()
+                if higher.due(now): self._run(higher, now); ran += 1
+        return ran
+
+    def run_forever(self):
+        while True:
+            self.run_once()
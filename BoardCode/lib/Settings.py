@@ -1,20 +1,68 @@
 
 system_log_filename = "system.log"
 lick_data_filename = "licks.dat"
+lick_binary_filename = "licks.bin"
+lick_data_format = 'text'   # 'text': CSV rows in licks.dat (~60 bytes per row)
+                            # 'binary': 10-byte records in licks.bin (see components/LickRecord.py)
 system_log_max_lines = 2000
+system_log_sync = 'lines'   # when system.log lines are synced to the card: 'always' (every line), 'lines'
+                            # (every system_log_sync_lines lines), 'time' (every system_log_sync_ms), 'errors'
+                            # (WARN/ERROR lines only) or 'never'; unsynced lines are lost on power failure
+system_log_sync_lines = 20
+system_log_sync_ms = 5000
+system_log_repeat_ms = 60000      # identical consecutive lines are written once, then "repeated N times" (at least this often)
+system_log_rate_lines = 30        # DEBUG/INFO lines per source ("[Main Loop]", "[RFID]", ...) and window;
+system_log_rate_window_ms = 10000 # extra lines are dropped and counted (0: no limit)
 data_log_max_lines = 2000
+log_time_mode = 'wall'      # 'wall': date/time on every row of licks.dat and system.log
+                            # 'mono': time only on anchor rows (first row of a file, then every
+                            # log_anchor_period_ms); other rows leave it empty and carry mono_ms only
+log_anchor_period_ms = 60000
+log_checkpoint_lines = 200  # save the line count of rotating logs this often, so boot only reads lines written since
+data_flush_rows = 20        # licks.dat rows are buffered in RAM and written when this many are pending,
+data_flush_bytes = 2048     # or when they take this many bytes,
+data_flush_idle_ms = 2000   # or when no row was added for this long (rows in RAM are lost on power failure)
+data_pending_max_bytes = 8192  # rows that failed to write are retried; beyond this many bytes they are dropped
+lick_ring_size = 64         # lick/bout events held in RAM while a cat is licking; handed to licks.dat
+lick_ring_high_water = 48   # once no bout is running, or earlier when this many are pending (0: no ring)
 
 clear_system_log_on_start = False
 clear_lick_data_on_start = False
 
 cat_timeout_ms = 1000  # switch to 'unknown' if no valid tag is seen for x ms
 max_tag_read_hz = 3.0  # change here to adjust read refresh limit (Hz)
+# Main loop task periods (ms); RFID polling runs at max_tag_read_hz
+lick_task_period_ms = 0   # 0 = lick sampling runs between every other task
+bt_poll_period_ms = 100
+bt_chunk_bytes = 512      # file bytes per UART write when sending data (one reused buffer)
+bt_block_bytes = 256      # block transfer ('get' command): payload bytes per frame,
+bt_window_blocks = 4      # frames sent ahead of the host's last ack,
+bt_ack_timeout_ms = 2000  # resend unacknowledged frames after this long without an ack,
+bt_max_retries = 5        # and give up after this many resends in a row
+bt_background_transfer = True  # downloads run as a main loop task, between lick samples
+bt_tick_bytes = 16        # background transfer: most bytes written per loop pass (~17 ms at 9600 baud)
+bt_tx_buffer_bytes = 64   # bytes the UART takes at once; no more is written until the link drained them
+bt_transfer_period_ms = 0
+pixel_period_ms = 50
+screen_period_ms = 250    # screen redraws only after a change, at most this often
+store_period_ms = 250     # hand ring events to licks.dat and flush idle rows this often
+stats_log_period_ms = 60000  # log loop/stage latency stats this often, then start a new window
 deployment_bout_count = 5
 deployment_duration_ms = 2000
+feeder_period_ms = 10     # feeder relay deadline checked this often (off within this much of the deadline)
 min_lick_ms = 50
 max_lick_ms = 150
 min_licks_per_bout = 3
 max_bout_gap_ms = 12000
+lick_acquisition = 'single'    # 'single': one lick reading per loop pass
+                               # 'buffered': fixed-rate blocks (analogbufio) for accurate lick durations
+lick_sample_rate_hz = 1000     # buffered mode sample rate
+lick_block_size = 100          # buffered mode samples per block (block must be shorter than max_bout_gap_ms)
+lick_block_max_ms = 100        # a block holds up the loop (RFID, Bluetooth, feeder) this long at most;
+                               # lick_block_size is capped to fit. UART buffers (64 B) fill in ~65 ms at 9600 baud
+lick_adc_full_scale = 65535    # buffered mode raw value at 3.3 V
+water_average_samples = 10     # water level = running mean of this many readings
+water_sample_interval_ms = 1   # at most one water reading per loop pass, this far apart
 min_water_delta_per_bout = 0.0  # Minimum water extent (mm) to count a bout (0 = disabled)
                                 # Uses extent = max_water_level - min_water_level during bout
                                 # Positive extent = water level fluctuated during bout
@@ -12,7 +12,7 @@
 import time, board, busio
 import Settings
 from components import MyDigital
-from components.MySystemLog import debug, warn, error
+from components.MySystemLog import debug, debugf, warn, warnf, error
 
 
 
@@ -78,7 +78,7 @@ class TagReader:
         if not n: return
         n=min(n,self.max_len); chunk=self.uart.read(n)
         if not chunk: return
-        self.buf.extend(chunk); debug(f"[RFID] read {len(chunk)}B → buf={len(self.buf)}B")
+        self.buf.extend(chunk); debugf("[RFID] read %dB → buf=%dB", len(chunk), len(self.buf))
         if len(self.buf)>2*self.max_len: self.buf=self.buf[-self.max_len:]
 
     # ---- Manual byte scan (avoid .find() quirks) ----------------------------
@@ -98,8 +98,8 @@ class TagReader:
         x=0
         for bb in body: x^=bb
         x&=0xFF
-        if x!=csum: warn(f"[RFID] checksum mismatch calc={x} pkt={csum}"); return None
-        if self.invert_required and ((csum^inv)!=0xFF): warn(f"[RFID] checksum invert mismatch: csum={csum} inv={inv}"); return None
+        if x!=csum: warnf("[RFID] checksum mismatch calc=%s pkt=%s", x, csum); return None
+        if self.invert_required and ((csum^inv)!=0xFF): warnf("[RFID] checksum invert mismatch: csum=%s inv=%s", csum, inv); return None
         return body
 
     def parse_body(self, body):
@@ -123,10 +123,10 @@ class TagReader:
         else: self.next_reset_ms=now
 
     # ---- Public API ---------------------------------------------------------
-    def poll(self):
+    def poll(self, force=False):
         now=self.now_ms()
-        # --- Rate limiter
-        if self.refresh_ms and (now - self.last_attempt_ms) < self.refresh_ms:
+        # --- Rate limiter (force=True when the caller already schedules reads)
+        if not force and self.refresh_ms and (now - self.last_attempt_ms) < self.refresh_ms:
             return self.last_pkt
         self.last_attempt_ms = now
 
@@ -157,9 +157,9 @@ class TagReader:
 
         key=pkt["tag_key"]
         if not key: self.last_pkt=None; return None
-        if not self.deduplicate(key): debug(f"[RFID] duplicate suppressed: {key}"); self.last_pkt=None; return None
+        if not self.deduplicate(key): debugf("[RFID] duplicate suppressed: %s", key); self.last_pkt=None; return None
 
-        debug(f"[RFID] tag: {key}")
+        debugf("[RFID] tag: %s", key)
         self.last_pkt = pkt
         self.last_success_pkt, self.last_success_ms = pkt, now
         self._reset_after_success(now)
@@ -170,7 +170,7 @@ class TagReader:
         now=self.now_ms()
         return self.last_success_pkt if (self.last_success_pkt and (now - self.last_success_ms) < timeout_ms) else None
 
-    def poll_active(self, cat_timeout_ms=None):
+    def poll_active(self, cat_timeout_ms=None, force=False):
         if cat_timeout_ms is None: cat_timeout_ms = Settings.cat_timeout_ms
-        _ = self.poll()  # may update last_success_* if we got a fresh read
+        _ = self.poll(force)  # may update last_success_* if we got a fresh read
         return self.active_tag(cat_timeout_ms)
@@ -0,0 +1,149 @@
+# lib/components/LickRecord.py
+# Packed binary format for lick rows (cat_name, state, lick, bout, water).
+#
+# A file is a sequence of 10-byte little-endian records. The first byte tells
+# the record kind:
+#
+#   0x00-0xFB  data   <BBHHHh  cat id, state, dt_ms since previous record, lick, bout, water * WATER_SCALE
+#   0xFC       clock  <BxII    boot_epoch (s), boot_mono_ms  -> time = boot_epoch + (mono_ms - boot_mono_ms) / 1000
+#   0xFD       header <B4sBHH  b'HPLK', VERSION, WATER_SCALE, 0
+#   0xFE       name   <BB8s    cat id, next 8 bytes of the cat's name (utf-8, NUL padded; repeats for long names)
+#   0xFF       anchor <BxII    mono_ms, 0                    -> absolute time for the following deltas
+#
+# Every writer session (boot, new file, rotation) starts with a clock record;
+# names and an anchor are written before a cat id or a delta first needs them.
+# The desktop decoder is ProcessLickData/library/data_reader.decode_licks_binary.
+import struct
+from components import TimeUtil
+
+RECORD_SIZE = 10
+VERSION = 1
+MAGIC = b'HPLK'
+WATER_SCALE = 1000          # water stored in thousandths (int16: +-32.767)
+KIND_CLOCK = 0xFC
+KIND_HEADER = 0xFD
+KIND_NAME = 0xFE
+KIND_ANCHOR = 0xFF
+MAX_CAT_ID = 0xFB
+MAX_DT_MS = 0xFFFF
+
+_DATA = '<BBHHHh'
+_CLOCK = '<BxII'
+_ANCHOR = '<BxII'
+_HEADER = '<B4sBHH'
+_NAME = '<BB8s'
+
+
+def _clamp(value, low, high):
+    value = int(value)
+    if value < low: return low
+    if value > high: return high
+    return value
+
+
+class LickCodec:
+    """
+    Encodes lick rows for MyStore(codec=...). Keeps the cat id table and the
+    time of the previous record, so start() must be called for every new
+    writer session.
+    """
+
+    record_size = RECORD_SIZE
+    columns = ("cat_name", "state", "lick", "bout", "water")
+
+    def __init__(self):
+        self.ids = {}
+        self.last_mono = None
+
+    def start(self, new_file):
+        """Bytes that open a writer session (file header only for an empty file)."""
+        self.ids = {}
+        self.last_mono = None
+        TimeUtil.init_timebase()
+        out = b''
+        if new_file: out += struct.pack(_HEADER, KIND_HEADER, MAGIC, VERSION, WATER_SCALE, 0)
+        out += struct.pack(_CLOCK, KIND_CLOCK, (TimeUtil.boot_epoch or 0) & 0xFFFFFFFF, (TimeUtil.boot_mono_ms or 0) & 0xFFFFFFFF)
+        return out
+
+    def _cat_id(self, name, out):
+        name = str(name)
+        cat_id = self.ids.get(name)
+        if cat_id is not None: return cat_id
+        cat_id = min(len(self.ids), MAX_CAT_ID)  # table full: later cats share (and rename) the last id
+        self.ids[name] = cat_id
+        raw = name.encode('utf-8') or b'\x00'
+        for i in range(0, len(raw), 8):
+            out.append(struct.pack(_NAME, KIND_NAME, cat_id, raw[i:i + 8]))
+        return cat_id
+
+    def encode(self, mono_ms, row):
+        """Bytes for one row [cat_name, state, lick, bout, water] logged at mono_ms."""
+        cat_name, state, lick, bout, water = row
+        out = []
+        cat_id = self._cat_id(cat_name, out)
+        last = self.last_mono
+        if last is None or mono_ms < last or mono_ms - last > MAX_DT_MS:
+            out.append(struct.pack(_ANCHOR, KIND_ANCHOR, mono_ms & 0xFFFFFFFF, 0))
+            last = mono_ms
+        self.last_mono = mono_ms
+        if water is None: water = 0
+        out.append(struct.pack(_DATA, cat_id, _clamp(state, 0, 255), mono_ms - last,
+                               _clamp(lick, 0, 0xFFFF), _clamp(bout, 0, 0xFFFF),
+                               _clamp(round(water * WATER_SCALE), -32768, 32767)))
+        return b''.join(out)
+
+    def decode(self, f):
+        return decode(f)
+
+    def count_rows(self, path, start=0, stop_at=None):
+        return count_records(path, start, stop_at)
+
+
+def count_records(path, start=0, stop_at=None, chunk_records=64):
+    """Data records in path from byte offset start (stops once stop_at is reached); see count_lines."""
+    count = 0
+    try:
+        with open(path, 'rb') as f:
+            if start: f.seek(start)
+            while True:
+                data = f.read(RECORD_SIZE * chunk_records)
+                if not data: break
+                for i in range(0, len(data) - RECORD_SIZE + 1, RECORD_SIZE):
+                    if data[i] <= MAX_CAT_ID: count += 1
+                if stop_at is not None and count >= stop_at: break
+    except OSError:
+        return 0
+    return count
+
+
+def decode(f, chunk_records=64):
+    """
+    Yield (boot_epoch, boot_mono_ms, mono_ms, cat_name, state, lick, bout, water)
+    for every data record read from the binary file object f (board-side reader).
+    """
+    names = {}
+    boot_epoch = boot_mono = mono = 0
+    water_scale = WATER_SCALE
+    prev_name_id = None  # id of the previous record if it was a name record
+    while True:
+        data = f.read(RECORD_SIZE * chunk_records)
+        if not data: return
+        for i in range(0, len(data) - RECORD_SIZE + 1, RECORD_SIZE):
+            kind = data[i]
+            name_id = None
+            if kind <= MAX_CAT_ID:
+                _, state, dt, lick, bout, water = struct.unpack_from(_DATA, data, i)
+                mono += dt
+                yield boot_epoch, boot_mono, mono, names.get(kind, str(kind)), state, lick, bout, water / water_scale
+            elif kind == KIND_ANCHOR:
+                mono = struct.unpack_from(_ANCHOR, data, i)[1]
+            elif kind == KIND_NAME:
+                _, name_id, chunk = struct.unpack_from(_NAME, data, i)
+                chunk = chunk.rstrip(b'\x00').decode('utf-8')
+                names[name_id] = names.get(name_id, '') + chunk if prev_name_id == name_id else chunk
+            elif kind == KIND_CLOCK:
+                _, boot_epoch, boot_mono = struct.unpack_from(_CLOCK, data, i)
+                names = {}
+            elif kind == KIND_HEADER:
+                water_scale = struct.unpack_from(_HEADER, data, i)[3] or WATER_SCALE
+            prev_name_id = name_id
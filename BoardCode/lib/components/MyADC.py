@@ -1,4 +1,5 @@
 import analogio
+import array
 import board
 import time
 
@@ -42,3 +43,62 @@ class MyADC:
     def deinit(self):
         """Deinitialize the ADC pin to free up resources."""
         self.adc.deinit()
+
+
+class MyADCAverager:
+    def __init__(self, adc, window=10, sample_interval_ms=0):
+        """
+        Non-blocking running mean of a MyADC channel.
+
+        Each tick() takes at most one reading into a preallocated ring buffer,
+        so averaging never stalls the caller the way mean() does.
+
+        :param adc: MyADC instance to sample
+        :param window: Number of readings to average over
+        :param sample_interval_ms: Minimum time between readings (0 = every tick)
+        """
+        self.adc = adc
+        self.window = max(1, int(window))
+        self.sample_interval_ms = sample_interval_ms
+        self._ring = array.array('f', [0.0] * self.window)
+        self._head = 0
+        self._count = 0
+        self._sum = 0.0
+        self._last_ms = None
+
+    def tick(self):
+        """Take one reading if the sample interval has elapsed. Returns True if sampled."""
+        if self.sample_interval_ms:
+            now_ms = int(time.monotonic() * 1000)
+            if self._last_ms is not None and (now_ms - self._last_ms) < self.sample_interval_ms:
+                return False
+            self._last_ms = now_ms
+        voltage = self.adc.read()
+        head = self._head
+        if self._count < self.window:
+            self._count += 1
+        else:
+            self._sum -= self._ring[head]
+        self._ring[head] = voltage
+        self._sum += voltage
+        head += 1
+        if head == self.window:
+            head = 0
+            # Recompute once per lap so float rounding cannot accumulate
+            self._sum = sum(self._ring)
+        self._head = head
+        return True
+
+    def value(self):
+        """Return the mean of the buffered readings (reads once if the buffer is empty)."""
+        if self._count == 0:
+            self._last_ms = None
+            self.tick()
+        return self._sum / self._count
+
+    def reset(self):
+        """Discard buffered readings."""
+        self._head = 0
+        self._count = 0
+        self._sum = 0.0
+        self._last_ms = None
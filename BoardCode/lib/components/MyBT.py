@@ -1,9 +1,12 @@
 import board
 import busio
+import struct
 import time
+import Settings
 
 class MyBT:
-    def __init__(self, baudrate=9600, buffer_size=64, timeout=0.2, eom_char='*', add_crlf=False):
+    def __init__(self, baudrate=9600, buffer_size=64, timeout=0.2, eom_char='*', add_crlf=False, uart=None,
+                 tx_buffer=None):
         """
         UART Bluetooth helper with optional line breaks and non-blocking receive.
 
@@ -12,25 +15,64 @@ class MyBT:
         :param timeout: Timeout for receive() in seconds
         :param eom_char: End-of-message delimiter (default '*')
         :param add_crlf: Append CRLF ('\\r\\n') after each message if True
+        :param uart: UART-like object to use instead of busio.UART on TX/RX
+        :param tx_buffer: Bytes the link takes at once without blocking (send_some backpressure)
         """
-        self.uart = busio.UART(board.TX, board.RX, baudrate=baudrate)
+        self.uart = uart if uart is not None else busio.UART(board.TX, board.RX, baudrate=baudrate)
+        self.baudrate = baudrate
         self.buffer_size = buffer_size
         self.eom_char = eom_char
         self._buffer = ""
         self.timeout = timeout
         self.add_crlf = add_crlf  # new flag
+        self.tx_buffer = tx_buffer if tx_buffer is not None else getattr(Settings, 'bt_tx_buffer_bytes', 64)
+        self._tx_until = 0.0      # when the bytes written so far have left at the baud rate
 
     # ---------- Sending ----------
-    def send(self, message: str):
-        """Send a string, appending EOM and optionally CRLF."""
+    def message_bytes(self, message: str):
+        """A message as sent: with EOM and optionally CRLF, encoded."""
         if not isinstance(message, str):
             raise ValueError("Message must be a string.")
         if not message.endswith(self.eom_char):
             message += self.eom_char
         if self.add_crlf:
             message += "\r\n"
-        data = message.encode("utf-8")
-        return self.uart.write(data)  # return bytes written
+        return message.encode("utf-8")
+
+    def send(self, message: str):
+        """Send a string, appending EOM and optionally CRLF."""
+        return self.uart.write(self.message_bytes(message))  # return bytes written
+
+    def send_bytes(self, data, wait=True):
+        """
+        Write raw bytes as they are (no EOM or CRLF), paced to the link:
+        returns once they can have left the UART at the baud rate, so a
+        buffering UART is never handed more than the link carries.
+        With wait=False it returns at once (see send_some).
+        """
+        now = time.monotonic()
+        n = self.uart.write(data) or 0
+        if self._tx_until < now: self._tx_until = now
+        self._tx_until += n * 10 / self.baudrate  # 8N1: 10 bits per byte
+        if wait:
+            left = self._tx_until - time.monotonic()
+            if left > 0: time.sleep(left)
+        return n
+
+    def tx_free(self):
+        """Bytes the link takes now: tx_buffer less what is still going out at the baud rate."""
+        pending = int((self._tx_until - time.monotonic()) * self.baudrate / 10)
+        return self.tx_buffer - pending if pending > 0 else self.tx_buffer
+
+    def send_some(self, data, limit=None):
+        """
+        Write the part of data the link takes now, at most limit bytes, without
+        waiting. Returns the bytes written (0 while the link is still busy).
+        """
+        n = min(len(data), self.tx_free())
+        if limit is not None and limit < n: n = limit
+        if n <= 0: return 0
+        return self.send_bytes(data[:n], wait=False)
 
     # ---------- Non-blocking receive ----------
     def poll(self):
@@ -76,3 +118,239 @@ class MyBT:
         n_avail = getattr(self.uart, "in_waiting", 0) or 0
         if n_avail:
             _ = self.uart.read(n_avail)
+
+
+# ---------- Block transfer ----------
+# A file is sent as frames, each numbered by the file offset of its payload:
+#
+#   0xA5, kind, offset (uint32), length (uint16), payload, CRC-16/CCITT (uint16)
+#
+# little-endian, the CRC covering kind..payload. Kinds: 'H' header (payload
+# "name,size", offset = first offset sent), 'D' data, 'E' end (offset = size),
+# 'A' abort (payload = reason). The host answers with messages (eom '*'):
+#
+#   ack,<offset>       every byte before offset arrived; repeating the current
+#                      offset asks to resend from there (go-back-N)
+#   get,<kind>,<offset> (re)start at offset, e.g. to resume after a dropout
+#   abort
+#
+# Rotated logs are fetched per segment (see RotationManifest): the board
+# answers 'segments,<kind>,<since>' with one message
+#
+#   SEGMENTS,<kind>,<index>:<size>,<index>:<size>,...
+#
+# listing the segments from index since on, the current file last, and
+# 'get,<kind>,<offset>,<index>' sends segment index instead of the current
+# file. A host that keeps (index, offset) downloads only what is new.
+#
+# Up to window_blocks data frames are sent ahead of the last ack. Without a
+# new ack for ack_timeout_ms the unacknowledged frames are sent again, at
+# most max_retries times in a row. The desktop side is
+# BluetoothDownloader/library/TransferUtils.py.
+
+FRAME_SOF = 0xA5
+FRAME_HEADER = ord('H')
+FRAME_DATA = ord('D')
+FRAME_END = ord('E')
+FRAME_ABORT = ord('A')
+FRAME_HEAD_SIZE = 8   # sof, kind, offset, length
+FRAME_CRC_SIZE = 2
+_FRAME_HEAD = '<BBIH'
+
+_crc_table = None
+
+def _make_crc_table():
+    table = []
+    for i in range(256):
+        crc = i << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+        table.append(crc & 0xFFFF)
+    return table
+
+def crc16(data, crc=0xFFFF):
+    """CRC-16/CCITT-FALSE of data (bytes, bytearray or memoryview)."""
+    global _crc_table
+    table = _crc_table
+    if table is None: table = _crc_table = _make_crc_table()
+    for b in data:
+        crc = ((crc << 8) & 0xFFFF) ^ table[(crc >> 8) ^ b]
+    return crc
+
+def frame(kind, offset, payload=b''):
+    """One complete frame as bytes (header/end/abort frames; data frames are built in place)."""
+    head = struct.pack(_FRAME_HEAD, FRAME_SOF, kind, offset, len(payload))
+    body = head[1:] + payload
+    return head + payload + struct.pack('<H', crc16(body))
+
+def segments_message(kind, segments):
+    """The SEGMENTS answer for a list of (index, size)."""
+    return f"SEGMENTS,{kind}," + ",".join(f"{index}:{size}" for index, size in segments)
+
+
+class ChunkSender:
+    """
+    Writes the byte chunks of an iterable over a MyBT link, at most
+    tick_bytes per step() and only what MyBT.send_some lets through. Call
+    step() until it returns False. A chunk may be a view of a reused buffer:
+    the next one is taken only once it is out.
+    """
+
+    def __init__(self, bt, chunks, tick_bytes=None):
+        self.bt = bt
+        self.tick_bytes = tick_bytes or getattr(Settings, 'bt_tick_bytes', 64)
+        self._chunks = iter(chunks)
+        self._out = None
+        self.bytes_sent = 0
+        self.done = False
+
+    def step(self):
+        """Write the next slice. Returns False once every chunk is out."""
+        if self.done: return False
+        if self._out is None:
+            try: self._out = memoryview(next(self._chunks))
+            except StopIteration:
+                self.done = True
+                return False
+        out = self._out
+        n = self.bt.send_some(out, self.tick_bytes)
+        self.bytes_sent += n
+        self._out = out[n:] if n < len(out) else None
+        return True
+
+    def close(self):
+        close = getattr(self._chunks, 'close', None)
+        if close is not None: close()
+        self.done = True
+
+
+class BlockSender:
+    """
+    Sends one file over a MyBT link with the block protocol above. Call
+    step() until it returns False; each call sends what the window allows
+    and handles at most one host message, so the caller decides how much
+    time a transfer gets. ok tells whether the host acknowledged every byte.
+
+    With tick_bytes set, frames are not written whole: each step() writes at
+    most tick_bytes of the current frame, and only what MyBT.send_some lets
+    through, so a transfer can run between the main loop's other tasks.
+    """
+
+    def __init__(self, bt, path, offset=0, name=None, block_size=None, window=None,
+                 timeout_ms=None, max_retries=None, tick_bytes=None):
+        self.bt = bt
+        self.tick_bytes = tick_bytes
+        self._out = None         # tick_bytes: rest of the frame being written
+        self.path = path
+        self.name = name if name is not None else path.rsplit('/', 1)[-1]
+        self.block_size = block_size or getattr(Settings, 'bt_block_bytes', 256)
+        self.window = window or getattr(Settings, 'bt_window_blocks', 4)
+        self.timeout_ms = timeout_ms or getattr(Settings, 'bt_ack_timeout_ms', 2000)
+        self.max_retries = max_retries if max_retries is not None else getattr(Settings, 'bt_max_retries', 5)
+        self._buf = bytearray(FRAME_HEAD_SIZE + self.block_size + FRAME_CRC_SIZE)  # one frame, reused
+        self._view = memoryview(self._buf)
+        self._file = open(path, 'rb')
+        self._file.seek(0, 2)
+        self.size = self._file.tell()  # bytes written later are left for the next transfer
+        self._file_pos = None
+        self.ok = False
+        self.done = False
+        self.frames_sent = 0
+        self.resent = 0          # data frames sent again after a repeated ack or a timeout
+        self._start(min(max(int(offset), 0), self.size))
+
+    def _now(self):
+        return int(time.monotonic() * 1000)
+
+    def _start(self, offset):
+        self.acked = offset      # host has every byte before this
+        self.next = offset       # offset of the next data frame to send
+        self.sent_to = offset    # furthest offset sent so far (frames before it are resends)
+        self.retries = 0
+        self._ack_ms = self._now()
+        self._emit(frame(FRAME_HEADER, offset, f"{self.name},{self.size}".encode()))
+
+    def _send_block(self):
+        n = min(self.block_size, self.size - self.next)
+        f = self._file
+        if self._file_pos != self.next: f.seek(self.next)
+        buf, view = self._buf, self._view
+        n = f.readinto(view[FRAME_HEAD_SIZE:FRAME_HEAD_SIZE + n]) or 0
+        self._file_pos = self.next + n
+        struct.pack_into(_FRAME_HEAD, buf, 0, FRAME_SOF, FRAME_DATA, self.next, n)
+        struct.pack_into('<H', buf, FRAME_HEAD_SIZE + n, crc16(view[1:FRAME_HEAD_SIZE + n]))
+        self._emit(view[:FRAME_HEAD_SIZE + n + FRAME_CRC_SIZE])
+        if self.next < self.sent_to: self.resent += 1
+        self.frames_sent += 1
+        self.next += n
+        if self.next > self.sent_to: self.sent_to = self.next
+        return n
+
+    def _emit(self, data):
+        if not self.tick_bytes:
+            self.bt.send_bytes(data)
+            return
+        self._out = memoryview(data)
+        self._drain()
+
+    def _drain(self):
+        """Write the next slice of the pending frame."""
+        out = self._out
+        n = self.bt.send_some(out, self.tick_bytes)
+        self._out = out[n:] if n < len(out) else None
+
+    def _finish(self, ok, reason=''):
+        if ok: self._emit(frame(FRAME_END, self.size))
+        else: self._emit(frame(FRAME_ABORT, self.acked, reason.encode()))
+        self.ok = ok
+        self.done = True
+        self.close()
+
+    def close(self):
+        if self._file is not None:
+            try: self._file.close()
+            except OSError: pass
+            self._file = None
+
+    def _handle(self, message):
+        parts = message.split(',')
+        try:
+            if parts[0] == 'ack':
+                offset = int(parts[1])
+                if offset > self.acked and offset <= self.sent_to:
+                    self.acked = offset
+                    if self.next < offset: self.next = offset
+                    self.retries = 0
+                    self._ack_ms = self._now()
+                elif offset == self.acked and self.next > offset:
+                    self.next = offset  # host missed the frame at offset: go back
+            elif parts[0] == 'get':
+                self._start(min(max(int(parts[2]) if len(parts) > 2 else 0, 0), self.size))
+            elif parts[0] == 'abort':
+                self._finish(False, 'host abort')
+        except (ValueError, IndexError):
+            pass
+
+    def step(self):
+        """Handle one host message, send within the window. Returns False once finished."""
+        if self._out is not None:
+            self._drain()
+            return True
+        if self.done: return False
+        if self.acked >= self.size:
+            self._finish(True)
+            return True
+        message = self.bt.poll()
+        if message:
+            self._handle(message)
+            if self.done or self._out is not None: return True
+        elif self._now() - self._ack_ms >= self.timeout_ms:
+            self.retries += 1
+            if self.retries > self.max_retries:
+                self._finish(False, 'no ack')
+                return True
+            self.next = self.acked
+            self._ack_ms = self._now()
+        if self.next < self.size and self.next - self.acked < self.window * self.block_size:
+            self._send_block()
+        return True
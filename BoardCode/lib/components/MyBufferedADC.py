@@ -0,0 +1,77 @@
+import array
+import board
+import time
+
+
+class BlockClock:
+    """Timestamps (ms) of a fixed-rate block, derived from the sample index."""
+
+    def __init__(self, start_ms, sample_rate, length):
+        self.start_ms = start_ms
+        self.sample_rate = sample_rate
+        self.length = length
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("sample index out of range")
+        return self.start_ms + (index * 1000) // self.sample_rate
+
+
+class MyBufferedADC:
+    def __init__(self, channel, sample_rate=1000, block_size=100, full_scale=65535, source=None):
+        """
+        Capture an ADC channel at a fixed sample rate into a preallocated buffer.
+
+        :param channel: ADC channel (0-3, same numbering as MyADC)
+        :param sample_rate: Samples per second
+        :param block_size: Samples captured per read_block()
+        :param full_scale: Raw value that corresponds to 3.3 V in the buffer
+        :param source: Object with readinto(buffer); defaults to analogbufio.BufferedIn
+        """
+        if channel == 0:
+            pin = board.A0
+        elif channel == 1:
+            pin = board.A1
+        elif channel == 2:
+            pin = board.A2
+        elif channel == 3:
+            pin = board.A3
+        else:
+            raise ValueError("Invalid channel. Choose between 0, 1, 2, or 3.")
+
+        if source is None:
+            import analogbufio
+            source = analogbufio.BufferedIn(pin, sample_rate=sample_rate)
+        self.source = source
+        self.sample_rate = int(sample_rate)
+        self.full_scale = full_scale
+        self.buffer = array.array('H', [0] * block_size)
+        self.clock = BlockClock(0, self.sample_rate, block_size)
+
+    def read_block(self):
+        """
+        Fill the buffer with one block of samples (blocks for block_size / sample_rate s).
+
+        Returns (buffer, timestamps). Both objects are reused by the next call.
+        """
+        self.clock.start_ms = int(time.monotonic() * 1000)
+        self.source.readinto(self.buffer)
+        return self.buffer, self.clock
+
+    def threshold(self, voltage):
+        """Convert a voltage to the raw units of the buffer."""
+        return int(voltage / 3.3 * self.full_scale)
+
+    def to_voltage(self, raw_value):
+        """Convert a raw buffer value to a voltage."""
+        return (raw_value / self.full_scale) * 3.3
+
+    def deinit(self):
+        """Deinitialize the ADC to free up the pin."""
+        if hasattr(self.source, "deinit"):
+            self.source.deinit()
@@ -3,6 +3,8 @@ import os, board  # sdcardio/storage no longer needed here
 import Settings
 from components import MySD  # ← NEW: centralize SD ops
 from components import TimeUtil
+from components.RotationManifest import RotationManifest
+from components.MySystemLog import warn
 
 # ---------------------------------------------------------------------
 # Global variables and constants
@@ -130,12 +132,15 @@ def _coerce_cell(text):
     except ValueError:
         return text
 
+def format_row(lst):
+    return separator.join(_escape_csv_cell(x) for x in lst) + '\n'
+
 def write_list(path, lst):
     if not MySD.is_mounted():
         print("Warning: SD not mounted; write_list skipped")
         return False
     try:
-        with open(path, 'a') as f: f.write(separator.join(_escape_csv_cell(x) for x in lst) + '\n'); return True
+        with open(path, 'a') as f: f.write(format_row(lst)); return True
     except OSError as e:
         print(f"Warning: Unable to write list. {e}"); return False
 
@@ -180,43 +185,54 @@ def print_directory(path=mount_point, tabs=0):
         print(f'{"   "*tabs}{name + ("/" if isdir else ""):<40} Size: {sizestr:>10}')
         if isdir: print_directory(full, tabs + 1)
 
-# ---------------------------------------------------------------------
-# Rotation helpers
-# ---------------------------------------------------------------------
-def _count_lines(path, stop_at=None):
-    try:
-        count = 0
-        with open(path, "r") as f:
-            for _ in f:
-                count += 1
-                if stop_at is not None and count >= stop_at:
-                    break
-        return count
-    except OSError:
-        return 0
-
-def _next_rotation_path(path, max_tries=10000):
-    for i in range(1, max_tries + 1):
-        candidate = f"{path}.{i}"
-        try:
-            os.stat(candidate)
-        except OSError:
-            return candidate
-    return None
-
 # ---------------------------------------------------------------------
 # Time handling
 # ---------------------------------------------------------------------
 def timestamp(fmt='iso', with_ms=True):
     return TimeUtil.timestamp(fmt, with_ms)
 
+# ---------------------------------------------------------------------
+# Open stores (so readers of a file can flush every writer of it first)
+# ---------------------------------------------------------------------
+_stores = []
+
+def flush_path(path):
+    for store in _stores:
+        if store.file_path == path: store.flush(drain=True)
+
+def flush_all():
+    for store in _stores: store.flush(drain=True)
+
+def find_store(path):
+    """The open store of path (e.g. LickSensor's), or None."""
+    for store in _stores:
+        if store.file_path == path: return store
+    return None
+
 # ---------------------------------------------------------------------
 # MyStore class
 # ---------------------------------------------------------------------
 class MyStore:
-    """Logs time-stamped rows (CSV-like text format) to SD card."""
+    """
+    Logs time-stamped rows (CSV-like text format) to SD card.
+
+    With a codec (e.g. LickRecord.LickCodec) rows are packed to binary
+    records instead: add() skips the timestamp text, and read()/iter_lines()
+    decode the records back into the same rows as the text format.
 
-    def __init__(self, filename, fmt='iso', with_ms=True, auto_header=None, time_label=None, max_lines=None):
+    Rows are buffered in RAM and written through a file handle that stays
+    open. The buffer is written once it holds flush_rows rows or flush_bytes
+    bytes, when flush_if_idle() finds no new rows for flush_idle_ms, and
+    always before rotation, read() and iter_lines(). Rows still in RAM are
+    lost on power failure.
+
+    A writer that holds rows of its own before add()ing them (LickSensor's
+    event ring) sets `source`: it is called to hand them over before readers
+    of the file flush it.
+    """
+
+    def __init__(self, filename, fmt='iso', with_ms=True, auto_header=None, time_label=None, max_lines=None,
+                 flush_rows=None, flush_bytes=None, flush_idle_ms=None, codec=None):
         mount_sd()
         self.file_name = filename
         self.file_path = normalize_to_sd(filename)
@@ -225,11 +241,30 @@ class MyStore:
         self._header = auto_header
         self._max_lines = max_lines if max_lines is not None else getattr(Settings, "data_log_max_lines", None)
         self._line_count = 0
+        self.timer = None  # optional LoopStats: times each SD write as 'sd_write'
+        self.flush_rows = flush_rows if flush_rows is not None else getattr(Settings, "data_flush_rows", 1)
+        self.flush_bytes = flush_bytes if flush_bytes is not None else getattr(Settings, "data_flush_bytes", 0)
+        self.flush_idle_ms = flush_idle_ms if flush_idle_ms is not None else getattr(Settings, "data_flush_idle_ms", 0)
+        self.pending_max_bytes = getattr(Settings, "data_pending_max_bytes", 8192)
+        self.rows_dropped = 0      # rows discarded because the SD card kept failing
+        self._fh = None            # append handle, opened on first flush
+        self._pending = []         # formatted rows not yet written
+        self._pending_bytes = 0
+        self._last_add_ms = 0
+        self.source = None         # optional callable that add()s rows held by the writer
+        self.codec = codec
+        self._session = False      # codec: session records (header/clock) written
+        self._manifest = RotationManifest(self.file_path)  # next segment name, segment time ranges
+        self._stamper = TimeUtil.Stamper(fmt, with_ms)     # time column ('wall' or 'mono' + anchor rows)
+        _stores.append(self)
         if MySD.is_mounted() and not file_exists(self.file_path): create_file(self.file_path)
         if auto_header: self.header(auto_header, label=self.time_label)
         if MySD.is_mounted() and self._max_lines:
-            total = _count_lines(self.file_path, stop_at=self._max_lines + 1)
-            self._line_count = max(total - 1, 0) if self._header else total
+            if codec is not None:
+                self._line_count = self._manifest.restore_lines(stop_at=self._max_lines, count=codec.count_rows)
+            else:
+                total = self._manifest.restore_lines(stop_at=self._max_lines + 1)
+                self._line_count = max(total - 1, 0) if self._header else total
             if self._line_count >= self._max_lines:
                 self._rotate_file()
                 if self._header:
@@ -238,6 +273,11 @@ class MyStore:
 
     def empty(self):
         if not MySD.is_mounted(): return False
+        self._pending = []; self._pending_bytes = 0
+        self.close()
+        self._session = False
+        self._stamper.reset()
+        self._manifest.reset()
         ok = create_file(self.file_path)
         if ok:
             self._line_count = 0
@@ -245,6 +285,7 @@ class MyStore:
 
     def header(self, cols, label="time"):
         if cols is None or not MySD.is_mounted(): return
+        if self.codec is not None: return  # binary files carry their own header record
         if not file_empty(self.file_path): return
         if isinstance(label, (list, tuple)):
             row = list(label)
@@ -257,35 +298,112 @@ class MyStore:
         if not MySD.is_mounted():
             print("Warning: SD not mounted; rotate skipped")
             return False
+        self.flush()
+        self.close()
+        self._session = False
+        self._stamper.reset()
         if not file_exists(self.file_path):
             return create_file(self.file_path)
-        rotated = _next_rotation_path(self.file_path)
-        if rotated is None:
-            print("Warning: No rotation slot available; rotate skipped")
-            return False
         try:
-            os.rename(self.file_path, rotated)
+            rotated = self._manifest.rotate(self._last_add_ms or -1, self._line_count)
+            if rotated is None:
+                print("Warning: No rotation slot available; rotate skipped")
+                return False
             return create_file(self.file_path)
         except OSError as e:
             print(f"Warning: Unable to rotate file. {e}")
             return False
 
-    def add(self, data):
+    def add(self, data, mono_ms=None):
+        """Buffer one row, time-stamped now or at mono_ms (the time a deferred row was captured)."""
         if not MySD.is_mounted(): return False
         if self._max_lines and self._line_count >= self._max_lines:
             self._rotate_file()
             if self._header:
                 self.header(self._header, label=self.time_label)
             self._line_count = 0
-        ts, mono = TimeUtil.timestamp_pair(self.fmt, self.with_ms)
         row = list(data) if isinstance(data, (list,tuple)) else [data]
-        ok = write_list(self.file_path, [ts, mono] + row)
-        if ok and self._max_lines is not None:
+        if self.codec is not None:
+            mono = TimeUtil.monotonic_ms() if mono_ms is None else mono_ms
+            line = b''
+            if not self._session:
+                line = self.codec.start(not self._pending and file_empty(self.file_path))
+                self._session = True
+            line += self.codec.encode(mono, row)
+        else:
+            ts, mono = self._stamper.pair(mono_ms)
+            line = format_row([ts, mono] + row)
+        self._pending.append(line)
+        self._pending_bytes += len(line)
+        self._last_add_ms = mono
+        self._manifest.note(mono)
+        if self._max_lines is not None:
             self._line_count += 1
+        if len(self._pending) >= self.flush_rows or (self.flush_bytes and self._pending_bytes >= self.flush_bytes):
+            return self.flush()
+        return True
+
+    def flush(self, drain=False):
+        """Write buffered rows through the open handle. Returns False on a write error.
+
+        Rows that failed to write are kept for the next flush, up to
+        pending_max_bytes; beyond that they are dropped and counted.
+        """
+        if drain and self.source is not None: self.source()
+        if not self._pending: return True
+        if not MySD.is_mounted(): return False
+        timer = self.timer
+        if timer is not None: t0 = timer.start()
+        try:
+            if self.codec is not None:
+                if self._fh is None: self._fh = open(self.file_path, 'ab')
+                self._fh.write(b''.join(self._pending))
+            else:
+                if self._fh is None: self._fh = open(self.file_path, 'a')
+                self._fh.write(''.join(self._pending))
+            self._fh.flush()
+            ok = True
+            if self._max_lines:
+                header_lines = 1 if self._header and self.codec is None else 0
+                self._manifest.maybe_checkpoint(self._line_count + header_lines)
+        except OSError as e:
+            print(f"Warning: Unable to write rows. {e}")
+            self.close()
+            ok = False
+        if ok:
+            self._pending = []; self._pending_bytes = 0
+        elif self._pending_bytes > self.pending_max_bytes:
+            self._drop_pending()
+        if timer is not None: timer.stop('sd_write', t0)
         return ok
 
+    def _drop_pending(self):
+        """Discard rows kept for a retry (the next add() starts a new codec session)."""
+        dropped = len(self._pending)
+        self.rows_dropped += dropped
+        if self._max_lines is not None:
+            self._line_count = max(self._line_count - dropped, 0)
+        self._pending = []; self._pending_bytes = 0
+        self._session = False
+        warn(f'[MyStore] Unable to write {self.file_name}: {dropped} rows dropped')
+
+    def flush_if_idle(self, now_ms=None):
+        """Flush once no row was added for flush_idle_ms (call from the main loop)."""
+        if not self._pending: return False
+        if now_ms is None: now_ms = TimeUtil.monotonic_ms()
+        if now_ms - self._last_add_ms < self.flush_idle_ms: return False
+        return self.flush()
+
+    def close(self):
+        if self._fh is None: return
+        try: self._fh.close()
+        except OSError: pass
+        self._fh = None
+
     def read(self, split=True):
         if not MySD.is_mounted(): return False
+        flush_path(self.file_path)
+        if self.codec is not None: return list(self.iter_lines(split=split))
         return read_lines(self.file_path, split=split)
 
     def iter_lines(self, split=True):
@@ -293,6 +411,10 @@ class MyStore:
         if not MySD.is_mounted():
             print("Warning: SD not mounted; iter_lines skipped")
             return
+        flush_path(self.file_path)
+        if self.codec is not None:
+            yield from self._iter_decoded(split)
+            return
         try:
             with open(self.file_path, 'r') as f:
                 for line in f:
@@ -307,3 +429,34 @@ class MyStore:
         except OSError as e:
             print(f"Warning: Unable to iterate lines. {e}")
             return
+
+    def read_chunks(self, buf):
+        """Yield views of buf filled with the file's next bytes, as stored (no parsing or decoding)."""
+        if not MySD.is_mounted():
+            print("Warning: SD not mounted; read_chunks skipped")
+            return
+        flush_path(self.file_path)
+        view = memoryview(buf)
+        try:
+            with open(self.file_path, 'rb') as f:
+                while True:
+                    n = f.readinto(buf)
+                    if not n: return
+                    yield view[:n]
+        except OSError as e:
+            print(f"Warning: Unable to read chunks. {e}")
+            return
+
+    def _iter_decoded(self, split):
+        """Rows of a binary (codec) file, in the layout of the text format."""
+        header = list(self.time_label) + list(self._header or self.codec.columns)
+        yield header if split else separator.join(header)
+        try:
+            with open(self.file_path, 'rb') as f:
+                for record in self.codec.decode(f):
+                    epoch, boot_mono, mono = record[0], record[1], record[2]
+                    ts = TimeUtil.format_since(epoch, mono - boot_mono, self.fmt, self.with_ms)
+                    parts = [ts, mono] + list(record[3:])
+                    yield parts if split else format_row(parts).rstrip('\n')
+        except OSError as e:
+            print(f"Warning: Unable to decode records. {e}")
@@ -3,6 +3,7 @@
 import Settings
 from components import MySD  # ← NEW
 from components import TimeUtil
+from components.RotationManifest import RotationManifest
 
 DEBUG = 10
 INFO  = 20
@@ -15,40 +16,20 @@ _sd_ok = False
 _mirror_to_console = True
 _mount_point = "/sd"
 _log_path = None  # actual file path in use
+_stamper = None   # TimeUtil.Stamper for the time column (created on first line)
+_sync_policy = None  # SD sync policy of the current sink (see SYNC_POLICIES)
 
-# small in-memory ring buffer so you can read logs during runtime
-_mem_buf = []
+# small in-memory ring buffer so you can read logs during runtime:
+# preallocated slots, _mem_head is the next slot to write
 _mem_max = 500  # number of recent lines to keep
+_mem_buf = [None] * _mem_max
+_mem_head = 0
+_mem_count = 0
 
 # ---------------- basics ----------------
 
 _csv_lines = True  # If True: "time,mono_ms,LEVEL,msg"; else legacy "[time] LEVEL: msg"
 
-def _count_lines(path, stop_at=None):
-    try:
-        count = 0
-        with open(path, "r") as f:
-            for _ in f:
-                count += 1
-                if stop_at is not None and count >= stop_at:
-                    break
-        return count
-    except Exception:
-        return 0
-
-def _next_rotation_path(path, max_tries=10000):
-    try:
-        import os
-        for i in range(1, max_tries + 1):
-            candidate = f"{path}.{i}"
-            try:
-                os.stat(candidate)
-            except OSError:
-                return candidate
-    except Exception:
-        return None
-    return None
-
 def set_csv_lines(flag):
     """If True, lines are 'time,mono_ms,LEVEL,msg'. If False, keep bracket style."""
     global _csv_lines
@@ -67,11 +48,17 @@ def set_mirror_to_console(flag):
     _mirror_to_console = bool(flag)
 
 def set_mem_max(n):
-    global _mem_max
+    """Resize the in-memory ring, keeping the most recent lines that still fit."""
+    global _mem_max, _mem_buf, _mem_head, _mem_count
     try:
-        _mem_max = int(n)
+        n = max(int(n), 0)
     except:
-        pass
+        return
+    keep = list(iter_memory_log(n)) if n else []
+    _mem_max = n
+    _mem_buf = keep + [None] * (n - len(keep))
+    _mem_count = len(keep)
+    _mem_head = _mem_count % n if n else 0
 
 def _escape_csv(text):
     if text is None:
@@ -83,29 +70,122 @@ def _escape_csv(text):
 
 def _fmt(level_name, msg):
     # Normalize level text and choose format
+    global _stamper
     lvl = (level_name or "").strip()
-    ts, mono = TimeUtil.timestamp_pair('iso', True)
     if _csv_lines:
+        if _stamper is None: _stamper = TimeUtil.Stamper('iso', True)
+        ts, mono = _stamper.pair()
         # CSV-style with monotonic wall time + raw monotonic (ms)
         return f"{ts},{mono},{_escape_csv(lvl)},{_escape_csv(msg)}"
     else:
         # Legacy bracketed style
+        ts = TimeUtil.timestamp('iso', True)
         return f"[{ts}] {lvl}: {msg}"
 
-def _emit(line):
-    global _mem_buf
+def _emit(line, level=INFO):
     if _sink:
         try:
-            _sink(line)
+            _sink(line, level)
         except:
             pass
-    # keep a RAM mirror for quick access
-    try:
-        _mem_buf.append(line)
-        if len(_mem_buf) > _mem_max:
-            _mem_buf.pop(0)
-    except:
-        pass
+    # keep a RAM mirror for quick access (overwrites the oldest line once full)
+    global _mem_head, _mem_count
+    if _mem_max:
+        _mem_buf[_mem_head] = line
+        _mem_head = (_mem_head + 1) % _mem_max
+        if _mem_count < _mem_max: _mem_count += 1
+
+# ---- repeat folding and per-source rate limiting ----
+# A line identical to the previous one is counted instead of written; the count
+# goes out as "last message repeated N times" before the next different line,
+# or after _repeat_ms. DEBUG/INFO lines beyond _rate_lines per _rate_window_ms
+# from one source are dropped and reported per window. The source is the call
+# site's format string for the printf-style helpers (so "Cat switched" keeps its
+# own budget next to a flood of state lines), else the "[Main Loop]" prefix.
+# WARN/ERROR lines are never rate limited.
+
+_repeat_ms = getattr(Settings, "system_log_repeat_ms", 60000)
+_rate_lines = getattr(Settings, "system_log_rate_lines", 0)
+_rate_window_ms = getattr(Settings, "system_log_rate_window_ms", 10000)
+_last_msg = None
+_last_name = None
+_last_level = INFO
+_repeats = 0
+_repeat_start_ms = 0
+_rates = {}  # source -> [window_start_ms, lines, dropped]
+_suppressed = {"repeated": 0, "rate_limited": 0}
+
+def set_rate_limit(lines, window_ms=None):
+    """At most `lines` DEBUG/INFO lines per source and window (0: no limit)."""
+    global _rate_lines, _rate_window_ms
+    _rate_lines = int(lines)
+    if window_ms is not None: _rate_window_ms = int(window_ms)
+
+def set_repeat_ms(ms):
+    """Report folded repeats at least this often (0: only before the next different line)."""
+    global _repeat_ms
+    _repeat_ms = int(ms)
+
+def get_suppressed():
+    """Lines not written since boot: {'repeated': n, 'rate_limited': n}."""
+    return dict(_suppressed)
+
+def suppressed_summary():
+    """Suppression counters in the LoopStats summary line format."""
+    return f"log_suppressed,repeated,{_suppressed['repeated']},rate_limited,{_suppressed['rate_limited']}"
+
+def _source(msg):
+    if msg.startswith("["):
+        end = msg.find("]")
+        if end > 0: return msg[:end + 1]
+    return ""
+
+def _flush_repeats():
+    global _repeats
+    n = _repeats
+    if not n: return
+    _repeats = 0
+    _emit(_fmt(_last_name, f"[MySystemLog] last message repeated {n} times"), _last_level)
+
+def _report_dropped(source, state):
+    if state[2]:
+        _emit(_fmt("INFO", f"[MySystemLog] rate limit: {state[2]} lines dropped from {source or 'log'}"), INFO)
+        state[2] = 0
+
+def _rate_ok(source, now):
+    state = _rates.get(source)
+    if state is None:
+        state = _rates[source] = [now, 0, 0]
+    elif now - state[0] >= _rate_window_ms:
+        _report_dropped(source, state)
+        state[0] = now; state[1] = 0
+    if state[1] >= _rate_lines:
+        state[2] += 1
+        _suppressed["rate_limited"] += 1
+        return False
+    state[1] += 1
+    return True
+
+def _log(level, name, msg, source=None):
+    global _last_msg, _last_name, _last_level, _repeats, _repeat_start_ms
+    if msg == _last_msg and name == _last_name:
+        now = TimeUtil.monotonic_ms()
+        if not _repeats: _repeat_start_ms = now
+        _repeats += 1
+        _suppressed["repeated"] += 1
+        if _repeat_ms and now - _repeat_start_ms >= _repeat_ms: _flush_repeats()
+        return
+    if _repeats: _flush_repeats()
+    if _rate_lines and level < WARN:
+        if not _rate_ok(_source(msg) if source is None else source, TimeUtil.monotonic_ms()): return
+    _last_msg, _last_name, _last_level = msg, name, level
+    _emit(_fmt(name, msg), level)
+
+def flush_suppressed(now=None):
+    """Write pending repeat counts and the drops of finished rate windows (now=None: all drops)."""
+    if _repeats and (now is None or (_repeat_ms and now - _repeat_start_ms >= _repeat_ms)): _flush_repeats()
+    for source, state in _rates.items():
+        if now is None or now - state[0] >= _rate_window_ms: _report_dropped(source, state)
 
 # joiner that behaves like print(*parts)
 _def_join = lambda parts: " ".join(str(p) for p in parts)
@@ -114,55 +194,60 @@ _def_join = lambda parts: " ".join(str(p) for p in parts)
 
 def debug(*parts):
     if _level <= DEBUG:
-        _emit(_fmt("DEBUG", _def_join(parts)))
+        _log(DEBUG, "DEBUG", _def_join(parts))
 
 def info(*parts):
     if _level <= INFO:
-        _emit(_fmt("INFO", _def_join(parts)))
+        _log(INFO, "INFO", _def_join(parts))
 
 def warn(*parts):
     if _level <= WARN:
-        _emit(_fmt("WARN", _def_join(parts)))
+        _log(WARN, "WARN", _def_join(parts))
 
 def error(*parts):
     if _level <= ERROR:
-        _emit(_fmt("ERROR", _def_join(parts)))
+        _log(ERROR, "ERROR", _def_join(parts))
 
 def critical(*parts):
     msg = _def_join(parts)
     error(msg)
     raise RuntimeError(msg)
 
-# Optional printf-style helpers
+# printf-style helpers: the message is only rendered when the level passes,
+# so debugf("[RFID] read %dB", n) costs a comparison at INFO.
+# Guard anything else expensive with enabled(level).
 
-def infof(fmt, *args):
+def enabled(level):
+    """True if a line at `level` would be emitted."""
+    return _level <= level
+
+def _render(fmt, args):
+    if not args: return str(fmt)
     try:
-        info(fmt % args)
+        return fmt % args
     except Exception:
-        info(fmt, *args)
+        return _def_join((fmt,) + args)
+
+def infof(fmt, *args):
+    if _level <= INFO:
+        _log(INFO, "INFO", _render(fmt, args), fmt)
 
 def debugf(fmt, *args):
-    try:
-        debug(fmt % args)
-    except Exception:
-        debug(fmt, *args)
+    if _level <= DEBUG:
+        _log(DEBUG, "DEBUG", _render(fmt, args), fmt)
 
 def warnf(fmt, *args):
-    try:
-        warn(fmt % args)
-    except Exception:
-        warn(fmt, *args)
+    if _level <= WARN:
+        _log(WARN, "WARN", _render(fmt, args), fmt)
 
 def errorf(fmt, *args):
-    try:
-        error(fmt % args)
-    except Exception:
-        error(fmt, *args)
+    if _level <= ERROR:
+        _log(ERROR, "ERROR", _render(fmt, args), fmt)
 
 # ---------------- sinks ----------------
 
 class _PrintSink:
-    def __call__(self, line):
+    def __call__(self, line, level=INFO):
         print(line)
 
     def flush(self):
@@ -172,59 +257,84 @@ class _PrintSink:
         except:
             pass
 
+# Durability policies for _SDSink: when written lines are synced to the card
+SYNC_ALWAYS = 'always'  # after every line (slowest; a power cut loses nothing)
+SYNC_LINES = 'lines'    # after every sync_lines lines
+SYNC_TIME = 'time'      # once sync_ms passed since the last sync (on a write or sync_if_due())
+SYNC_ERRORS = 'errors'  # on WARN/ERROR lines only
+SYNC_NEVER = 'never'    # on flush()/close()/rotation only
+SYNC_POLICIES = (SYNC_ALWAYS, SYNC_LINES, SYNC_TIME, SYNC_ERRORS, SYNC_NEVER)
+
 class _SDSink:
-    def __init__(self, path="/sd/system.log", autosync=False, keep_open=True, max_lines=None):
+    def __init__(self, path="/sd/system.log", sync=SYNC_NEVER, keep_open=True, max_lines=None,
+                 sync_lines=None, sync_ms=None):
+        if sync not in SYNC_POLICIES: raise ValueError(f"unknown sync policy {sync!r}")
         self.path = path
-        self.autosync = autosync
+        self.sync = sync
+        self.sync_lines = sync_lines if sync_lines is not None else getattr(Settings, "system_log_sync_lines", 20)
+        self.sync_ms = sync_ms if sync_ms is not None else getattr(Settings, "system_log_sync_ms", 5000)
         self.keep_open = keep_open
         self._max_lines = max_lines
         self._line_count = 0
+        self._unsynced = 0       # lines written since the last sync
+        self._last_sync_ms = TimeUtil.monotonic_ms()
+        self.syncs = 0
+        self._manifest = RotationManifest(self.path)
         self._fh = open(self.path, "a") if keep_open else None
         if self._max_lines:
-            total = _count_lines(self.path, stop_at=self._max_lines + 1)
+            total = self._manifest.restore_lines(stop_at=self._max_lines + 1)
             self._line_count = total
             if self._line_count >= self._max_lines:
                 self._rotate_file()
                 self._line_count = 0
 
-    def __call__(self, line):
+    def __call__(self, line, level=INFO):
         try:
             if self._max_lines and self._line_count >= self._max_lines:
                 self._rotate_file()
                 self._line_count = 0
             if self.keep_open:
                 self._fh.write(line + "\n")
-                if self.autosync:
-                    try:
-                        self._fh.flush()
-                        import os
-                        try: os.sync()
-                        except: pass
-                    except: pass
             else:
                 with open(self.path, "a") as f:
                     f.write(line + "\n")
-                    if self.autosync:
-                        try:
-                            f.flush()
-                            import os
-                            try: os.sync()
-                            except: pass
-                        except: pass
+            self._unsynced += 1
+            if self._sync_due(level): self._sync()
             if self._max_lines is not None:
                 self._line_count += 1
+                if self._manifest.checkpoint_due(self._line_count):
+                    if self._fh: self._fh.flush()
+                    self._manifest.checkpoint(self._line_count)
+            if self._manifest.first_mono < 0: self._manifest.note(TimeUtil.monotonic_ms())
         except Exception as e:
             try: print("[MySystemLog] SD write failed:", repr(e))
             except: pass
 
-    def flush(self):
-        if self.keep_open and self._fh:
-            try:
-                self._fh.flush()
-                import os
-                try: os.sync()
-                except: pass
+    def _sync_due(self, level):
+        sync = self.sync
+        if sync == SYNC_ALWAYS: return True
+        if sync == SYNC_LINES: return self._unsynced >= self.sync_lines
+        if sync == SYNC_TIME: return TimeUtil.monotonic_ms() - self._last_sync_ms >= self.sync_ms
+        if sync == SYNC_ERRORS: return level >= WARN
+        return False
+
+    def _sync(self):
+        try:
+            if self._fh: self._fh.flush()
+            import os
+            try: os.sync()
             except: pass
+        except: pass
+        self._unsynced = 0
+        self._last_sync_ms = TimeUtil.monotonic_ms()
+        self.syncs += 1
+
+    def sync_if_due(self):
+        """'time' policy: sync lines left unsynced once sync_ms passed (call from the main loop)."""
+        if self.sync == SYNC_TIME and self._unsynced and self._sync_due(INFO): self._sync()
+
+    def flush(self):
+        if self.keep_open and self._fh: self._sync()
 
     def close(self):
         try:
@@ -241,16 +351,16 @@ class _SDSink:
                 self._fh.close()
         except:
             pass
-        rotated = _next_rotation_path(self.path)
-        if rotated is None:
-            try: print("[MySystemLog] No rotation slot available; rotate skipped")
-            except: pass
-            return False
         try:
-            import os
-            os.rename(self.path, rotated)
+            last_mono = TimeUtil.monotonic_ms() if self._manifest.first_mono >= 0 else -1
+            rotated = self._manifest.rotate(last_mono, self._line_count)
+            if rotated is None:
+                try: print("[MySystemLog] No rotation slot available; rotate skipped")
+                except: pass
+                return False
             if self.keep_open:
                 self._fh = open(self.path, "a")
+            if _stamper is not None: _stamper.reset()
             return True
         except Exception as e:
             try: print("[MySystemLog] rotate failed:", repr(e))
@@ -260,10 +370,15 @@ class _SDSink:
 class _TeeSink:
     def __init__(self, *sinks):
         self.sinks = list(sinks)
-    def __call__(self, line):
+    def __call__(self, line, level=INFO):
         for s in self.sinks:
-            try: s(line)
+            try: s(line, level)
             except: pass
+    def sync_if_due(self):
+        for s in self.sinks:
+            if hasattr(s, "sync_if_due"):
+                try: s.sync_if_due()
+                except: pass
     def flush(self):
         for s in self.sinks:
             if hasattr(s, "flush"):
@@ -277,11 +392,21 @@ class _TeeSink:
 
 # ---------------- setup / teardown ----------------
 
-def setup_system_log(autosync=True, keep_open=True, quiet=False):
-    """Initialize logging. Returns True if logging to SD, else False (console-only)."""
+def setup_system_log(autosync=None, keep_open=True, quiet=False, sync=None):
+    """
+    Initialize logging. Returns True if logging to SD, else False (console-only).
+
+    sync is the SD durability policy (one of SYNC_POLICIES), by default
+    Settings.system_log_sync; autosync=True/False is the older spelling of
+    sync='always'/'never'.
+    """
     filename = Settings.system_log_filename
     max_lines = getattr(Settings, "system_log_max_lines", None)
-    global _sink, _sd_ok, _log_path
+    global _sink, _sd_ok, _log_path, _sync_policy
+    if sync is None:
+        if autosync is None: sync = getattr(Settings, "system_log_sync", SYNC_LINES)
+        else: sync = SYNC_ALWAYS if autosync else SYNC_NEVER
+    _sync_policy = sync
 
     # Use the new SD module
     _sd_ok = bool(MySD.mount_sd_card())
@@ -295,7 +420,7 @@ def setup_system_log(autosync=True, keep_open=True, quiet=False):
     if _sd_ok and MySD.is_mounted():
         _log_path = path
         try:
-            sd_sink = _SDSink(path, autosync=autosync, keep_open=keep_open, max_lines=max_lines)
+            sd_sink = _SDSink(path, sync=sync, keep_open=keep_open, max_lines=max_lines)
             _sink = _TeeSink(sd_sink, _PrintSink()) if _mirror_to_console else sd_sink
             if not quiet: info("[MySystemLog] Logging to SD:", path)
             return True
@@ -310,11 +435,20 @@ def setup_system_log(autosync=True, keep_open=True, quiet=False):
 
 def flush():
     """Force a flush to SD if possible."""
+    flush_suppressed()
     try:
         obj = _sink
         if hasattr(obj, "flush"): obj.flush()
     except: pass
 
+def sync_if_due():
+    """Sync lines the 'time' policy left unsynced once they are due (cheap otherwise)."""
+    if _repeats or _rate_lines: flush_suppressed(TimeUtil.monotonic_ms())
+    try:
+        obj = _sink
+        if hasattr(obj, "sync_if_due"): obj.sync_if_due()
+    except: pass
+
 def teardown():
     """Close SD sink (if open)."""
     global _sink
@@ -337,7 +471,7 @@ def clear_system_log():
     except: pass
     try:
         with open(_log_path, "w") as f: f.write("")
-        setup_system_log(autosync=True, keep_open=True, quiet=True)
+        setup_system_log(keep_open=True, quiet=True, sync=_sync_policy)
         info("[MySystemLog] System log cleared")
         return True
     except Exception as e:
@@ -358,7 +492,7 @@ def read_log(last_n=None):
             lines = [s.rstrip("\n") for s in f.readlines()]
         return lines[-last_n:] if (last_n and last_n > 0) else lines
     except Exception:
-        return _mem_buf[-last_n:] if (last_n and last_n > 0) else list(_mem_buf)
+        return get_memory_log(last_n)
 
 def tail(n=100):
     return read_log(last_n=n)
@@ -382,9 +516,19 @@ def snapshot_log(to_path=None, last_n=None):
     except Exception:
         return len(lines)
 
+def iter_memory_log(last_n=None):
+    """Yield the in-memory lines, oldest first (the last_n most recent if given), without copying the ring."""
+    count = _mem_count
+    if last_n and last_n > 0 and last_n < count: count = last_n
+    i = (_mem_head - count) % _mem_max if _mem_max else 0
+    for _ in range(count):
+        yield _mem_buf[i]
+        i += 1
+        if i == _mem_max: i = 0
+
 def get_memory_log(last_n=None):
     """Return only the in-memory buffer (ignores file)."""
-    return _mem_buf[-last_n:] if (last_n and last_n > 0) else list(_mem_buf)
+    return list(iter_memory_log(last_n))
 
 def sd_available():
     return _sd_ok and MySD.is_mounted()
@@ -0,0 +1,220 @@
+# lib/components/RotationManifest.py
+# Rotation bookkeeping for logs that roll over to name.1, name.2, ...
+#
+# Each log keeps a small append-only manifest next to it (licks.dat.manifest):
+#
+#   index,segment,first_mono_ms,last_mono_ms,lines
+#   1,licks.dat.1,1000412,8812000,2000
+#   2,licks.dat.2,8812105,15120050,2000
+#
+# Only the last line is read at startup, so finding the next rotation name is
+# O(1) instead of an os.stat() per existing segment. first/last_mono_ms are -1 when
+# unknown, e.g. for a segment continued after a reboot (mono_ms restarts at boot).
+#
+# The line count of the current file is checkpointed in a sidecar
+# (licks.dat.lines: "bytes,lines") every Settings.log_checkpoint_lines lines. At boot only
+# the bytes written after the checkpoint are counted, so restoring the count
+# does not depend on the file size. Binary files checkpoint their data records.
+#
+# For downloads every segment is named by its index, the current file by the
+# index it will get when it rotates (current_index()), so a host's cursor
+# (segment, byte offset) stays valid across rotations.
+import os
+import Settings
+
+SUFFIX = '.manifest'
+CHECKPOINT_SUFFIX = '.lines'
+HEADER = 'index,segment,first_mono_ms,last_mono_ms,lines'
+_TAIL_BYTES = 256
+
+
+def manifest_path(path):
+    return path + SUFFIX
+
+
+def _next_free(path, start=1, max_tries=10000):
+    """Probe path.N from N=start for a free name (fallback for missing/stale manifests)."""
+    for i in range(start, start + max_tries):
+        candidate = f"{path}.{i}"
+        try:
+            os.stat(candidate)
+        except OSError:
+            return i
+    return None
+
+
+def _file_size(path):
+    try:
+        return os.stat(path)[6]
+    except OSError:
+        return None
+
+
+def count_lines(path, start=0, stop_at=None):
+    """Newlines in path from byte offset start (stops once stop_at is reached)."""
+    count = 0
+    try:
+        with open(path, 'rb') as f:
+            if start: f.seek(start)
+            while True:
+                chunk = f.read(512)
+                if not chunk: break
+                count += chunk.count(b'\n')
+                if stop_at is not None and count >= stop_at: break
+    except OSError:
+        return 0
+    return count
+
+
+def _last_line(path):
+    try:
+        size = os.stat(path)[6]
+        with open(path, 'rb') as f:
+            if size > _TAIL_BYTES: f.seek(size - _TAIL_BYTES)
+            tail = f.read()
+    except OSError:
+        return None
+    lines = tail.decode('utf-8', 'ignore').strip().split('\n')
+    return lines[-1].strip() if lines else None
+
+
+class RotationManifest:
+    def __init__(self, path, checkpoint_lines=None):
+        self.path = path
+        self.manifest = manifest_path(path)
+        self.checkpoint_path = path + CHECKPOINT_SUFFIX
+        if checkpoint_lines is None: checkpoint_lines = getattr(Settings, "log_checkpoint_lines", 200)
+        self.checkpoint_lines = checkpoint_lines
+        self._checkpointed = None  # line count of the last checkpoint written
+        self.next_index = None     # None: not known yet (probe on first rotation)
+        self.first_mono = -1       # first row of the current segment (this boot only)
+        last = _last_line(self.manifest)
+        if last and last != HEADER:
+            try: self.next_index = int(last.split(',', 1)[0]) + 1
+            except ValueError: pass
+
+    def note(self, mono_ms):
+        """Call when a row is written; remembers when the current segment started."""
+        if self.first_mono < 0: self.first_mono = mono_ms
+
+    def reset(self, mono_ms=None):
+        """The current file was emptied: its next row starts a fresh segment."""
+        self.first_mono = -1 if mono_ms is None else mono_ms
+        self.checkpoint(0, size=0)
+
+    # --- line count checkpoints ---
+    def restore_lines(self, stop_at=None, count=None):
+        """
+        Lines in the current file: checkpoint + lines written after it (full count without one).
+        count(path, start, stop_at) counts the rows after the checkpoint (default count_lines;
+        binary files count records).
+        """
+        if count is None: count = count_lines
+        size = _file_size(self.path)
+        if size is None: return 0
+        start, lines = 0, 0
+        try:
+            with open(self.checkpoint_path, 'r') as f:
+                cp_size, cp_lines = (int(x) for x in f.read().strip().split(','))
+            if cp_size <= size: start, lines = cp_size, cp_lines  # else: file was replaced
+        except (OSError, ValueError):
+            pass
+        if start < size:
+            lines += count(self.path, start, None if stop_at is None else stop_at - lines)
+        self._checkpointed = lines
+        return lines
+
+    def checkpoint(self, lines, size=None):
+        """Record that the (flushed) current file holds `lines` lines."""
+        if size is None: size = _file_size(self.path)
+        if size is None: return False
+        try:
+            with open(self.checkpoint_path, 'w') as f: f.write(f"{size},{lines}\n")
+        except OSError as e:
+            print(f"Warning: Unable to write line checkpoint. {e}")
+            return False
+        self._checkpointed = lines
+        return True
+
+    def checkpoint_due(self, lines):
+        """True once checkpoint_lines lines were written since the last checkpoint."""
+        if not self.checkpoint_lines: return False
+        return self._checkpointed is None or lines - self._checkpointed >= self.checkpoint_lines
+
+    def maybe_checkpoint(self, lines):
+        if not self.checkpoint_due(lines): return False
+        return self.checkpoint(lines)
+
+    # --- segments ---
+    def current_index(self):
+        """Segment index the current file will be rotated to (None if no name is free)."""
+        index = self.next_index
+        if index is None: index = _next_free(self.path)
+        else:
+            try:
+                os.stat(f"{self.path}.{index}")
+                index = _next_free(self.path, index)  # stale manifest: search on from there
+            except OSError:
+                pass
+        self.next_index = index
+        return index
+
+    def segment_path(self, index):
+        """Path of segment `index`: a rotated file, or the current file for current_index()."""
+        if index == self.current_index(): return self.path
+        return f"{self.path}.{index}"
+
+    def entries(self):
+        """(index, segment name) of every rotation in the manifest, oldest first."""
+        found = []
+        try:
+            with open(self.manifest, 'r') as f:
+                for line in f:
+                    parts = line.split(',', 2)
+                    if len(parts) < 3: continue
+                    try: found.append((int(parts[0]), parts[1]))
+                    except ValueError: pass  # header or a torn line
+        except OSError:
+            pass
+        return found
+
+    def segments(self, since=1):
+        """(index, size) of the existing segments from index since on, the current file last."""
+        current = self.current_index()
+        if current is None: return []
+        entries = self.entries()
+        folder = self.path.rsplit('/', 1)[0] + '/' if '/' in self.path else ''
+        found = []
+        # Only segments rotated before the manifest existed (older firmware) are probed by name
+        first = entries[0][0] if entries else current
+        for index in range(max(since, 1), first):
+            size = _file_size(f"{self.path}.{index}")
+            if size is not None: found.append((index, size))
+        for index, name in entries:
+            if index < since: continue
+            size = _file_size(folder + name)
+            if size is not None: found.append((index, size))
+        size = _file_size(self.path)
+        if size is not None: found.append((current, size))
+        return found
+
+    def rotate(self, last_mono_ms, lines):
+        """
+        Rename the current file to its next segment name and record it.
+        Returns the rotated path, or None if no name is free or the rename fails.
+        """
+        index = self.current_index()
+        if index is None: return None
+        rotated = f"{self.path}.{index}"
+        os.rename(self.path, rotated)
+        self.next_index = index + 1
+        self.checkpoint(0, size=0)
+        try:
+            new = not _last_line(self.manifest)
+            with open(self.manifest, 'a') as f:
+                if new: f.write(HEADER + '\n')
+                f.write(f"{index},{rotated.rsplit('/', 1)[-1]},{self.first_mono},{last_mono_ms},{lines}\n")
+        except OSError as e:
+            print(f"Warning: Unable to update rotation manifest. {e}")
+        self.first_mono = -1
+        return rotated
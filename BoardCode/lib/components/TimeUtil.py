@@ -1,4 +1,5 @@
 import time as _time
+import Settings
 
 # Shared time utilities for consistent RTC + monotonic timestamps.
 
@@ -7,6 +8,11 @@ timebase_ready = False
 boot_mono_ms = None
 boot_epoch = None
 
+# Last formatted second: rows within the same second only get a new ms suffix
+_cache_seconds = None
+_cache_fmt = None
+_cache_base = None
+
 def init_timebase():
     global rtc, timebase_ready, boot_mono_ms, boot_epoch
     if timebase_ready:
@@ -44,16 +50,24 @@ def _format_time(t, fmt):
 def _wall_time_from_mono(mono_now, fmt='iso', with_ms=True):
     if not timebase_ready:
         init_timebase()
-    delta_ms = mono_now - (boot_mono_ms or 0)
+    return format_since(boot_epoch or 0, mono_now - (boot_mono_ms or 0), fmt, with_ms)
+
+def format_since(epoch, delta_ms, fmt='iso', with_ms=True):
+    """Format the wall time delta_ms after `epoch` (seconds), e.g. for rows of an earlier boot."""
+    global _cache_seconds, _cache_fmt, _cache_base
     if delta_ms < 0:
         delta_ms = 0
-    base_seconds = (boot_epoch or 0) + (delta_ms // 1000)
+    base_seconds = epoch + (delta_ms // 1000)
     frac_ms = int(delta_ms % 1000)
-    try:
-        t = _time.localtime(base_seconds)
-    except Exception:
-        t = rtc.now()
-    base = _format_time(t, fmt)
+    if base_seconds == _cache_seconds and fmt == _cache_fmt:
+        base = _cache_base
+    else:
+        try:
+            t = _time.localtime(base_seconds)
+        except Exception:
+            t = rtc.now()
+        base = _format_time(t, fmt)
+        _cache_seconds, _cache_fmt, _cache_base = base_seconds, fmt, base
     return f"{base}.{frac_ms:03d}" if with_ms else base
 
 def monotonic_wall_time(fmt='iso', with_ms=True):
@@ -76,3 +90,33 @@ def timestamp_pair(fmt='iso', with_ms=True):
     """Return (rtc_str, mono_ms)."""
     mono_now = monotonic_ms()
     return _wall_time_from_mono(mono_now, fmt, with_ms), mono_now
+
+class Stamper:
+    """
+    Time column for one log. In 'wall' mode every row gets the wall time. In
+    'mono' mode only anchor rows do (the first row, after reset(), and then
+    every anchor_ms); other rows leave the time empty and carry mono_ms only,
+    which saves formatting a date per row. Readers rebuild the time from the
+    nearest anchor row (ProcessLickData data_reader.fill_time_from_mono).
+    """
+
+    def __init__(self, fmt='iso', with_ms=True, mode=None, anchor_ms=None):
+        self.fmt = fmt
+        self.with_ms = with_ms
+        self.mode = mode if mode is not None else getattr(Settings, 'log_time_mode', 'wall')
+        self.anchor_ms = anchor_ms if anchor_ms is not None else getattr(Settings, 'log_anchor_period_ms', 60000)
+        self._next_anchor_ms = None
+
+    def reset(self):
+        """Anchor the next row (e.g. first row of a new file)."""
+        self._next_anchor_ms = None
+
+    def pair(self, mono_now=None):
+        """Return (time_str, mono_ms) for now or mono_now; time_str is '' for non-anchor rows in 'mono' mode."""
+        if mono_now is None: mono_now = monotonic_ms()
+        if self.mode != 'mono':
+            return _wall_time_from_mono(mono_now, self.fmt, self.with_ms), mono_now
+        if self._next_anchor_ms is not None and mono_now < self._next_anchor_ms:
+            return '', mono_now
+        self._next_anchor_ms = mono_now + self.anchor_ms
+        return _wall_time_from_mono(mono_now, self.fmt, self.with_ms), mono_now
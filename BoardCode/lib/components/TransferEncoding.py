@@ -0,0 +1,185 @@
+# lib/components/TransferEncoding.py
+# Compact encoding of CSV lines for Bluetooth downloads ('licks,compressed').
+#
+# A line is split on every comma (so any line round-trips, quoted or not) and
+# each field is coded against the same column of the previous line. The
+# stream is a sequence of varints (LEB128: 7 bits per byte, low bits first):
+#
+#   line    head, [count], one field per column not repeated
+#   head    repeat_mask << 1 | new_count. Bit i of repeat_mask: column i equals
+#           the previous line's and is not sent. new_count: the column count
+#           follows (it changed). head 1 with count 0 ends the stream.
+#   field   token = payload << 3 | op
+#
+#   op 0 INT   zigzag(value - previous number in the column)           "370849280"
+#   op 1 DEC   zigzag(delta) << 3 | digits, numbers scaled by 10**digits "1.03375"
+#   op 2 TIME  zigzag(ms into the hour - previous) << 1 | has_ms,      "2026-02-04 19:43:27.842"
+#              same hour prefix ("2026-02-04 19:") as the column's previous time
+#   op 3 HOUR  new hour prefix: dictionary slot + 1, or 0 followed by a TEXT
+#              length and bytes; then one more varint, ms << 1 | has_ms
+#   op 4 WORD  dictionary slot of a string sent before                  "henk", "INFO"
+#   op 5 TEXT  byte length, then the utf-8 bytes
+#
+# TEXT strings of up to MAX_WORD bytes and new hour prefixes take the next
+# slot of a DICT_SIZE ring (oldest first), so cat names, levels and repeated
+# log messages cost a byte or two. Numbers only use INT/DEC when they print
+# back the same (no '+', leading zeros or '-0'); anything else is TEXT.
+# The desktop decoder is BluetoothDownloader/library/DataUtils.decode_rows.
+
+OP_INT = 0
+OP_DEC = 1
+OP_TIME = 2
+OP_HOUR = 3
+OP_WORD = 4
+OP_TEXT = 5
+DICT_SIZE = 64
+MAX_WORD = 64
+MAX_DIGITS = 7
+
+
+def _digits_only(text):
+    for c in text:
+        if c < '0' or c > '9': return False
+    return True
+
+
+def parse_number(text):
+    """(value scaled by 10**digits, digits) if text prints back the same as a number, else None."""
+    if not text or len(text) > 18: return None
+    negative = text[0] == '-'
+    body = text[1:] if negative else text
+    dot = body.find('.')
+    whole, frac = (body, '') if dot < 0 else (body[:dot], body[dot + 1:])
+    if not whole or not _digits_only(whole): return None
+    if dot >= 0 and (not frac or not _digits_only(frac) or len(frac) > MAX_DIGITS): return None
+    if len(whole) > 1 and whole[0] == '0': return None
+    value = int(whole + frac)
+    if negative:
+        if value == 0: return None
+        value = -value
+    return value, len(frac)
+
+
+def parse_time(text):
+    """(hour prefix, ms into the hour, has_ms 1/0) for 'YYYY-MM-DD HH:MM:SS[.fff]', else None."""
+    n = len(text)
+    if n != 19 and n != 23: return None
+    if text[4] != '-' or text[7] != '-' or text[10] != ' ' or text[13] != ':' or text[16] != ':': return None
+    if n == 23 and text[19] != '.': return None
+    if not _digits_only(text[:4] + text[5:7] + text[8:10] + text[11:13] + text[14:16] + text[17:19] + text[20:]):
+        return None
+    minutes, seconds = int(text[14:16]), int(text[17:19])
+    if minutes > 59 or seconds > 59: return None
+    ms = minutes * 60000 + seconds * 1000 + (int(text[20:]) if n == 23 else 0)
+    return text[:14], ms, 1 if n == 23 else 0
+
+
+def rescale(value, digits, to_digits):
+    if to_digits >= digits: return value * 10 ** (to_digits - digits)
+    return value // 10 ** (digits - to_digits)
+
+
+def zigzag(n):
+    return n << 1 if n >= 0 else ((-n) << 1) - 1
+
+
+def _varint(out, n):
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+class RowEncoder:
+    """
+    Encodes CSV lines (without newline) one at a time. Keeps the previous
+    line and the dictionary, so one encoder serves exactly one stream.
+    """
+
+    def __init__(self):
+        self.count = 0           # columns of the previous line
+        self.texts = []          # per column: previous text
+        self.numbers = []        # per column: previous number, scaled by 10**digits
+        self.digits = []
+        self.ms = []             # per column: previous time, ms into the hour
+        self.hours = []          # per column: previous hour prefix
+        self.words = [None] * DICT_SIZE
+        self.slots = {}          # string -> dictionary slot
+        self.next_slot = 0
+        self.lines = 0
+
+    def _remember(self, text):
+        slot = self.next_slot
+        old = self.words[slot]
+        if old is not None and self.slots.get(old) == slot: del self.slots[old]
+        self.words[slot] = text
+        self.slots[text] = slot
+        self.next_slot = (slot + 1) % DICT_SIZE
+
+    def _text(self, out, text, always=False):
+        data = text.encode('utf-8')
+        _varint(out, len(data))
+        out.extend(data)
+        if always or len(data) <= MAX_WORD: self._remember(text)
+
+    def _field(self, out, i, text):
+        if len(text) in (19, 23) and text[4:5] == '-':
+            parsed = parse_time(text)
+            if parsed is not None:
+                hour, ms, has_ms = parsed
+                if hour == self.hours[i]:
+                    _varint(out, (((zigzag(ms - self.ms[i]) << 1) | has_ms) << 3) | OP_TIME)
+                else:
+                    slot = self.slots.get(hour)
+                    if slot is None:
+                        _varint(out, OP_HOUR)
+                        self._text(out, hour, always=True)
+                    else:
+                        _varint(out, ((slot + 1) << 3) | OP_HOUR)
+                    _varint(out, (ms << 1) | has_ms)
+                    self.hours[i] = hour
+                self.ms[i] = ms
+                return
+        parsed = parse_number(text)
+        if parsed is not None:
+            value, digits = parsed
+            delta = value - rescale(self.numbers[i], self.digits[i], digits)
+            if digits: _varint(out, (((zigzag(delta) << 3) | digits) << 3) | OP_DEC)
+            else: _varint(out, (zigzag(delta) << 3) | OP_INT)
+            self.numbers[i], self.digits[i] = value, digits
+            return
+        slot = self.slots.get(text)
+        if slot is not None:
+            _varint(out, (slot << 3) | OP_WORD)
+            return
+        _varint(out, OP_TEXT)
+        self._text(out, text)
+
+    def encode(self, line):
+        """The encoded bytes of one line."""
+        fields = line.split(',')
+        count = len(fields)
+        texts = self.texts
+        while len(texts) < count:
+            texts.append(None); self.numbers.append(0); self.digits.append(0)
+            self.ms.append(0); self.hours.append(None)
+        same = min(count, self.count)
+        mask = 0
+        for i in range(same):
+            if fields[i] == texts[i]: mask |= 1 << i
+        out = bytearray()
+        if count == self.count: _varint(out, mask << 1)
+        else:
+            _varint(out, (mask << 1) | 1)
+            _varint(out, count)
+        for i in range(count):
+            if not (mask >> i) & 1:
+                self._field(out, i, fields[i])
+                texts[i] = fields[i]
+        self.count = count
+        self.lines += 1
+        return out
+
+    def end(self):
+        """The bytes that close the stream."""
+        return b'\x01\x00'
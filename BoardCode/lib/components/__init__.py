@@ -7,6 +7,8 @@
 # Import your classes from the individual files in this folder
 # This the **classes** available them available when someone imports the package.
 from .MyADC import MyADC         # from myADC.py import class myADC
+from .MyADC import MyADCAverager # non-blocking running mean of a MyADC
+from .MyBufferedADC import MyBufferedADC # fixed-rate block capture
 from .MyBT import MyBT           # from myBT.py import class myBT
 from .MyDigital import MyDigital # from myDigital.py import class myDigital
 from .MyOLED import MyOLED       # from myOLED.py import class myOLED
@@ -17,4 +19,4 @@ from .MyStore import MyStore     # from myStore.py import class myStore
 # __all__ defines what gets imported when someone does:
 #   from components import *
 # This prevents extra things (like helper functions) from leaking out.
-__all__ = ["MyADC", "MyBT", "MyDigital", "MyOLED", "MyPixel", "MyRTC", "MyStore"]
\ No newline at end of file
+__all__ = ["MyADC", "MyADCAverager", "MyBufferedADC", "MyBT", "MyDigital", "MyOLED", "MyPixel", "MyRTC", "MyStore"]
\ No newline at end of file
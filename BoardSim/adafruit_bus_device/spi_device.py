@@ -0,0 +1,15 @@
+"""Host-side stand-in for `adafruit_bus_device.spi_device`."""
+
+
+class SPIDevice:
+    def __init__(self, spi, chip_select=None, *, baudrate=100000, polarity=0, phase=0, extra_clocks=0):
+        self.spi = spi
+        self.chip_select = chip_select
+
+    def __enter__(self):
+        while not self.spi.try_lock(): pass
+        return self.spi
+
+    def __exit__(self, *args):
+        self.spi.unlock()
+        return False
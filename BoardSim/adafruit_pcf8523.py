@@ -0,0 +1,23 @@
+"""
+Host-side stand-in for the `adafruit_pcf8523` driver (the real one needs the
+compiled adafruit_register modules). The RTC follows time.time(), so it runs
+on virtual time when the simulator clock is installed.
+"""
+
+import time
+
+
+class PCF8523:
+    def __init__(self, i2c_bus):
+        self.i2c_bus = i2c_bus
+        self._offset = 0.0
+        self.lost_power = False
+        self.power_management = 0
+
+    @property
+    def datetime(self):
+        return time.localtime(int(time.time() + self._offset))
+
+    @datetime.setter
+    def datetime(self, value):
+        self._offset = time.mktime(value) - time.time()
@@ -0,0 +1,56 @@
+"""Minimal host-side stand-in for `adafruit_pixelbuf` (what neopixel.NeoPixel uses)."""
+
+
+class PixelBuf:
+    def __init__(self, size, *, byteorder="BGR", brightness=1.0, auto_write=False, header=None, trailer=None):
+        self._n = size
+        self._byteorder = byteorder
+        self._bpp = len(byteorder)
+        self._pixels = [(0,) * self._bpp for _ in range(size)]
+        self._brightness = min(1.0, max(0.0, brightness))
+        self.auto_write = auto_write
+
+    def __len__(self):
+        return self._n
+
+    def _parse(self, value):
+        if isinstance(value, int):
+            value = ((value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF)
+        value = tuple(value)
+        if len(value) < self._bpp: value = value + (0,) * (self._bpp - len(value))
+        return value[:self._bpp]
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            for i, v in zip(range(*index.indices(self._n)), value): self._pixels[i] = self._parse(v)
+        else:
+            self._pixels[index] = self._parse(value)
+        if self.auto_write: self.show()
+
+    def __getitem__(self, index):
+        return self._pixels[index]
+
+    @property
+    def brightness(self):
+        return self._brightness
+
+    @brightness.setter
+    def brightness(self, value):
+        self._brightness = min(1.0, max(0.0, value))
+        if self.auto_write: self.show()
+
+    def fill(self, color):
+        value = self._parse(color)
+        for i in range(self._n): self._pixels[i] = value
+        if self.auto_write: self.show()
+
+    def show(self):
+        order = "RGBW"
+        buf = bytearray()
+        for pixel in self._pixels:
+            for channel in self._byteorder:
+                buf.append(int(pixel[order.index(channel)] * self._brightness))
+        self._transmit(buf)
+
+    def _transmit(self, buffer):
+        raise NotImplementedError
@@ -0,0 +1,35 @@
+"""
+Host-side stand-in for CircuitPython's `analogbufio` module.
+
+Samples come from the same scripted traces as the fake `analogio`
+(set_trace(pin, trace)). readinto() evaluates the trace at the sample times
+of the block and then sleeps for the block duration, like the real DMA
+capture does.
+"""
+
+import time
+
+from analogio import set_trace, clear_traces, sample
+
+
+class BufferedIn:
+    def __init__(self, pin, *, sample_rate):
+        self.pin = pin
+        self.sample_rate = sample_rate
+
+    def readinto(self, buffer, loop=False):
+        n = len(buffer)
+        t0 = time.monotonic()
+        for i in range(n):
+            buffer[i] = sample(self.pin, t0 + i / self.sample_rate)
+        time.sleep(n / self.sample_rate)
+        return n
+
+    def deinit(self):
+        self.pin = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.deinit()
@@ -0,0 +1,46 @@
+"""
+Host-side stand-in for CircuitPython's `analogio` module.
+
+AnalogIn.value comes from a scripted trace: set_trace(pin, trace) registers
+either a constant raw value or a function trace(t_seconds) -> raw 16-bit
+value, evaluated at time.monotonic() on every read.
+"""
+
+import time
+
+_traces = {}
+
+
+def set_trace(pin, trace):
+    """Drive `pin` with a raw value (0-65535) or with trace(t_seconds) -> raw value."""
+    _traces[pin] = trace
+
+
+def clear_traces():
+    _traces.clear()
+
+
+def sample(pin, t):
+    trace = _traces.get(pin)
+    if trace is None: return 0
+    value = trace(t) if callable(trace) else trace
+    return max(0, min(65535, int(value)))
+
+
+class AnalogIn:
+    def __init__(self, pin):
+        self.pin = pin
+        self.reference_voltage = 3.3
+
+    @property
+    def value(self):
+        return sample(self.pin, time.monotonic())
+
+    def deinit(self):
+        self.pin = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.deinit()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Measure MySystemLog throughput on the simulated SD card under each sync policy.
+
+Every policy logs the same stream: one INFO line every --interval-ms of
+virtual time with a WARN line every --warn-every lines, the way the main
+loop logs state changes. SD latencies are charged on the virtual clock, so
+the cost per line is the time the logging call blocks the main loop.
+'at risk' is the most lines that were written but not yet synced, i.e. lost
+on a power cut at the worst moment.
+
+Usage: python BoardSim/benchmark_system_log.py [--lines N] [--interval-ms MS] [--warn-every N]
+                                               [--write-ms MS] [--sync-ms MS]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, here)
+
+import simulator
+
+simulator.setup()
+
+import Settings
+import sim_fs
+from sim_clock import VirtualClock
+from components import MySystemLog
+
+
+def run_policy(sync, lines=2000, interval_ms=20, warn_every=100, write_ms=0.2, sync_ms=15.0):
+    """Log `lines` lines under one sync policy. Returns a dict of results."""
+    sim_fs.format_card()
+    sim_fs.set_latency(write_ms=write_ms, sync_ms=sync_ms)
+    clock = VirtualClock(cpu_scale=0).install()
+    try:
+        MySystemLog.set_mirror_to_console(False)
+        MySystemLog.set_system_log_level(MySystemLog.INFO)
+        MySystemLog.set_rate_limit(0)  # every line of the stream is written
+        MySystemLog.setup_system_log(quiet=True, sync=sync)
+        sink = MySystemLog._sink
+        syncs0 = sim_fs.counters['syncs']
+        blocked_ms, worst_ms, at_risk = 0.0, 0.0, 0
+        host0 = time.perf_counter()
+        for i in range(lines):
+            t0 = clock.elapsed()
+            if warn_every and i % warn_every == warn_every - 1: MySystemLog.warn(f"[Bench] line {i}")
+            else: MySystemLog.info(f"[Bench] line {i}")
+            MySystemLog.sync_if_due()
+            spent_ms = (clock.elapsed() - t0) * 1000
+            blocked_ms += spent_ms
+            worst_ms = max(worst_ms, spent_ms)
+            at_risk = max(at_risk, sink._unsynced)
+            clock.advance(interval_ms / 1000)
+        host_s = time.perf_counter() - host0
+        syncs = sim_fs.counters['syncs'] - syncs0
+        MySystemLog.teardown()
+    finally:
+        clock.uninstall()
+        sim_fs.set_latency()
+        MySystemLog.set_rate_limit(Settings.system_log_rate_lines)
+    return {'sync': sync, 'lines': lines, 'syncs': syncs, 'ms_per_line': blocked_ms / lines,
+            'worst_ms': worst_ms, 'at_risk': at_risk, 'host_lines_per_s': lines / host_s,
+            'written': sim_fs.read_text('/sd/system.log').count('\n')}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--lines', type=int, default=2000)
+    parser.add_argument('--interval-ms', type=float, default=20.0)
+    parser.add_argument('--warn-every', type=int, default=100)
+    parser.add_argument('--write-ms', type=float, default=0.2)
+    parser.add_argument('--sync-ms', type=float, default=15.0)
+    args = parser.parse_args()
+
+    print(f"{args.lines} lines, one per {args.interval_ms:g} ms, write {args.write_ms:g} ms, sync {args.sync_ms:g} ms")
+    print(f"{'policy':<8} {'syncs':>6} {'ms/line':>8} {'worst ms':>9} {'lines/s':>9} {'at risk':>8} {'host lines/s':>13}")
+    for sync in MySystemLog.SYNC_POLICIES:
+        r = run_policy(sync, args.lines, args.interval_ms, args.warn_every, args.write_ms, args.sync_ms)
+        print(f"{sync:<8} {r['syncs']:>6} {r['ms_per_line']:>8.3f} {r['worst_ms']:>9.2f} "
+              f"{1000 / r['ms_per_line']:>9.0f} {r['at_risk']:>8} {r['host_lines_per_s']:>13.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Measure the compressed transfer encoding on the recorded data folders.
+
+Every licks.dat* and system.log* under ProcessLickData/data is encoded with
+the board's TransferEncoding.RowEncoder, decoded with the Downloader's
+DataUtils.RowDecoder (fed in small pieces, as from the link) and checked
+line for line. Link times are for the HC-05 at --baud (10 bits per byte).
+
+Usage: python BoardSim/benchmark_transfer_encoding.py [--data DIR] [--baud B]
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, here)
+sys.path.insert(0, os.path.join(here, '..', 'BluetoothDownloader'))
+
+import simulator
+
+simulator.setup()
+
+from components.TransferEncoding import RowEncoder
+from library import DataUtils
+
+DATA = os.path.normpath(os.path.join(here, '..', 'ProcessLickData', 'data'))
+
+
+def data_files(folder=DATA):
+    return sorted(glob.glob(os.path.join(folder, '*', 'licks.dat*')) + glob.glob(os.path.join(folder, '*', 'system.log*')))
+
+
+def encode_file(path, piece=61):
+    """Encode and decode one file. Returns a dict of sizes and host times."""
+    with open(path, encoding='utf-8') as f: text = f.read()
+    lines = text.split('\n')
+    if lines[-1] == '': lines.pop()
+    encoder = RowEncoder()
+    t0 = time.perf_counter()
+    data = b''.join(encoder.encode(line) for line in lines) + encoder.end()
+    encode_s = time.perf_counter() - t0
+    decoder = DataUtils.RowDecoder()
+    decoded = []
+    for i in range(0, len(data), piece): decoded += decoder.feed(data[i:i + piece])
+    return {'path': path, 'lines': len(lines), 'raw': len(text.encode('utf-8')), 'encoded': len(data),
+            'intact': decoder.done and decoded == lines, 'encode_us_per_line': encode_s * 1e6 / max(len(lines), 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--data', default=DATA)
+    parser.add_argument('--baud', type=int, default=9600)
+    args = parser.parse_args()
+
+    print(f"{'file':<28} {'lines':>6} {'raw B':>8} {'enc B':>7} {'ratio':>6} {'raw s':>7} {'enc s':>6} {'us/line':>8}")
+    totals = {}
+    for path in data_files(args.data):
+        r = encode_file(path)
+        name = os.path.relpath(path, args.data)
+        assert r['intact'], f"{name}: decoded lines differ"
+        kind = 'licks' if 'licks' in os.path.basename(path) else 'system'
+        raw, encoded = totals.get(kind, (0, 0))
+        totals[kind] = (raw + r['raw'], encoded + r['encoded'])
+        print(f"{name:<28} {r['lines']:>6} {r['raw']:>8} {r['encoded']:>7} {r['raw'] / r['encoded']:>5.1f}x "
+              f"{r['raw'] * 10 / args.baud:>7.1f} {r['encoded'] * 10 / args.baud:>6.1f} {r['encode_us_per_line']:>8.0f}")
+    for kind, (raw, encoded) in totals.items():
+        print(f"{'all ' + kind:<28} {'':>6} {raw:>8} {encoded:>7} {raw / encoded:>5.1f}x "
+              f"{raw * 10 / args.baud:>7.1f} {encoded * 10 / args.baud:>6.1f}")
+
+
+if __name__ == '__main__':
+    main()
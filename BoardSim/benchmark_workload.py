@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Measure bout detection accuracy and throughput on a synthetic workload.
+
+The workload's sensor samples are attributed to cats the way the station does
+(last tag read within cat_timeout_ms) and fed to BoutManager.process_samples
+in runs of one cat. Detected bouts are matched one-to-one to ground-truth
+bouts of the same cat that overlap in time.
+
+Usage: python BoardSim/benchmark_workload.py [--cats N] [--hours H] [--rate HZ] [--seed S]
+                                             [--dropout P] [--noise V] [--glitch-rate HZ]
+                                             [--licks-dat PATH] [--ground-truth PATH]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, '..', 'BoardCode', 'lib'))
+sys.path.insert(0, here)
+
+import Settings
+from BoutDetection import BoutManager, EVENT_BOUT
+from workload import Workload
+
+
+def detect(workload, rate_hz):
+    """Run the detector over the workload. Returns (bouts, samples, seconds)."""
+    timestamps, states, water = workload.samples(rate_hz)
+    codes, names = workload.active_cats(timestamps)
+    manager = BoutManager(list(names), min_lick_ms=Settings.min_lick_ms, max_lick_ms=Settings.max_lick_ms,
+                          min_licks_per_bout=Settings.min_licks_per_bout,
+                          max_bout_gap_ms=workload.max_bout_gap_ms)
+    # Plain lists: the board code indexes sample by sample
+    timestamps_l, states_l, water_l = timestamps.tolist(), states.tolist(), water.tolist()
+    switches = [0] + [i for i in range(1, len(codes)) if codes[i] != codes[i - 1]] if len(codes) else []
+    switches = [int(i) for i in switches] + [len(codes)]
+
+    bouts = []
+    start = time.perf_counter()
+    for a, b in zip(switches[:-1], switches[1:]):
+        cat = names[codes[a]]
+        if a > 0:  # cat switch: the station ends the previous cat's bout
+            previous = manager.trackers[names[codes[a - 1]]]
+            count = previous.bout_count
+            previous.end_bout(timestamps_l[a], water_level=water_l[a])
+            if previous.bout_count > count and previous.last_bout_summary is not None:
+                bouts.append(previous.last_bout_summary)
+        for _, kind, _, summary in manager.process_samples(states_l[a:b], timestamps_l[a:b], water_l[a:b], cat_name=cat):
+            if kind == EVENT_BOUT and summary is not None: bouts.append(summary)
+    seconds = time.perf_counter() - start
+    return bouts, len(timestamps_l), seconds
+
+
+def score(workload, detected):
+    """Match detected to true bouts (same cat, overlapping). Returns a dict of metrics."""
+    t0 = workload.t0_ms
+    truth = sorted(workload.bouts, key=lambda b: b['start_ms'])
+    used = set()
+    matched, lick_errors, wrong_cat = 0, [], 0
+    for d in sorted(detected, key=lambda b: b['start_time']):
+        best = None
+        for j, t in enumerate(truth):
+            if j in used: continue
+            if t['start_ms'] + t0 > d['end_time']: break
+            if t['end_ms'] + t0 < d['start_time']: continue
+            if t['cat_name'] != d['cat_name']:
+                wrong_cat += 1
+                continue
+            best = j
+            break
+        if best is None: continue
+        used.add(best)
+        matched += 1
+        lick_errors.append(abs(d['lick_count'] - truth[best]['lick_count']))
+    return {
+        'true': len(truth), 'detected': len(detected), 'matched': matched,
+        'recall': matched / len(truth) if truth else 1.0,
+        'precision': matched / len(detected) if detected else 1.0,
+        'lick_mae': sum(lick_errors) / len(lick_errors) if lick_errors else 0.0,
+        'exact_licks': sum(1 for e in lick_errors if e == 0),
+        'wrong_cat_overlaps': wrong_cat,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--cats', type=int, default=3)
+    parser.add_argument('--hours', type=float, default=1.0)
+    parser.add_argument('--rate', type=float, default=1000.0, help="sensor sample rate (Hz)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--dropout', type=float, default=0.1, help="tag frame loss probability")
+    parser.add_argument('--noise', type=float, default=0.05, help="contact noise (V)")
+    parser.add_argument('--glitch-rate', type=float, default=0.01, help="spurious short contacts (Hz)")
+    parser.add_argument('--licks-dat', help="also write the ground truth as licks.dat")
+    parser.add_argument('--ground-truth', help="also write ground-truth bouts as CSV")
+    args = parser.parse_args()
+
+    workload = Workload.generate(args.cats, args.hours * 3600, seed=args.seed, tag_dropout=args.dropout,
+                                 contact_noise_v=args.noise, glitch_rate_hz=args.glitch_rate,
+                                 max_bout_gap_ms=Settings.max_bout_gap_ms,
+                                 cat_timeout_ms=Settings.cat_timeout_ms)
+    print(workload.describe())
+    if args.licks_dat: workload.write_licks_dat(args.licks_dat)
+    if args.ground_truth: workload.write_ground_truth(args.ground_truth)
+
+    bouts, n, seconds = detect(workload, args.rate)
+    m = score(workload, bouts)
+    print(f"Throughput: {n} samples in {seconds:.2f} s = {n / seconds / 1e6:.2f} M samples/s "
+          f"({n / seconds / args.rate:.0f}x real time at {args.rate:.0f} Hz)")
+    print(f"Bouts: {m['true']} true, {m['detected']} detected, {m['matched']} matched "
+          f"(recall {m['recall']:.3f}, precision {m['precision']:.3f})")
+    print(f"Licks per matched bout: {m['exact_licks']}/{m['matched']} exact, MAE {m['lick_mae']:.2f}")
+    if m['wrong_cat_overlaps']: print(f"Detected bouts overlapping another cat's bout: {m['wrong_cat_overlaps']}")
+    return m
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""Host-side stand-in for CircuitPython's `board` module (Feather RP2040 pin names)."""
+
+
+class Pin:
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return f"board.{self.name}"
+
+
+A0, A1, A2, A3 = Pin("A0"), Pin("A1"), Pin("A2"), Pin("A3")
+D4, D5, D6, D9, D10 = Pin("D4"), Pin("D5"), Pin("D6"), Pin("D9"), Pin("D10")
+D11, D12, D13, D24, D25 = Pin("D11"), Pin("D12"), Pin("D13"), Pin("D24"), Pin("D25")
+TX, RX = Pin("TX"), Pin("RX")
+SCL, SDA = Pin("SCL"), Pin("SDA")
+SCK, MOSI, MISO = Pin("SCK"), Pin("MOSI"), Pin("MISO")
+NEOPIXEL = Pin("NEOPIXEL")
+LED = D13
+
+_i2c = None
+_spi = None
+
+
+def I2C():
+    global _i2c
+    if _i2c is None:
+        import busio
+        _i2c = busio.I2C(SCL, SDA)
+    return _i2c
+
+
+def SPI():
+    global _spi
+    if _spi is None:
+        import busio
+        _spi = busio.SPI(SCK, MOSI, MISO)
+    return _spi
@@ -0,0 +1,197 @@
+"""
+Host-side stand-in for CircuitPython's `busio` module.
+
+UARTs are connected to virtual serial lines, one per pin (serial_line(pin)):
+
+- bytes scheduled on a UART's RX line become readable once time.monotonic()
+  reaches their arrival time (line.send(data, at=t));
+- bytes the board writes on a UART's TX line are collected in line.received.
+  write() sleeps for the time the bytes take on the wire at the baud rate.
+
+I2C and SPI accept every transaction; I2C writes are kept per address.
+"""
+
+import time
+
+
+class SerialLine:
+    def __init__(self, pin):
+        self.pin = pin
+        self._pending = []          # (arrival time, bytes), in arrival order
+        self._ready = bytearray()   # arrived, not yet read by the board
+        self.received = bytearray() # written by the board
+
+    # --- host side ---
+    def send(self, data, at=None):
+        """Deliver bytes to the board at time `at` (default: now)."""
+        if isinstance(data, str): data = data.encode('utf-8')
+        t = time.monotonic() if at is None else at
+        pending = self._pending
+        i = len(pending)
+        while i > 0 and pending[i - 1][0] > t: i -= 1
+        pending.insert(i, (t, bytes(data)))
+
+    def take(self):
+        """Return and clear everything the board wrote so far."""
+        data = bytes(self.received)
+        self.received.clear()
+        return data
+
+    def clear(self):
+        self._pending.clear()
+        self._ready.clear()
+        self.received.clear()
+
+    # --- board side ---
+    def _arrive(self):
+        pending = self._pending
+        if not pending: return
+        now = time.monotonic()
+        n = 0
+        while n < len(pending) and pending[n][0] <= now:
+            self._ready.extend(pending[n][1])
+            n += 1
+        if n: del pending[:n]
+
+
+_lines = {}
+
+
+def serial_line(pin):
+    line = _lines.get(pin)
+    if line is None: line = _lines[pin] = SerialLine(pin)
+    return line
+
+
+def reset_lines():
+    _lines.clear()
+
+
+class UART:
+    def __init__(self, tx=None, rx=None, *, baudrate=9600, bits=8, parity=None, stop=1,
+                 timeout=1, receiver_buffer_size=64):
+        self.tx = tx
+        self.rx = rx
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.receiver_buffer_size = receiver_buffer_size
+        self._rx_line = serial_line(rx) if rx is not None else None
+        self._tx_line = serial_line(tx) if tx is not None else None
+
+    @property
+    def in_waiting(self):
+        if self._rx_line is None: return 0
+        self._rx_line._arrive()
+        return len(self._rx_line._ready)
+
+    def read(self, nbytes=None):
+        if not self.in_waiting: return None
+        ready = self._rx_line._ready
+        n = len(ready) if nbytes is None else min(nbytes, len(ready))
+        data = bytes(ready[:n])
+        del ready[:n]
+        return data
+
+    def readinto(self, buf):
+        data = self.read(len(buf))
+        if not data: return None
+        buf[:len(data)] = data
+        return len(data)
+
+    def readline(self):
+        if not self.in_waiting: return None
+        ready = self._rx_line._ready
+        i = ready.find(b'\n')
+        n = len(ready) if i < 0 else i + 1
+        data = bytes(ready[:n])
+        del ready[:n]
+        return data
+
+    def write(self, buf):
+        if self._tx_line is None: return None
+        self._tx_line.received.extend(buf)
+        time.sleep(len(buf) * 10 / self.baudrate)  # 8N1: 10 bits per byte
+        return len(buf)
+
+    def reset_input_buffer(self):
+        if self._rx_line is not None: self._rx_line._ready.clear()
+
+    def deinit(self):
+        self._rx_line = self._tx_line = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.deinit()
+
+
+class I2C:
+    def __init__(self, scl, sda, *, frequency=100000, timeout=255):
+        self.scl = scl
+        self.sda = sda
+        self.frequency = frequency
+        self.writes = {}   # address -> number of write transactions
+        self._locked = False
+
+    def try_lock(self):
+        if self._locked: return False
+        self._locked = True
+        return True
+
+    def unlock(self):
+        self._locked = False
+
+    def scan(self):
+        return sorted(self.writes)
+
+    def writeto(self, address, buffer, *, start=0, end=None):
+        self.writes[address] = self.writes.get(address, 0) + 1
+
+    def readfrom_into(self, address, buffer, *, start=0, end=None):
+        end = len(buffer) if end is None else end
+        for i in range(start, end): buffer[i] = 0
+
+    def writeto_then_readfrom(self, address, out_buffer, in_buffer, *, out_start=0, out_end=None,
+                              in_start=0, in_end=None):
+        self.writeto(address, out_buffer, start=out_start, end=out_end)
+        self.readfrom_into(address, in_buffer, start=in_start, end=in_end)
+
+    def deinit(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.deinit()
+
+
+class SPI:
+    def __init__(self, clock, MOSI=None, MISO=None, half_duplex=False):
+        self.clock = clock
+        self._locked = False
+
+    def try_lock(self):
+        if self._locked: return False
+        self._locked = True
+        return True
+
+    def unlock(self):
+        self._locked = False
+
+    def configure(self, *, baudrate=100000, polarity=0, phase=0, bits=8):
+        pass
+
+    def write(self, buffer, *, start=0, end=None):
+        pass
+
+    def readinto(self, buffer, *, start=0, end=None, write_value=0):
+        end = len(buffer) if end is None else end
+        for i in range(start, end): buffer[i] = write_value
+
+    def write_readinto(self, out_buffer, in_buffer, *, out_start=0, out_end=None, in_start=0, in_end=None):
+        self.readinto(in_buffer, start=in_start, end=in_end)
+
+    def deinit(self):
+        pass
@@ -0,0 +1,82 @@
+"""
+Host-side stand-in for CircuitPython's `digitalio` module.
+
+Output levels are recorded per pin with their time.monotonic() timestamp
+(transitions(pin)); input levels come from set_input(pin, value), where value
+is a bool or a function value(t_seconds) -> bool.
+"""
+
+import time
+
+
+class Direction:
+    INPUT = 'input'
+    OUTPUT = 'output'
+
+
+class Pull:
+    UP = 'up'
+    DOWN = 'down'
+
+
+class DriveMode:
+    PUSH_PULL = 'push_pull'
+    OPEN_DRAIN = 'open_drain'
+
+
+_inputs = {}
+_transitions = {}
+
+
+def set_input(pin, value):
+    _inputs[pin] = value
+
+
+def transitions(pin):
+    """List of (t_seconds, level) for every change written to an output pin."""
+    return _transitions.get(pin, [])
+
+
+def reset():
+    _inputs.clear()
+    _transitions.clear()
+
+
+class DigitalInOut:
+    def __init__(self, pin):
+        self.pin = pin
+        self.direction = Direction.INPUT
+        self.pull = None
+        self.drive_mode = DriveMode.PUSH_PULL
+        self._value = False
+
+    def switch_to_output(self, value=False, drive_mode=DriveMode.PUSH_PULL):
+        self.direction = Direction.OUTPUT
+        self.drive_mode = drive_mode
+        self.value = value
+
+    def switch_to_input(self, pull=None):
+        self.direction = Direction.INPUT
+        self.pull = pull
+
+    @property
+    def value(self):
+        if self.direction == Direction.OUTPUT: return self._value
+        level = _inputs.get(self.pin, self.pull == Pull.UP)
+        return bool(level(time.monotonic()) if callable(level) else level)
+
+    @value.setter
+    def value(self, level):
+        level = bool(level)
+        if level != self._value or self.pin not in _transitions:
+            _transitions.setdefault(self.pin, []).append((time.monotonic(), level))
+        self._value = level
+
+    def deinit(self):
+        self.pin = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.deinit()
@@ -0,0 +1,5 @@
+"""Host-side stand-in for the `micropython` module."""
+
+
+def const(value):
+    return value
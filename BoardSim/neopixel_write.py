@@ -0,0 +1,7 @@
+"""Host-side stand-in for CircuitPython's `neopixel_write` module."""
+
+last = {}  # pin -> last bytes written
+
+
+def neopixel_write(pin, buf):
+    last[pin] = bytes(buf)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+A stand-in board on a pseudo-terminal for testing the BluetoothDownloader.
+
+The board's own MyBT and BlockSender serve host files over the pty's master
+side; the Downloader opens the slave side like the HC-05's serial port. The
+link can lose or corrupt bytes on purpose (corrupt_every, mute()).
+
+Usage: python BoardSim/pty_board.py LICKS_FILE [SYSTEM_FILE] [--baud B]
+       then point the Downloader (use_serial = True) at the printed port.
+"""
+
+import array
+import fcntl
+import os
+import sys
+import termios
+import threading
+import time
+import tty
+
+here = os.path.dirname(os.path.abspath(__file__))
+for path in (os.path.normpath(os.path.join(here, '..', 'BoardCode', 'lib')), here):  # fakes first, as simulator.setup()
+    if path in sys.path: sys.path.remove(path)
+    sys.path.insert(0, path)
+
+from components.MyBT import MyBT, BlockSender, segments_message
+from components.RotationManifest import RotationManifest
+
+
+class PtyUART:
+    """UART-like object (write/read/in_waiting) on the master side of a pty."""
+
+    def __init__(self, fd):
+        self.fd = fd
+        self.corrupt_every = 0   # flip a byte in every Nth write
+        self.writes = 0
+        self.bytes_written = 0
+        self._mute_after = None  # drop written bytes from this byte count on...
+        self._mute_until = 0.0   # ...until this time
+        self._mute_s = 0.0
+
+    def mute(self, after_bytes, seconds):
+        """Drop everything written for `seconds` once after_bytes more bytes went out (a dropout)."""
+        self._mute_after = self.bytes_written + after_bytes
+        self._mute_s = seconds
+
+    def write(self, buf):
+        data = bytearray(buf)
+        self.writes += 1
+        self.bytes_written += len(data)
+        if self._mute_after is not None and self.bytes_written >= self._mute_after:
+            self._mute_until = time.monotonic() + self._mute_s
+            self._mute_after = None
+        if time.monotonic() < self._mute_until: return len(data)
+        if self.corrupt_every and self.writes % self.corrupt_every == 0 and data:
+            data[len(data) // 2] ^= 0x55
+        view = memoryview(data)
+        while view:
+            n = os.write(self.fd, view)
+            view = view[n:]
+        return len(data)
+
+    @property
+    def in_waiting(self):
+        n = array.array('i', [0])
+        fcntl.ioctl(self.fd, termios.FIONREAD, n)
+        return n[0]
+
+    def read(self, nbytes=None):
+        n = self.in_waiting
+        if not n: return None
+        return os.read(self.fd, n if nbytes is None else min(n, nbytes))
+
+
+class PtyBoard:
+    """Answers 'get' and 'segments' requests for the files in `files` ({kind: path}), as MainLoop does."""
+
+    def __init__(self, files, baudrate=115200, **sender_options):
+        self.files = files
+        self.sender_options = sender_options
+        master, slave = os.openpty()
+        tty.setraw(slave)
+        self.port = os.ttyname(slave)
+        self._slave = slave
+        self.uart = PtyUART(master)
+        self.bt = MyBT(baudrate=baudrate, uart=self.uart)
+        self.transfers = []      # finished BlockSenders
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+        return self.port
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None: self._thread.join(2)
+        os.close(self.uart.fd)
+        os.close(self._slave)
+
+    def wait_transfers(self, count, timeout=2.0):
+        """Wait until `count` transfers have finished (the host may be done before the board)."""
+        end = time.monotonic() + timeout
+        while len(self.transfers) < count and time.monotonic() < end: time.sleep(0.005)
+        return self.transfers
+
+    def _serve(self):
+        while self._running:
+            message = self.bt.poll()
+            if not message or not message.startswith(('get,', 'segments,')):
+                time.sleep(0.002)
+                continue
+            parts = message.split(',')
+            path = self.files.get(parts[1])
+            if path is None: continue
+            if parts[0] == 'segments':
+                since = int(parts[2]) if len(parts) > 2 else 1
+                self.bt.send(segments_message(parts[1], RotationManifest(path).segments(since)))
+                continue
+            offset = int(parts[2]) if len(parts) > 2 else 0
+            name = None
+            if len(parts) > 3:
+                path = RotationManifest(path).segment_path(int(parts[3]))
+                name = f"{self.files[parts[1]].rsplit('/', 1)[-1]}.{parts[3]}"
+            sender = BlockSender(self.bt, path, offset, name=name, **self.sender_options)
+            while self._running and sender.step(): pass
+            sender.close()
+            self.transfers.append(sender)
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('licks')
+    parser.add_argument('system', nargs='?')
+    parser.add_argument('--baud', type=int, default=9600)
+    args = parser.parse_args()
+    files = {'licks': args.licks}
+    if args.system: files['system'] = args.system
+    board = PtyBoard(files, baudrate=args.baud)
+    print(f"Stand-in board on {board.start()} (Ctrl-C to stop)")
+    try:
+        while True: time.sleep(1)
+    except KeyboardInterrupt:
+        board.stop()
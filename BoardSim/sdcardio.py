@@ -0,0 +1,18 @@
+"""Host-side stand-in for CircuitPython's `sdcardio`: the card is `sim_fs`'s in-memory card."""
+
+import sim_fs
+
+sim_fs.install()
+
+
+class SDCard:
+    def __init__(self, bus, cs, baudrate=8000000):
+        self.bus = bus
+        self.cs = cs
+        self.baudrate = baudrate
+
+    def count(self):
+        return 1 << 21  # 1 GB in 512-byte blocks
+
+    def deinit(self):
+        pass
@@ -0,0 +1,113 @@
+"""
+Virtual clock for running board code on the host.
+
+install() replaces time.monotonic, time.monotonic_ns, time.time and
+time.sleep. Virtual time advances in two ways:
+
+- sleep(s) adds s instantly, so waits and paced writes cost no wall time;
+- running code advances time by the host time it took, times `cpu_scale`
+  (e.g. 20 to approximate a RP2040 that is ~20x slower than the desktop),
+  or by a fixed `step_us` per clock read for deterministic runs.
+
+With `stop_after_s` set, every clock read past that point raises
+SimulationStop, which ends an otherwise endless main loop.
+"""
+
+import time
+
+_real_monotonic = time.monotonic
+_real_monotonic_ns = time.monotonic_ns
+_real_time = time.time
+_real_sleep = time.sleep
+_real_perf_counter = time.perf_counter
+
+
+class SimulationStop(BaseException):
+    """Raised by the clock once the simulated run time is over."""
+
+
+class VirtualClock:
+    def __init__(self, start_s=1000.0, epoch=None, cpu_scale=1.0, step_us=None, stop_after_s=None):
+        """
+        :param start_s: Value of time.monotonic() at install()
+        :param epoch: Wall time (time.time()) at install(); defaults to the host time
+        :param cpu_scale: Virtual seconds per host second of running code
+        :param step_us: If set, advance this much per clock read instead of using host time
+        :param stop_after_s: Raise SimulationStop once this many virtual seconds have passed
+        """
+        self.start_s = float(start_s)
+        self.epoch = _real_time() if epoch is None else float(epoch)
+        self.cpu_scale = float(cpu_scale)
+        self.step_us = step_us
+        self.stop_after_s = stop_after_s
+        self.slept_s = 0.0
+        self.reads = 0
+        self._steps_s = 0.0
+        self._real_start = _real_perf_counter()
+        self._real_stop = None  # host time at uninstall(); freezes the clock
+        self._installed = False
+
+    # --- time base ---
+    def elapsed(self):
+        """Virtual seconds since install()."""
+        if self.step_us is None:
+            busy = self.real_elapsed() * self.cpu_scale
+        else:
+            busy = self._steps_s
+        return busy + self.slept_s
+
+    def _read(self):
+        self.reads += 1
+        if self.step_us is not None:
+            self._steps_s += self.step_us / 1e6
+        elapsed = self.elapsed()
+        if self.stop_after_s is not None and elapsed >= self.stop_after_s:
+            raise SimulationStop(f"simulated {elapsed:.3f} s")
+        return elapsed
+
+    def monotonic(self):
+        return self.start_s + self._read()
+
+    def monotonic_ns(self):
+        return int((self.start_s + self._read()) * 1e9)
+
+    def time(self):
+        return self.epoch + self._read()
+
+    def sleep(self, seconds):
+        if seconds > 0: self.slept_s += seconds
+
+    def advance(self, seconds):
+        """Move virtual time forward without running code (same as sleep)."""
+        self.sleep(seconds)
+
+    def real_elapsed(self):
+        """Host seconds since install() (until uninstall())."""
+        end = _real_perf_counter() if self._real_stop is None else self._real_stop
+        return end - self._real_start
+
+    # --- patching ---
+    def install(self):
+        self._real_start = _real_perf_counter()
+        self._real_stop = None
+        time.monotonic = self.monotonic
+        time.monotonic_ns = self.monotonic_ns
+        time.time = self.time
+        time.sleep = self.sleep
+        self._installed = True
+        return self
+
+    def uninstall(self):
+        if not self._installed: return
+        self._real_stop = _real_perf_counter()
+        time.monotonic = _real_monotonic
+        time.monotonic_ns = _real_monotonic_ns
+        time.time = _real_time
+        time.sleep = _real_sleep
+        self._installed = False
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, *args):
+        self.uninstall()
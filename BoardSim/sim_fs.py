@@ -0,0 +1,292 @@
+"""
+In-memory SD card and CIRCUITPY view for board code running on the host.
+
+install() wraps builtins.open and the os calls the board code uses (stat,
+mkdir, listdir, remove, rename, sync). Absolute paths under /sd live in
+memory; paths under /lib are served read-only from BoardCode/lib, like the
+CIRCUITPY drive. Every other path goes to the host untouched.
+
+Optional latencies (set_latency) are charged through time.sleep, so with the
+virtual clock installed they advance virtual time the way a real card would.
+"""
+
+import builtins
+import errno
+import io
+import os
+
+here = os.path.dirname(os.path.abspath(__file__))
+circuitpy_root = os.path.normpath(os.path.join(here, '..', 'BoardCode'))
+
+SD_ROOT = '/sd'
+FLASH_ROOTS = ('/lib',)
+
+_real = {
+    'open': builtins.open,
+    'stat': os.stat,
+    'mkdir': os.mkdir,
+    'listdir': os.listdir,
+    'remove': os.remove,
+    'rename': os.rename,
+    'sync': getattr(os, 'sync', None),
+}
+
+_files = {}          # path -> bytearray
+_dirs = set()        # directories on the card
+_installed = False
+
+counters = {'opens': 0, 'writes': 0, 'bytes_written': 0, 'syncs': 0}
+latency = {'open_ms': 0.0, 'write_ms': 0.0, 'per_kb_ms': 0.0, 'sync_ms': 0.0}
+failing = {'writes': False}
+
+
+# ---------------------------------------------------------------------
+# Card contents
+# ---------------------------------------------------------------------
+def format_card():
+    """Erase the card (keeps the /sd root)."""
+    _files.clear()
+    _dirs.clear()
+    _dirs.add(SD_ROOT)
+    for k in counters: counters[k] = 0
+
+
+def set_latency(open_ms=0.0, write_ms=0.0, per_kb_ms=0.0, sync_ms=0.0):
+    """Cost charged per open, per block write (+ per KB) and per os.sync()."""
+    latency.update(open_ms=open_ms, write_ms=write_ms, per_kb_ms=per_kb_ms, sync_ms=sync_ms)
+
+
+def set_failing(writes=False):
+    """Make every write to the card raise EIO (a card that died or was pulled)."""
+    failing.update(writes=writes)
+
+
+def list_files():
+    return sorted(_files)
+
+
+def read_bytes(path):
+    return bytes(_files[_norm(path)])
+
+
+def read_text(path):
+    return read_bytes(path).decode('utf-8')
+
+
+def write_bytes(path, data):
+    """Place a file on the card (creates parent folders)."""
+    path = _norm(path)
+    parent = _parent(path)
+    while parent not in _dirs and parent != '/':
+        _dirs.add(parent)
+        parent = _parent(parent)
+    _files[path] = bytearray(data)
+
+
+def dump(dest_dir):
+    """Copy the card contents to a host folder."""
+    for path, data in _files.items():
+        target = os.path.join(dest_dir, path[len(SD_ROOT) + 1:])
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with _real['open'](target, 'wb') as f: f.write(data)
+
+
+# ---------------------------------------------------------------------
+# Path helpers
+# ---------------------------------------------------------------------
+def _norm(path):
+    p = os.fspath(path).replace('\\', '/')
+    while '//' in p: p = p.replace('//', '/')
+    return p.rstrip('/') or '/'
+
+
+def _under(path, root):
+    return path == root or path.startswith(root + '/')
+
+
+def _kind(path):
+    """'sd', 'flash' or None (host path)."""
+    if not isinstance(path, str) or not path.startswith('/'): return None
+    p = _norm(path)
+    if _under(p, SD_ROOT): return 'sd'
+    for root in FLASH_ROOTS:
+        if _under(p, root): return 'flash'
+    return None
+
+
+def _parent(path):
+    return path.rsplit('/', 1)[0] or '/'
+
+
+def _host(path):
+    return os.path.join(circuitpy_root, _norm(path).lstrip('/'))
+
+
+def _oserror(code, path):
+    return OSError(code, os.strerror(code), path)
+
+
+def _charge(ms):
+    if ms > 0:
+        import time
+        time.sleep(ms / 1000)
+
+
+# ---------------------------------------------------------------------
+# Files
+# ---------------------------------------------------------------------
+class _MemRaw(io.RawIOBase):
+    def __init__(self, data, readable, writable, append):
+        self._data = data
+        self._pos = 0
+        self._readable = readable
+        self._writable = writable
+        self._append = append
+
+    def readable(self): return self._readable
+    def writable(self): return self._writable
+    def seekable(self): return True
+
+    def readinto(self, b):
+        data = self._data
+        n = max(0, min(len(b), len(data) - self._pos))
+        b[:n] = data[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def write(self, b):
+        if failing['writes']: raise _oserror(errno.EIO, 'write')
+        if self._append: self._pos = len(self._data)
+        n = len(b)
+        self._data[self._pos:self._pos + n] = b
+        self._pos += n
+        counters['writes'] += 1
+        counters['bytes_written'] += n
+        _charge(latency['write_ms'] + latency['per_kb_ms'] * n / 1024)
+        return n
+
+    def seek(self, offset, whence=0):
+        if whence == 1: offset += self._pos
+        elif whence == 2: offset += len(self._data)
+        self._pos = max(0, offset)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+
+def _open(file, mode='r', buffering=-1, encoding=None, errors=None, newline=None, closefd=True, opener=None):
+    kind = _kind(file)
+    if kind is None:
+        return _real['open'](file, mode, buffering, encoding, errors, newline, closefd, opener)
+    writing = any(c in mode for c in 'wax+')
+    if kind == 'flash':
+        if writing: raise _oserror(errno.EROFS, file)
+        return _real['open'](_host(file), mode, buffering, encoding, errors, newline)
+
+    path = _norm(file)
+    if path in _dirs: raise _oserror(errno.EISDIR, file)
+    if _parent(path) not in _dirs: raise _oserror(errno.ENOENT, file)
+    data = _files.get(path)
+    if data is None:
+        if not writing: raise _oserror(errno.ENOENT, file)
+        data = _files[path] = bytearray()
+    elif 'w' in mode:
+        del data[:]
+    counters['opens'] += 1
+    _charge(latency['open_ms'])
+
+    readable = 'r' in mode or '+' in mode
+    raw = _MemRaw(data, readable, writing, 'a' in mode)
+    if readable and writing: buf = io.BufferedRandom(raw)
+    elif writing: buf = io.BufferedWriter(raw)
+    else: buf = io.BufferedReader(raw)
+    if 'b' in mode: return buf
+    return io.TextIOWrapper(buf, encoding=encoding or 'utf-8', errors=errors, newline=newline)
+
+
+# ---------------------------------------------------------------------
+# os calls
+# ---------------------------------------------------------------------
+def _stat(path, *args, **kwargs):
+    kind = _kind(path)
+    if kind is None: return _real['stat'](path, *args, **kwargs)
+    if kind == 'flash': return _real['stat'](_host(path))
+    p = _norm(path)
+    if p in _dirs: return os.stat_result((0o040777, 0, 0, 0, 0, 0, 0, 0, 0, 0))
+    if p in _files: return os.stat_result((0o100666, 0, 0, 0, 0, 0, len(_files[p]), 0, 0, 0))
+    raise _oserror(errno.ENOENT, path)
+
+
+def _mkdir(path, *args, **kwargs):
+    kind = _kind(path)
+    if kind is None: return _real['mkdir'](path, *args, **kwargs)
+    if kind == 'flash': raise _oserror(errno.EROFS, path)
+    p = _norm(path)
+    if p in _dirs or p in _files: raise _oserror(errno.EEXIST, path)
+    if _parent(p) not in _dirs and _parent(p) != '/': raise _oserror(errno.ENOENT, path)
+    _dirs.add(p)
+
+
+def _listdir(path='.'):
+    kind = _kind(path)
+    if kind is None: return _real['listdir'](path)
+    if kind == 'flash': return _real['listdir'](_host(path))
+    p = _norm(path)
+    if p not in _dirs: raise _oserror(errno.ENOENT, path)
+    names = [q.rsplit('/', 1)[1] for q in list(_files) + list(_dirs) if q != p and _parent(q) == p]
+    return sorted(names)
+
+
+def _remove(path):
+    kind = _kind(path)
+    if kind is None: return _real['remove'](path)
+    if kind == 'flash': raise _oserror(errno.EROFS, path)
+    p = _norm(path)
+    if p not in _files: raise _oserror(errno.ENOENT, path)
+    del _files[p]
+
+
+def _rename(src, dst):
+    ks, kd = _kind(src), _kind(dst)
+    if ks is None and kd is None: return _real['rename'](src, dst)
+    if ks != 'sd' or kd != 'sd': raise _oserror(errno.EXDEV, src)
+    s, d = _norm(src), _norm(dst)
+    if s not in _files: raise _oserror(errno.ENOENT, src)
+    if _parent(d) not in _dirs: raise _oserror(errno.ENOENT, dst)
+    _files[d] = _files.pop(s)
+
+
+def _sync():
+    counters['syncs'] += 1
+    _charge(latency['sync_ms'])
+
+
+# ---------------------------------------------------------------------
+# Install
+# ---------------------------------------------------------------------
+def install():
+    """Route board paths through the simulated card. Safe to call twice."""
+    global _installed
+    if _installed: return
+    if not _dirs: format_card()
+    builtins.open = _open
+    os.stat = _stat
+    os.mkdir = _mkdir
+    os.listdir = _listdir
+    os.remove = _remove
+    os.rename = _rename
+    os.sync = _sync
+    _installed = True
+
+
+def uninstall():
+    global _installed
+    builtins.open = _real['open']
+    os.stat = _real['stat']
+    os.mkdir = _real['mkdir']
+    os.listdir = _real['listdir']
+    os.remove = _real['remove']
+    os.rename = _real['rename']
+    if _real['sync'] is not None: os.sync = _real['sync']
+    _installed = False
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Run the unmodified board stack (MainLoop.main_loop) on the host.
+
+setup() puts the fake CircuitPython modules first on sys.path, followed by
+BoardCode/lib and BoardCode, and formats the in-memory SD card.
+run_main_loop() then runs the main loop on the virtual clock until the
+requested number of virtual seconds has passed.
+
+Usage: python BoardSim/simulator.py [seconds] [--cpu-scale X] [--buffered] [--console]
+"""
+
+import os
+import sys
+
+here = os.path.dirname(os.path.abspath(__file__))
+board_code = os.path.normpath(os.path.join(here, '..', 'BoardCode'))
+
+# Idle inputs: lick contact open (3.0 V), water sensor at mid scale (1.5 V)
+IDLE_LICK_RAW = int(3.0 / 3.3 * 65535)
+IDLE_WATER_RAW = int(1.5 / 3.3 * 65535)
+
+
+def setup():
+    """Make the fake hardware modules importable and start from an empty card."""
+    for path in (board_code, os.path.join(board_code, 'lib'), here):
+        if path in sys.path: sys.path.remove(path)
+        sys.path.insert(0, path)
+    import sim_fs
+    sim_fs.install()
+    sim_fs.format_card()
+
+
+def run_main_loop(seconds, cpu_scale=20.0, step_us=None, settings=None, console=False, level=None, before_start=None):
+    """
+    Run MainLoop.main_loop for `seconds` of virtual time.
+
+    :param cpu_scale: Virtual seconds per host second of running code
+    :param step_us: Deterministic mode: advance this much per clock read instead
+    :param settings: Dict of Settings overrides applied before the loop starts
+    :param console: Mirror the system log to the console
+    :param level: Log level (default INFO)
+    :param before_start: Called with the installed clock, e.g. to schedule inputs
+    :return: The VirtualClock (elapsed(), real_elapsed(), ...)
+    """
+    setup()
+    import analogio, board
+    import Settings
+    from sim_clock import VirtualClock, SimulationStop
+    from components import MySystemLog
+    from components.MyStore import flush_all as flush_stores
+
+    for key, value in (settings or {}).items(): setattr(Settings, key, value)
+    analogio.set_trace(board.A0, IDLE_WATER_RAW)
+    analogio.set_trace(board.A1, IDLE_LICK_RAW)
+    MySystemLog.set_mirror_to_console(console)
+    import MainLoop  # host-side imports (pandas in BoutDetection) stay off the virtual clock
+
+    clock = VirtualClock(cpu_scale=cpu_scale, step_us=step_us, stop_after_s=seconds).install()
+    try:
+        if before_start is not None: before_start(clock)
+        MainLoop.main_loop(level=MySystemLog.INFO if level is None else level)
+    except SimulationStop:
+        pass
+    finally:
+        clock.uninstall()
+        MySystemLog.flush()
+        flush_stores()  # orderly stop: rows still buffered in RAM reach the card
+    return clock
+
+
+def summary(clock):
+    import Settings
+    import sim_fs
+    lines = []
+    virtual_s, real_s = clock.elapsed(), clock.real_elapsed()
+    lines.append(f"virtual {virtual_s:.1f} s in {real_s:.2f} s host time ({virtual_s / real_s:.1f}x)")
+    for name in (Settings.lick_data_filename, Settings.system_log_filename):
+        path = '/sd/' + name
+        if path in sim_fs.list_files():
+            text = sim_fs.read_text(path)
+            lines.append(f"{name}: {text.count(chr(10))} lines, {len(text)} bytes")
+    c = sim_fs.counters
+    lines.append(f"SD: {c['opens']} opens, {c['writes']} writes, {c['bytes_written']} bytes, {c['syncs']} syncs")
+    return lines
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('seconds', nargs='?', type=float, default=60.0)
+    parser.add_argument('--cpu-scale', type=float, default=20.0)
+    parser.add_argument('--step-us', type=float, default=None)
+    parser.add_argument('--buffered', action='store_true', help="use buffered lick acquisition")
+    parser.add_argument('--console', action='store_true', help="mirror the system log to the console")
+    args = parser.parse_args()
+
+    overrides = {'lick_acquisition': 'buffered'} if args.buffered else {}
+    clock = run_main_loop(args.seconds, cpu_scale=args.cpu_scale, step_us=args.step_us,
+                          settings=overrides, console=args.console)
+    for line in summary(clock): print(line)
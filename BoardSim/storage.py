@@ -0,0 +1,37 @@
+"""
+Host-side stand-in for CircuitPython's `storage` module.
+
+Mounting the card from the fake `sdcardio` exposes the in-memory card of
+`sim_fs` at the mount point.
+"""
+
+import sim_fs
+
+sim_fs.install()
+
+_mounts = {}  # mount point -> VfsFat
+
+
+class VfsFat:
+    def __init__(self, block_device):
+        self.block_device = block_device
+
+
+def mount(filesystem, mount_path, *, readonly=False):
+    if mount_path in _mounts: raise OSError(1, "mount point in use")
+    _mounts[mount_path] = filesystem
+
+
+def umount(mount):
+    for path, vfs in list(_mounts.items()):
+        if mount is vfs or mount == path: del _mounts[path]; return
+    raise OSError(22, "not mounted")
+
+
+def getmount(mount_path):
+    if mount_path not in _mounts: raise OSError(22, "not mounted")
+    return _mounts[mount_path]
+
+
+def remount(mount_path, readonly=False, *, disable_concurrent_write_protection=False):
+    pass
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test MyADCAverager, the water level's running mean, on a scripted A0 trace.
+
+The trace is a 1.0 V level with a 10 Hz ripple. Ticked every millisecond
+with a 5 ms sample interval, the averager must read only every 5 ms, and
+value() must equal the mean of the last `window` readings (fewer while it
+warms up). A window of 20 readings spans one ripple period, so value()
+must settle on the 1.0 V level.
+"""
+
+import math
+import os
+import sys
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, here)
+
+import simulator
+
+simulator.setup()
+
+import analogio
+import board
+from sim_clock import VirtualClock
+
+clock = VirtualClock(cpu_scale=0).install()  # time moves only in sleep()
+
+from components.MyADC import MyADC, MyADCAverager
+
+level_v, ripple_v, ripple_hz = 1.0, 0.4, 10
+window, interval_ms = 20, 5
+t0 = clock.monotonic()
+
+
+def water_trace(t):
+    return (level_v + ripple_v * math.sin(2 * math.pi * ripple_hz * (t - t0))) / 3.3 * 65535
+
+
+def voltage(t):
+    return analogio.sample(board.A0, t) / 65535 * 3.3
+
+
+analogio.set_trace(board.A0, water_trace)
+adc = MyADC(0)
+averager = MyADCAverager(adc, window=window, sample_interval_ms=interval_ms)
+
+first = MyADCAverager(adc, window=window)
+assert abs(first.value() - voltage(clock.monotonic())) < 1e-6
+print("✓ value() with no readings reads once")
+
+sampled = []
+for ms in range(300):
+    if averager.tick(): sampled.append(clock.monotonic())
+    recent = sampled[-window:]
+    expected = sum(voltage(t) for t in recent) / len(recent)
+    assert abs(averager.value() - expected) < 1e-5, (ms, averager.value(), expected)
+    if ms == window * interval_ms // 2:
+        assert len(recent) < window, "still warming up"
+    clock.sleep(0.001)
+gaps = {round((b - a) * 1000) for a, b in zip(sampled, sampled[1:])}
+assert gaps == {interval_ms}, gaps
+print(f"✓ {len(sampled)} readings in 300 ms, {interval_ms} ms apart; value() is the mean of the last {window} (fewer while warming up)")
+
+assert abs(averager.value() - level_v) < 0.001, averager.value()
+print(f"✓ Running mean {averager.value():.4f} V on a {level_v} V level with a {ripple_v} V, {ripple_hz} Hz ripple")
+
+averager.reset()
+assert abs(averager.value() - voltage(clock.monotonic())) < 1e-6
+clock.uninstall()
+print("✓ ADC averager test passed")
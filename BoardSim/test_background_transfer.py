@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Run the main loop while a 'licks' download is in progress.
+
+The card starts with an 8 kB licks.dat, about 8.5 s on the 9600 baud link.
+It is requested just before henk drinks in three bouts, so the transfer
+runs through all of them. With bt_background_transfer the download goes out
+a bounded slice per loop pass: every lick must still be counted, the file
+must arrive whole between START and END, and no transfer slice may block
+the loop for much longer than bt_tick_bytes take on the wire.
+"""
+
+import os
+import sys
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, here)
+
+import simulator
+
+simulator.setup()
+
+import analogio
+import board
+import busio
+import sim_fs
+import Settings
+from workload import rfid_frame
+
+HENK = '61000000007E30010000000000'
+LICK_RAW, OPEN_RAW = int(0.3 / 3.3 * 65535), simulator.IDLE_LICK_RAW
+lick_ms, period_ms, licks_per_bout = 80, 250, 4
+request_s = 1.0
+bout_starts = [2.0, 5.0, 8.0]
+settings = {'max_bout_gap_ms': 2000, 'deployment_bout_count': 10, 'bt_background_transfer': True}
+
+header = 'time,mono_ms,cat_name,state,lick,bout,water\n'
+old_rows = ''.join(f'2026-10-16 09:00:{i % 60:02d}.000,{i * 100},older,0,0,0,0.0\n' for i in range(190))
+stored = (header + old_rows).encode()
+
+
+def start(clock):
+    t0 = clock.monotonic()
+    sim_fs.write_bytes('/sd/licks.dat', stored)
+
+    def contact(t):
+        for s in bout_starts:
+            offset_ms = (t - t0 - s) * 1000
+            if 0 <= offset_ms < licks_per_bout * period_ms and (offset_ms % period_ms) < lick_ms:
+                return LICK_RAW
+        return OPEN_RAW
+
+    analogio.set_trace(board.A1, contact)
+    rfid = busio.serial_line(board.D9)
+    for i in range(int(13 / 0.2)):
+        rfid.send(rfid_frame(HENK), at=t0 + 1.0 + i * 0.2)
+    bt = busio.serial_line(board.RX)
+    bt.send('licks*', at=t0 + request_s)
+    bt.send('stats*', at=t0 + 12.5)
+
+
+clock = simulator.run_main_loop(14, step_us=20, settings=settings, before_start=start)
+
+link_s = len(stored) * 10 / 9600
+assert request_s + link_s > bout_starts[-1] + 1, "the download should overlap every bout"
+
+rows = [line.split(',') for line in sim_fs.read_text('/sd/licks.dat').splitlines()[1:]]
+henk_rows = [r for r in rows if r[2] == 'henk']
+lick_rows = [r for r in henk_rows if int(r[4]) > 0]
+bout_rows = [r for r in henk_rows if int(r[4]) == 0]
+assert len(lick_rows) == licks_per_bout * len(bout_starts), f"Expected {licks_per_bout * len(bout_starts)} licks, got {len(lick_rows)}"
+assert len(bout_rows) == len(bout_starts), f"Expected {len(bout_starts)} bouts, got {len(bout_rows)}"
+print(f"✓ {len(lick_rows)} licks and {len(bout_rows)} bouts counted during a {link_s:.1f} s download")
+
+reply = busio.serial_line(board.TX).take().decode()
+body = reply[reply.index('START,licks*') + len('START,licks*'):reply.index('END,licks,')]
+assert body.startswith(stored.decode()), body[:80]
+assert len(body.splitlines()) == int(reply.split('END,licks,lines,')[1].split(',')[0])
+print(f"✓ licks.dat arrived whole: {len(body)} bytes, rows written meanwhile included")
+
+stats = dict((line.split(',')[0], line.split(',')) for line in reply.split('*') if ',max_us,' in line)
+tick_ms = Settings.bt_tick_bytes * 10 / 9600 * 1000
+transfer_max_ms = int(stats['bt_transfer'][-1]) / 1000
+assert transfer_max_ms < tick_ms * 1.5, (transfer_max_ms, tick_ms)
+print(f"✓ {stats['bt_transfer'][2]} transfer slices, longest {transfer_max_ms:.1f} ms ({Settings.bt_tick_bytes} bytes take {tick_ms:.1f} ms)")
+for line in simulator.summary(clock): print("  " + line)
+print("✓ Background transfer test passed")
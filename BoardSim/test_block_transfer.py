@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test the block transfer protocol end to end: the Downloader's TransferUtils
+against the board's BlockSender on a pseudo-terminal (pty_board.py).
+
+The file must arrive intact in a single get_file() call on a clean link,
+with corrupted frames (CRC errors, go-back-N resends) and across a dropout
+(resume from the last byte received); a transfer can also start mid-file.
+"""
+
+import os
+import sys
+import tempfile
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, here)
+sys.path.insert(0, os.path.join(here, '..', 'BluetoothDownloader'))
+
+import serial
+from pty_board import PtyBoard
+from library import TransferUtils
+
+lines = ['time,mono_ms,cat_name,state,lick,bout,water']
+lines += [f'2026-10-17 10:{i // 600 % 60:02d}:{i // 10 % 60:02d}.{i % 10}00,{1000000 + i * 100},henk,0,{i % 40},{i // 40},1.25'
+          for i in range(800)]
+content = ('\n'.join(lines) + '\n').encode()
+folder = tempfile.mkdtemp()
+path = os.path.join(folder, 'licks.dat')
+with open(path, 'wb') as f: f.write(content)
+
+board = PtyBoard({'licks': path}, baudrate=115200, timeout_ms=300, block_size=256, window=4)
+connection = serial.Serial(board.start(), 115200, timeout=0)
+
+
+def fetch(offset=0):
+    return TransferUtils.get_file(connection, 'licks', offset=offset, idle_timeout=1.0, max_time=60, quiet=True)
+
+
+try:
+    data, info = fetch()
+    assert data == content and info['crc_errors'] == 0 and board.wait_transfers(1)[-1].resent == 0, info
+    print(f"✓ Clean link: {len(content)} bytes in {info['frames']} frames, {info['seconds']:.2f} s")
+
+    board.uart.corrupt_every = 7
+    done = len(board.transfers)
+    data, info = fetch()
+    board.uart.corrupt_every = 0
+    resent = sum(sender.resent for sender in board.wait_transfers(done + 1)[done:])  # a lost ack may also end in a resume
+    assert data == content and info['crc_errors'] > 0 and resent > 0, (info, resent)
+    print(f"✓ Corrupted frames: intact after {info['crc_errors']} bad frames and {resent} resends")
+
+    board.uart.mute(after_bytes=15000, seconds=1.5)
+    data, info = fetch()
+    assert data == content and info['resumes'] >= 1, info
+    print(f"✓ Dropout: intact in one call after {info['resumes']} resume(s)")
+
+    data, info = fetch(offset=30000)
+    assert data == content[30000:], info
+    print(f"✓ Resume from offset 30000: {len(data)} bytes")
+finally:
+    connection.close()
+    board.stop()
+print("✓ Block transfer test passed")
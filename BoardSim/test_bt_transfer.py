@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test HydraPurr.bluetooth_send_data on the simulated UART and SD card.
+
+A text log must arrive byte for byte as stored on the card, between the
+START and END messages, and the transfer must take about as long as the
+bytes need on the 9600 baud link: no per-line parsing or sleeps on top.
+A binary lick file is sent as the CSV lines it decodes to.
+"""
+
+import os
+import sys
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, here)
+
+import simulator
+
+simulator.setup()
+
+import board
+import busio
+import Settings
+import sim_fs
+from sim_clock import VirtualClock
+
+clock = VirtualClock(step_us=20).install()  # installed before anything logs (see TimeUtil)
+
+from HydraPurr import HydraPurr
+from components.MyStore import MyStore
+from components.LickRecord import LickCodec
+
+rows = 1500
+hp = HydraPurr()
+tx = busio.serial_line(board.TX)
+
+# --- Text log: raw bytes, link-limited
+store = MyStore(Settings.lick_data_filename, auto_header=['cat_name', 'state', 'lick', 'bout', 'water'], max_lines=None)
+for i in range(rows): store.add(['henk', 0, i % 40, i // 40, 1.25])
+store.flush()
+stored = sim_fs.read_bytes('/sd/' + Settings.lick_data_filename)
+tx.take()
+t0 = clock.elapsed()
+hp.bluetooth_send_data('licks')
+elapsed = clock.elapsed() - t0
+reply = tx.take()
+head = b'START,licks*'
+tail = f'END,licks,lines,{rows + 1},bytes,{len(head) + len(stored)}*'.encode()
+assert reply == head + stored + tail, (reply[:80], reply[-80:])
+link_s = len(reply) * 10 / 9600
+assert elapsed < link_s * 1.05, (elapsed, link_s)
+print(f"✓ licks.dat: {len(stored)} bytes sent as stored in {elapsed:.2f} s (link needs {link_s:.2f} s)")
+
+# --- Binary lick file: decoded to CSV lines
+Settings.lick_data_format = 'binary'
+binary = MyStore(Settings.lick_binary_filename, auto_header=['cat_name', 'state', 'lick', 'bout', 'water'],
+                 max_lines=None, codec=LickCodec())
+for i in range(200): binary.add(['henk', 0, i, 0, 1.25])
+expected = [line + '\n' for line in binary.iter_lines(split=False)]
+hp.bluetooth_send_data('licks')
+reply = tx.take().decode()
+body = 'START,licks*' + ''.join(expected)
+assert reply.startswith(body) and reply[len(body):].startswith('END,licks,lines,201,'), reply[-60:]
+assert reply.count('\n') == 201
+print(f"✓ licks.bin: 200 records sent as {len(expected)} CSV lines")
+
+clock.uninstall()
+print("✓ Bluetooth transfer test passed")
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test fixed-rate buffered lick acquisition against the fake analogbufio.
+
+A scripted contact trace (8 licks of 80 ms at 4 Hz, then silence) is captured
+block by block through MyBufferedADC and fed to BoutManager.process_samples.
+Time is virtual, so the test runs in well under a second.
+"""
+
+import os
+import sys
+import time
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, '..', 'BoardCode', 'lib', 'components'))
+sys.path.insert(0, os.path.join(here, '..', 'BoardCode', 'lib'))
+sys.path.insert(0, here)
+
+import analogbufio
+import board
+from MyBufferedADC import MyBufferedADC
+from BoutDetection import BoutManager, EVENT_LICK, EVENT_BOUT
+
+
+class VirtualClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+clock = VirtualClock()
+time.monotonic = clock.monotonic
+time.sleep = clock.sleep
+
+start = clock.now + 0.5
+lick_ms, period_ms, licks = 80, 250, 8
+
+
+def contact_trace(t):
+    """Contact pulls the sensor low (0.3 V) during a lick, otherwise 3.0 V."""
+    offset_ms = (t - start) * 1000
+    if 0 <= offset_ms < licks * period_ms and (offset_ms % period_ms) < lick_ms:
+        return int(0.3 / 3.3 * 65535)
+    return int(3.0 / 3.3 * 65535)
+
+
+analogbufio.set_trace(board.A1, contact_trace)
+adc = MyBufferedADC(1, sample_rate=1000, block_size=100)
+manager = BoutManager(['cat'], max_bout_gap_ms=2000)
+manager.set_active_cat('cat')
+threshold = adc.threshold(2.0)
+
+durations, bouts = [], []
+for _ in range(60):  # 6 s of signal
+    raw, timestamps = adc.read_block()
+    states = bytearray(1 if v < threshold else 0 for v in raw)
+    for index, kind, timestamp_ms, value in manager.process_samples(states, timestamps, 1.5):
+        if kind == EVENT_LICK: durations.append(value)
+        if kind == EVENT_BOUT: bouts.append(value)
+
+assert len(durations) == licks, f"Expected {licks} licks, got {len(durations)}"
+assert all(abs(d - lick_ms) <= 1 for d in durations), f"Lick durations off: {durations}"
+assert len(bouts) == 1 and bouts[0]['lick_count'] == licks, f"Expected one bout of {licks} licks"
+print(f"✓ {len(durations)} licks measured at {sorted(set(durations))} ms, 1 bout of {bouts[0]['lick_count']} licks")
+print("✓ Buffered acquisition test passed")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Run the main loop with buffered lick acquisition (lick_acquisition = 'buffered').
+
+henk drinks in three bouts of licks just above min_lick_ms and just below
+max_lick_ms. The lick task runs every 120 ms and captures 100 ms blocks,
+so 20 ms between blocks are not sampled: some licks span such a gap and
+some start or end in one. An edge in a gap is timed at the middle of the
+gap, so every lick must be counted and measured within half a gap of its
+true duration. The lick and bout counts logged for every event of a block
+must be the running counts at that event. lick_block_size is set above
+lick_block_max_ms, so the block is capped and never holds up the loop for
+longer.
+"""
+
+import os
+import sys
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, here)
+
+import simulator
+
+simulator.setup()
+
+import analogio
+import board
+import busio
+import Settings
+import sim_fs
+from BoutDetection import EVENT_LICK
+from LickSensor import LickSensor
+from components.MyBufferedADC import MyBufferedADC
+from workload import rfid_frame
+
+HENK = '61000000007E30010000000000'
+LICK_RAW, OPEN_RAW = int(0.3 / 3.3 * 65535), simulator.IDLE_LICK_RAW
+lick_ms, period_ms, licks_per_bout = [62, 138, 62, 138, 62], 290, 5   # min_lick_ms 50, max_lick_ms 150
+bout_starts = [2.0, 5.5, 9.0]
+settings = {'lick_acquisition': 'buffered', 'lick_sample_rate_hz': 1000, 'lick_block_size': 150,
+            'lick_block_max_ms': 100, 'lick_task_period_ms': 120, 'max_bout_gap_ms': 2000,
+            'deployment_bout_count': 10}
+
+blocks, durations = [], []
+read_block, update_block = MyBufferedADC.read_block, LickSensor.update_block
+
+
+def recorded_read_block(self):
+    buffer, timestamps = read_block(self)
+    blocks.append((timestamps[0], timestamps[len(timestamps) - 1] + 1))
+    return buffer, timestamps
+
+
+def recorded_update_block(self, *args, **kwargs):
+    events = update_block(self, *args, **kwargs)
+    durations.extend(e[3] for e in events if e[1] == EVENT_LICK)
+    return events
+
+
+def start(clock):
+    t0 = clock.monotonic()
+    start.licks = [(int((t0 + s) * 1000) + i * period_ms, int((t0 + s) * 1000) + i * period_ms + lick_ms[i])
+                   for s in bout_starts for i in range(licks_per_bout)]
+
+    def contact(t):
+        for s in bout_starts:
+            offset_ms = (t - t0 - s) * 1000
+            if 0 <= offset_ms < licks_per_bout * period_ms and (offset_ms % period_ms) < lick_ms[int(offset_ms // period_ms)]:
+                return LICK_RAW
+        return OPEN_RAW
+
+    analogio.set_trace(board.A1, contact)
+    MyBufferedADC.read_block = recorded_read_block
+    LickSensor.update_block = recorded_update_block
+    rfid = busio.serial_line(board.D9)
+    for i in range(int(13 / 0.2)):
+        rfid.send(rfid_frame(HENK), at=t0 + 1.0 + i * 0.2)
+    busio.serial_line(board.RX).send('stats*', at=t0 + 13.5)
+
+
+clock = simulator.run_main_loop(14, step_us=20, settings=settings, before_start=start)
+MyBufferedADC.read_block, LickSensor.update_block = read_block, update_block
+
+block_ms = {end - begin for begin, end in blocks}
+assert block_ms == {Settings.lick_block_max_ms}, block_ms
+gaps = [(end, begin) for (_, end), (begin, _) in zip(blocks, blocks[1:]) if begin > end]
+spanning = [lick for lick in start.licks if any(lick[0] < end and begin < lick[1] for end, begin in gaps)]
+in_gap = [[lick for lick in start.licks if any(end <= lick[edge] < begin for end, begin in gaps)] for edge in (0, 1)]
+assert spanning and all(in_gap), "no lick spans a gap or starts and ends in one"
+print(f"✓ {len(blocks)} blocks of {block_ms.pop()} ms (lick_block_size capped), {len(spanning)} of {len(start.licks)} licks"
+      f" span an unsampled gap, {len(in_gap[0])} start and {len(in_gap[1])} end in one")
+
+gap_ms = max(begin - end for end, begin in gaps)
+errors = [measured - (end - begin) for measured, (begin, end) in zip(durations, start.licks)]
+assert len(durations) == len(start.licks), (durations, start.licks)
+assert all(abs(e) <= gap_ms // 2 + 1 for e in errors), errors
+print(f"✓ {len(durations)} licks of {sorted(set(lick_ms))} ms measured within {max(map(abs, errors))} ms ({gap_ms} ms gaps)")
+
+rows = [line.split(',') for line in sim_fs.read_text('/sd/licks.dat').splitlines()[1:]]
+henk_rows = [r for r in rows if r[2] == 'henk']
+lick_rows = [r for r in henk_rows if int(r[4]) > 0]
+bout_rows = [r for r in henk_rows if int(r[4]) == 0]
+assert [int(r[4]) for r in lick_rows] == list(range(1, licks_per_bout + 1)) * len(bout_starts), [r[4] for r in lick_rows]
+assert [int(r[5]) for r in lick_rows] == [b for b in range(len(bout_starts)) for _ in range(licks_per_bout)]
+assert [int(r[5]) for r in bout_rows] == list(range(1, len(bout_starts) + 1)), [r[5] for r in bout_rows]
+print(f"✓ licks.dat: {len(lick_rows)} licks and {len(bout_rows)} bouts, running counts on every row")
+
+reply = busio.serial_line(board.TX).take().decode()
+stats = dict((line.split(',')[0], line.split(',')) for line in reply.split('*') if ',max_us,' in line)
+read_max_ms = int(stats['read_lick'][-1]) / 1000
+assert read_max_ms < Settings.lick_block_max_ms + 5, read_max_ms
+print(f"✓ Longest block read {read_max_ms:.1f} ms (lick_block_max_ms {Settings.lick_block_max_ms})")
+for line in simulator.summary(clock): print("  " + line)
+print("✓ Buffered main loop test passed")
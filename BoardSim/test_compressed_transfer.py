@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test the compressed transfer ('licks,compressed') on the simulated UART.
+
+The Downloader's decoder must give back every line of the file, text or
+binary, and the transfer must take several times less link time than the
+plain one. The Downloader's get_compressed must treat a corrupted END as an
+incomplete transfer. Every recorded log under ProcessLickData/data must
+round-trip (see benchmark_transfer_encoding.py).
+"""
+
+import os
+import sys
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, here)
+
+from benchmark_transfer_encoding import data_files, encode_file
+
+import board
+import busio
+import Settings
+from sim_clock import VirtualClock
+from library import DataUtils, TransferUtils
+
+clock = VirtualClock(step_us=20).install()  # installed before anything logs (see TimeUtil)
+
+from HydraPurr import HydraPurr
+from components.MyStore import MyStore
+from components.LickRecord import LickCodec
+
+hp = HydraPurr()
+tx = busio.serial_line(board.TX)
+columns = ['cat_name', 'state', 'lick', 'bout', 'water']
+
+
+def receive(kind, compressed):
+    tx.take()
+    t0 = clock.elapsed()
+    hp.bluetooth_send_data(kind, compressed=compressed)
+    return tx.take(), clock.elapsed() - t0
+
+
+store = MyStore(Settings.lick_data_filename, auto_header=columns, max_lines=None)
+for i in range(1500): store.add(['henk' if i % 300 < 200 else 'bob', i % 2, i % 40, i // 40, round(1.25 - i * 0.00037, 5)])
+store.flush()
+expected = list(store.iter_lines(split=False))
+plain, plain_s = receive('licks', False)
+reply, elapsed = receive('licks', True)
+head = b'START,licks,compressed*'
+assert reply.startswith(head), reply[:40]
+lines, tail = DataUtils.decode_rows(reply[len(head):])
+assert lines == expected, (lines[:2], expected[:2])
+assert tail == f'END,licks,lines,{len(expected)},bytes,{len(reply) - len(tail)}*'.encode(), tail
+assert elapsed * 4 < plain_s, (elapsed, plain_s)
+print(f"✓ licks.dat: {len(expected)} lines in {len(reply)} bytes instead of {len(plain)} ({plain_s:.1f} s -> {elapsed:.1f} s)")
+
+Settings.lick_data_format = 'binary'
+binary = MyStore(Settings.lick_binary_filename, auto_header=columns, max_lines=None, codec=LickCodec())
+for i in range(200): binary.add(['henk', 0, i, 0, 1.25])
+expected = list(binary.iter_lines(split=False))
+reply, _ = receive('licks', True)
+lines, _ = DataUtils.decode_rows(reply[len(head):])
+assert lines == expected
+Settings.lick_data_format = 'text'
+print(f"✓ licks.bin: {len(expected)} decoded lines sent compressed")
+clock.uninstall()
+
+
+class Replay:
+    """A serial port that answers any request with the recorded reply."""
+
+    def __init__(self, reply):
+        self.reply = reply
+
+    def write(self, data):
+        pass
+
+    @property
+    def in_waiting(self):
+        return len(self.reply)
+
+    def read(self, n):
+        data, self.reply = self.reply[:n], self.reply[n:]
+        return data
+
+
+end = reply.rindex(b'END,licks,lines,')
+assert TransferUtils.get_compressed(Replay(reply), 'licks', idle_timeout=0.5, quiet=True) == expected
+corrupted = reply[:end] + b'END,licks,lines,2x0,bytes,0*'
+assert TransferUtils.get_compressed(Replay(corrupted), 'licks', idle_timeout=0.5, quiet=True) is None
+print("✓ TransferUtils.get_compressed returns the lines, and None for a corrupted END")
+
+results = [encode_file(path) for path in data_files()]
+assert results and all(r['intact'] for r in results), [r['path'] for r in results if not r['intact']]
+licks = [r for r in results if 'licks' in os.path.basename(r['path'])]
+ratio = sum(r['raw'] for r in licks) / sum(r['encoded'] for r in licks)
+assert ratio > 4, ratio
+print(f"✓ {len(results)} recorded logs round-trip; lick logs {ratio:.1f}x smaller")
+print("✓ Compressed transfer test passed")
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test LickSensor's RAM event ring on the simulated SD card.
+
+While a cat is licking, lick rows must wait in the ring: nothing is written
+to the card until the bout closes, and the rows keep the time of the lick,
+not of the write. A ring that reaches its high-water mark is drained early,
+and a ring that fills up drops its oldest events and counts them.
+"""
+
+import os
+import sys
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, here)
+
+import simulator
+
+simulator.setup()
+
+import Settings
+import sim_fs
+from sim_clock import VirtualClock
+
+Settings.max_bout_gap_ms = 2000
+Settings.min_licks_per_bout = 3
+Settings.data_flush_rows = 1         # every row the store gets goes to the card at once
+Settings.data_log_max_lines = None
+clock = VirtualClock(cpu_scale=0).install()
+sim_fs.set_latency(open_ms=8, write_ms=30)
+
+from LickSensor import LickSensor
+
+LICK_V, OPEN_V = 0.3, 3.0
+step_ms, lick_ms, period_ms = 5, 80, 250
+
+
+def run_bout(sensor, licks, drain=True, tail_s=3.0):
+    """Sample a bout of `licks` licks; drain every 250 ms like MainLoop's store task."""
+    lick_times, writes_during_bout = [], 0
+    total_ms = licks * period_ms + int(tail_s * 1000)
+    for t in range(0, total_ms, step_ms):
+        contact = t < licks * period_ms and (t % period_ms) < lick_ms
+        writes = sim_fs.counters['writes']
+        result = sensor.update(LICK_V if contact else OPEN_V)
+        if result['lick_added']: lick_times.append(int(clock.monotonic() * 1000))
+        if drain and t % 250 == 0: sensor.drain_events()
+        if sensor.bout_running(): writes_during_bout += sim_fs.counters['writes'] - writes
+        clock.advance(step_ms / 1000)
+    return lick_times, writes_during_bout
+
+
+def rows(path):
+    return [line.split(',') for line in sim_fs.read_text(path).splitlines()[1:]]
+
+
+# --- Rows wait for the end of the bout and keep the lick times
+Settings.lick_ring_size, Settings.lick_ring_high_water = 64, 48
+sensor = LickSensor(cat_names=['henk'])
+sensor.set_active_cat('henk')
+lick_times, writes = run_bout(sensor, 10)
+assert writes == 0, f"{writes} SD writes while henk was licking"
+logged = rows('/sd/licks.dat')
+assert len(logged) == 11, f"Expected 10 licks and a bout, got {len(logged)} rows"
+assert [int(r[1]) for r in logged[:10]] == lick_times, "rows should keep the time of each lick"
+assert sensor.ring_dropped == 0 and sensor.ring_peak == 11
+print(f"✓ No SD writes during a 10-lick bout; {len(logged)} rows written afterwards at their lick times")
+
+# --- High-water mark drains a long bout early, without dropping events
+Settings.lick_data_filename = 'hw.dat'
+Settings.lick_ring_size, Settings.lick_ring_high_water = 16, 8
+sensor = LickSensor(cat_names=['henk'])
+sensor.set_active_cat('henk')
+lick_times, writes = run_bout(sensor, 30)
+logged = rows('/sd/hw.dat')
+assert len(logged) == 31 and sensor.ring_dropped == 0, (len(logged), sensor.ring_dropped)
+assert writes > 0 and sensor.ring_peak < sensor.ring_size
+print(f"✓ High-water mark: 30-lick bout drained in batches (peak {sensor.ring_peak} of {sensor.ring_size})")
+
+# --- Full ring: oldest events are dropped and counted, newest kept
+Settings.lick_data_filename = 'full.dat'
+sensor = LickSensor(cat_names=['henk'])
+sensor.set_active_cat('henk')
+lick_times, _ = run_bout(sensor, 30, drain=False)
+assert sensor.ring_dropped == 31 - sensor.ring_size, sensor.ring_dropped
+assert sensor.drain_events() == sensor.ring_size
+sensor.data_store.flush()
+logged = rows('/sd/full.dat')
+assert [int(r[4]) for r in logged[:-1]] == list(range(16, 31)), "newest licks should be kept"
+assert 'dropped,15' in sensor.ring_summary(), sensor.ring_summary()
+print(f"✓ Full ring: {sensor.ring_dropped} oldest events dropped and counted ({sensor.ring_summary()})")
+
+# --- Readers of the file get rows still in the ring
+Settings.lick_data_filename = 'read.dat'
+sensor = LickSensor(cat_names=['henk'])
+sensor.set_active_cat('henk')
+run_bout(sensor, 4, drain=False, tail_s=0)
+assert sensor.bout_running() and not rows('/sd/read.dat')
+assert len(sensor.read_data_log()) == 1 + 4, "read() should drain the ring first"
+print("✓ read_data_log() hands ring events to the store first")
+
+clock.uninstall()
+print("✓ Event ring test passed")
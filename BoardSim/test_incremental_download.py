@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test the incremental download: TransferUtils.harvest() against the board's
+segment listing and block transfer on a pseudo-terminal (pty_board.py).
+
+A harvest must mirror every rotation segment of the log, and the next one
+must transfer only the bytes added since, also when the current file has
+rotated in between. A log emptied on the board is downloaded again with
+the old local copy kept aside.
+"""
+
+import os
+import sys
+import tempfile
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, here)
+sys.path.insert(0, os.path.join(here, '..', 'BluetoothDownloader'))
+
+import serial
+from pty_board import PtyBoard
+from library import TransferUtils
+from components.RotationManifest import RotationManifest
+
+board_dir = tempfile.mkdtemp()
+local = tempfile.mkdtemp()
+path = os.path.join(board_dir, 'licks.dat')
+manifest = RotationManifest(path)
+row_number = 0
+
+
+def add_rows(n):
+    global row_number
+    with open(path, 'a') as f:
+        if f.tell() == 0: f.write('time,mono_ms,cat_name,state,lick,bout,water\n')
+        for _ in range(n):
+            f.write(f'2026-10-17 10:00:00.000,{1000 + row_number * 50},henk,1,{row_number},1,0.5\n')
+            row_number += 1
+
+
+def rotate():
+    manifest.rotate(-1, 0)
+    add_rows(0)
+
+
+def read(p):
+    with open(p, 'rb') as f: return f.read()
+
+
+def check_mirror():
+    for index, size in manifest.segments():
+        mirrored = os.path.join(local, f'licks.dat.{index}')
+        assert read(mirrored) == read(manifest.segment_path(index)), f"segment {index} differs"
+
+
+add_rows(300); rotate()
+add_rows(300); rotate()
+add_rows(120)
+board = PtyBoard({'licks': path}, baudrate=115200, timeout_ms=300)
+connection = serial.Serial(board.start(), 115200, timeout=0)
+
+
+def harvest():
+    return TransferUtils.harvest(connection, 'licks', local, quiet=True, idle_timeout=1.0, max_time=60)
+
+
+try:
+    total = sum(size for _, size in manifest.segments())
+    assert harvest() == total
+    check_mirror()
+    assert TransferUtils.load_cursors(os.path.join(local, 'cursors.json'))['licks'] == [3, os.path.getsize(path)]
+    print(f"✓ First harvest: {total} bytes in 3 segments")
+
+    assert harvest() == 0 and len(board.wait_transfers(3)) == 3
+    print("✓ Nothing new: no transfer")
+
+    size = os.path.getsize(path)
+    add_rows(40)
+    new = os.path.getsize(path) - size
+    assert harvest() == new and board.wait_transfers(4)[-1].size - new == size
+    check_mirror()
+    print(f"✓ Appended rows: {new} new bytes sent, not {os.path.getsize(path)}")
+
+    add_rows(10); tail = os.path.getsize(path) - size - new
+    rotate(); add_rows(25)
+    assert harvest() == tail + os.path.getsize(path)
+    check_mirror()
+    print("✓ Rotation in between: the rest of segment 3, then segment 4")
+
+    with open(path, 'w'): pass
+    add_rows(5)
+    assert harvest() == os.path.getsize(path)
+    check_mirror()
+    assert [name for name in os.listdir(local) if name.startswith('licks.dat.4.') and name.endswith('.old')]
+    print("✓ Emptied log: downloaded again, old copy kept")
+finally:
+    connection.close()
+    board.stop()
+print("✓ Incremental download test passed")
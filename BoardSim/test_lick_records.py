@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test the packed binary lick records against the text format.
+
+The same rows are logged to licks.dat (text) and licks.bin (LickCodec) on
+the simulated card, across a reboot-style writer restart, a gap longer than
+the 16-bit time delta and a cat name longer than one name record. Both the
+board-side reader (MyStore.iter_lines) and the desktop decoder
+(data_reader.decode_licks_binary) must give back the text rows. A binary
+file must rotate after max_lines rows, also across a restart.
+"""
+
+import os
+import sys
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, here)
+sys.path.insert(0, os.path.join(here, '..', 'ProcessLickData'))
+
+import simulator
+
+simulator.setup()
+
+import numpy as np
+import tempfile
+import sim_fs
+from sim_clock import VirtualClock
+from components import MySD
+from components.MyStore import MyStore
+from components.LickRecord import LickCodec, count_records
+from library import data_reader
+
+MySD.mount_sd_card()
+clock = VirtualClock(cpu_scale=0).install()  # time moves only through advance()
+header = ["cat_name", "state", "lick", "bout", "water"]
+cats = ['unknown', 'henk', 'Handsome the Second']
+rng = np.random.default_rng(3)
+
+
+def open_stores():
+    text = MyStore('licks.dat', auto_header=header, max_lines=None)
+    binary = MyStore('licks.bin', auto_header=header, max_lines=None, codec=LickCodec())
+    return text, binary
+
+
+def log(stores, n):
+    for i in range(n):
+        row = [cats[i % 3], 0, int(rng.integers(0, 40)), int(rng.integers(0, 9)), round(float(rng.uniform(0.5, 2.5)), 4)]
+        for store in stores: store.add(row)
+        clock.advance(float(rng.uniform(0.05, 3.0)))
+
+
+stores = open_stores()
+log(stores, 150)
+clock.advance(120)                      # longer than a 16-bit ms delta
+log(stores, 50)
+for store in stores: store.close()
+stores = open_stores()                  # new writer session on the same files
+log(stores, 100)
+
+# max_lines counts data records only, not the header, clock, name and anchor records
+rows = MyStore('rows.bin', auto_header=header, max_lines=50, flush_rows=1, codec=LickCodec())
+for i in range(30):
+    rows.add([cats[i % 3], 0, i, 0, 1.0])
+    clock.advance(70)                   # an anchor record before every row
+rows.close()
+rows = MyStore('rows.bin', auto_header=header, max_lines=50, flush_rows=1, codec=LickCodec())   # restart
+for i in range(20): rows.add([cats[0], 0, i, 0, 1.0])
+assert '/sd/rows.bin.1' not in sim_fs.list_files(), "rotated before 50 rows"
+rows.add([cats[0], 0, 20, 0, 1.0])
+rows.close()
+assert count_records('/sd/rows.bin.1') == 50 and count_records('/sd/rows.bin') == 1
+print("✓ licks.bin rotates after max_lines data records")
+clock.uninstall()
+
+text_rows = list(stores[0].iter_lines())
+binary_rows = list(stores[1].iter_lines())
+assert binary_rows[0] == text_rows[0], binary_rows[0]
+assert len(binary_rows) == len(text_rows) == 301
+for t, b in zip(text_rows[1:], binary_rows[1:]):
+    assert t[:6] == b[:6] and abs(t[6] - b[6]) < 1e-3, (t, b)
+print("✓ MyStore.iter_lines() decodes licks.bin to the licks.dat rows")
+
+sim_fs.uninstall()
+sim_fs.dump(tmp := tempfile.mkdtemp())
+text = data_reader.read_licks_file(os.path.join(tmp, 'licks.dat'))
+decoded = data_reader.read_licks_binary(os.path.join(tmp, 'licks.bin'))
+assert list(decoded.columns) == list(text.columns), decoded.columns
+for column in ('mono_ms', 'cat_name', 'state', 'lick', 'bout'):
+    assert (decoded[column].to_numpy() == text[column].to_numpy()).all(), column
+assert (decoded['time'].to_numpy() == text['time'].to_numpy()).all()
+assert np.allclose(decoded['water'], text['water'], atol=1e-3)
+print("✓ data_reader.read_licks_binary matches read_licks_file")
+
+text_bytes, binary_bytes = len(sim_fs.read_bytes('/sd/licks.dat')), len(sim_fs.read_bytes('/sd/licks.bin'))
+print(f"✓ 300 rows: {text_bytes} bytes as text, {binary_bytes} bytes packed ({text_bytes / binary_bytes:.1f}x smaller)")
+print("✓ Lick record test passed")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Run the unmodified MainLoop.main_loop on the simulator.
+
+A tagged cat (henk) is announced on the RFID UART and licks in three bouts.
+With deployment_bout_count = 3 the feeder relay (D6) must switch on after the
+third bout and off again deployment_duration_ms later, while licks.dat on the
+in-memory card records henk's licks and bouts. A 'stats' request on the
+Bluetooth UART must be answered.
+"""
+
+import os
+import sys
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, here)
+
+import simulator
+
+simulator.setup()
+
+import analogio
+import board
+import busio
+import digitalio
+import sim_fs
+from workload import rfid_frame
+
+HENK = '61000000007E30010000000000'
+LICK_RAW, OPEN_RAW = int(0.3 / 3.3 * 65535), simulator.IDLE_LICK_RAW
+lick_ms, period_ms, licks_per_bout = 80, 250, 4
+bout_starts = [2.0, 5.0, 8.0]       # s after start; bouts close after max_bout_gap_ms
+settings = {'max_bout_gap_ms': 2000, 'deployment_bout_count': 3, 'deployment_duration_ms': 1000}
+
+
+def start(clock):
+    t0 = clock.monotonic()
+
+    def contact(t):
+        for s in bout_starts:
+            offset_ms = (t - t0 - s) * 1000
+            if 0 <= offset_ms < licks_per_bout * period_ms and (offset_ms % period_ms) < lick_ms:
+                return LICK_RAW
+        return OPEN_RAW
+
+    analogio.set_trace(board.A1, contact)
+    rfid = busio.serial_line(board.D9)
+    for i in range(int(14 / 0.2)):  # henk stays at the fountain for the whole run
+        rfid.send(rfid_frame(HENK), at=t0 + 1.0 + i * 0.2)
+    busio.serial_line(board.RX).send('stats*', at=t0 + 13.0)
+    start.t0 = t0
+
+
+clock = simulator.run_main_loop(15, step_us=20, settings=settings, before_start=start)
+
+rows = [line.split(',') for line in sim_fs.read_text('/sd/licks.dat').splitlines()[1:]]
+henk_rows = [r for r in rows if r[2] == 'henk']
+lick_rows = [r for r in henk_rows if int(r[4]) > 0]    # lick count went up
+bout_rows = [r for r in henk_rows if int(r[4]) == 0]   # bout closed, lick count restarts
+assert len(lick_rows) == licks_per_bout * len(bout_starts), f"Expected {licks_per_bout * len(bout_starts)} licks, got {len(lick_rows)}"
+assert len(bout_rows) == len(bout_starts), f"Expected {len(bout_starts)} bouts, got {len(bout_rows)}"
+print(f"✓ licks.dat: {len(lick_rows)} licks and {len(bout_rows)} bouts for henk")
+
+feeder = [(t - start.t0, level) for t, level in digitalio.transitions(board.D6)]
+on = [t for t, level in feeder if level]
+off = [t for t, level in feeder if not level]
+assert len(on) == 1 and len(off) == 1, f"Expected one deployment, got {feeder}"
+assert on[0] > bout_starts[-1] and abs((off[0] - on[0]) - 1.0) < 0.1, f"Deployment timing off: {feeder}"
+print(f"✓ Feeder on at {on[0]:.2f} s, off after {off[0] - on[0]:.3f} s")
+
+reply = busio.serial_line(board.TX).take().decode()
+assert 'START,stats' in reply and 'loop_rate,' in reply and 'END,stats' in reply, reply
+print("✓ 'stats' command answered")
+for line in simulator.summary(clock): print("  " + line)
+print("✓ Main loop simulation test passed")
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test rotation through the manifest on the simulated SD card.
+
+A card that already holds 300 licks.dat segments (older firmware, no
+manifest) needs one probe on the first rotation; after that, each rotation
+costs O(1) stat calls whatever the number of segments. The manifest records
+segment names, mono_ms ranges and line counts, and data_reader.list_segments
+finds every segment in order. Listing segments for a download only stats
+the manifest's entries. The system log rotates the same way.
+Restoring the line count at boot only reads what follows the last line
+checkpoint.
+"""
+
+import os
+import sys
+import tempfile
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, here)
+sys.path.insert(0, os.path.join(here, '..', 'ProcessLickData'))
+
+import simulator
+
+simulator.setup()
+
+import Settings
+import sim_fs
+from sim_clock import VirtualClock
+from components import MySD, MySystemLog
+from components.MyStore import MyStore
+from components.RotationManifest import RotationManifest
+from library import data_reader
+
+MySD.mount_sd_card()
+for i in range(1, 301): sim_fs.write_bytes(f'/sd/licks.dat.{i}', b'time,mono_ms,n\n')
+
+stats = [0]
+real_stat = os.stat
+def counting_stat(path, *args, **kwargs):
+    stats[0] += 1
+    return real_stat(path, *args, **kwargs)
+os.stat = counting_stat
+
+clock = VirtualClock(cpu_scale=0).install()
+store = MyStore('licks.dat', auto_header=['n'], max_lines=10, flush_rows=1)
+per_rotation = []
+for i in range(60):
+    clock.advance(1)
+    before = stats[0]
+    store.add([i])
+    if i and i % 10 == 0: per_rotation.append(stats[0] - before)
+assert per_rotation[0] > 300 and max(per_rotation[1:]) < 10, per_rotation
+print(f"✓ First rotation probes {per_rotation[0]} names, then {max(per_rotation[1:])} stat calls per rotation")
+
+manifest = sim_fs.read_text('/sd/licks.dat.manifest').splitlines()
+assert manifest[0] == 'index,segment,first_mono_ms,last_mono_ms,lines'
+assert [line.split(',')[1] for line in manifest[1:]] == [f'licks.dat.{i}' for i in range(301, 306)]
+first, last, lines = (int(x) for x in manifest[2].split(',')[2:])
+assert last - first == 9000 and lines == 10, manifest[2]
+print(f"✓ Manifest lists {len(manifest) - 1} segments with mono_ms ranges and line counts")
+
+# A new store (reboot) finds a full file, rotates it, and continues from the manifest without probing
+before = stats[0]
+store = MyStore('licks.dat', auto_header=['n'], max_lines=10, flush_rows=1)
+for i in range(10): store.add([i])
+store.add([10])
+assert '/sd/licks.dat.307' in sim_fs.list_files() and stats[0] - before < 20, stats[0] - before
+print("✓ After a restart the next rotation name comes from the manifest")
+
+# Listing segments for a download stats the manifest's entries, not every index
+listing = RotationManifest('/sd/licks.dat')
+before = stats[0]
+listed = listing.segments(since=301)
+listing_stats = stats[0] - before
+assert [index for index, _ in listed] == list(range(301, 309)), listed
+assert listing_stats <= len(listed) + 1, listing_stats
+assert len(listing.segments()) == 308   # older segments without manifest entries are probed by name
+print(f"✓ segments(since=301) lists {len(listed)} segments with {listing_stats} stat calls")
+
+# System log rotates through its own manifest
+Settings.system_log_max_lines = 5
+MySystemLog.set_mirror_to_console(False)
+MySystemLog.set_rate_limit(0)  # bursts of test lines
+MySystemLog.setup_system_log(quiet=True)
+for i in range(12): MySystemLog.info(f'[Test] line {i}')
+MySystemLog.teardown()
+log_manifest = sim_fs.read_text('/sd/system.log.manifest').splitlines()
+assert [line.split(',')[1] for line in log_manifest[1:]] == ['system.log.1', 'system.log.2'], log_manifest
+print("✓ System log rotation is recorded in system.log.manifest")
+
+# Boot-time line accounting: only the lines after the last checkpoint are read
+from components import RotationManifest as rm
+scanned = []
+real_count = rm.count_lines
+def counting_count(path, start=0, stop_at=None):
+    scanned.append(os.stat(path)[6] - start)
+    return real_count(path, start, stop_at)
+rm.count_lines = counting_count
+
+big = MyStore('big.dat', auto_header=['n'], max_lines=5000, flush_rows=20)
+for i in range(4321): big.add([i])
+big.flush()
+size = len(sim_fs.read_bytes('/sd/big.dat'))
+scanned.clear()
+big = MyStore('big.dat', auto_header=['n'], max_lines=5000, flush_rows=20)
+assert big._line_count == 4321 and sum(scanned) < size / 10, (big._line_count, scanned, size)
+print(f"✓ Restart restores 4321 lines reading {sum(scanned)} of {size} bytes")
+
+sim_fs.write_bytes('/sd/big.dat', b'time,mono_ms,n\n' + b'x,1,2\n' * 7)  # replaced behind our back
+big = MyStore('big.dat', auto_header=['n'], max_lines=5000, flush_rows=20)
+assert big._line_count == 7, big._line_count
+print("✓ A file smaller than its checkpoint is counted in full")
+
+Settings.system_log_max_lines = 1000
+MySystemLog.setup_system_log(quiet=True)
+for i in range(450): MySystemLog.info(f'[Test] line {i}')
+MySystemLog.teardown()
+scanned.clear()
+sink = MySystemLog._SDSink('/sd/system.log', max_lines=1000)
+lines = sim_fs.read_text('/sd/system.log').count('\n')
+assert sink._line_count == lines > 450, (sink._line_count, lines)
+assert sum(scanned) < 100 * 80, scanned
+sink.close()
+print("✓ System log restores its line count from the checkpoint")
+rm.count_lines = real_count
+
+os.stat = real_stat
+clock.uninstall()
+sim_fs.uninstall()
+with tempfile.TemporaryDirectory() as tmp:
+    sim_fs.dump(tmp)
+    segments = [p.name for p in data_reader.list_segments(tmp)]
+    assert segments == [f'licks.dat.{i}' for i in range(1, 308)] + ['licks.dat'], segments[-8:]
+    table = data_reader.read_manifest(tmp)
+    assert list(table['segment'])[-1] == 'licks.dat.307'
+print("✓ data_reader.list_segments finds all 307 segments in order")
+print("✓ Rotation test passed")
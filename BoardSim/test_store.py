@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Test MyStore's buffered, keep-open writer on the simulated SD card.
+
+With SD latencies charged on the virtual clock, adding rows through the
+buffer must cost far less than the old open/append/close per row. Rows must
+survive rotation, be visible to a second reader of the same file (as the
+Bluetooth transfer uses), and idle rows must be flushed by flush_if_idle().
+HydraPurr's transfers must share the writer's store of a file, so a full
+file is rotated once, not once per store. system.log is written and
+rotated by MySystemLog's sink, so reading it for a transfer must never
+rotate it.
+Rows that fail to write must be retried by the next flush; once more than
+data_pending_max_bytes are held they are dropped, counted and taken off
+the line count.
+"""
+
+import os
+import sys
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, here)
+
+import simulator
+
+simulator.setup()
+
+import Settings
+import sim_fs
+from sim_clock import VirtualClock
+from components import MySD
+from components.MyStore import MyStore, write_list
+
+MySD.mount_sd_card()
+sim_fs.set_latency(open_ms=8, write_ms=3)
+clock = VirtualClock(step_us=1).install()
+rows = 200
+
+# --- Old path: open/append/close per row
+t0 = clock.elapsed()
+for i in range(rows): write_list('/sd/old.dat', ['t', i, 'henk', 0, i, 0, 1.5])
+per_row_old = (clock.elapsed() - t0) / rows * 1000
+
+# --- Buffered store
+store = MyStore('new.dat', auto_header=['cat_name', 'state', 'lick', 'bout', 'water'], max_lines=None,
+                flush_rows=20, flush_bytes=4096, flush_idle_ms=2000)
+opens = sim_fs.counters['opens']
+t0 = clock.elapsed()
+for i in range(rows): store.add(['henk', 0, i, 0, 1.5])
+per_row_new = (clock.elapsed() - t0) / rows * 1000
+checkpoints = rows // Settings.log_checkpoint_lines  # line count sidecar (see RotationManifest)
+assert sim_fs.counters['opens'] - opens == 1 + checkpoints, "store should keep one handle open"
+assert per_row_new * 10 < per_row_old, (per_row_old, per_row_new)
+print(f"✓ add(): {per_row_old:.2f} ms/row open-per-row -> {per_row_new:.2f} ms/row buffered")
+
+# --- Reader of the same file sees every row (flushes all writers first)
+store.add(['henk', 0, rows, 0, 1.5])
+reader = MyStore('new.dat', max_lines=None)
+lines = list(reader.iter_lines(split=False))
+assert len(lines) == rows + 2 and lines[-1].endswith(f'henk,0,{rows},0,1.5'), lines[-1]
+print(f"✓ iter_lines() from a second store sees all {rows + 1} rows")
+
+# --- Idle flush
+store.add(['henk', 0, rows + 1, 0, 1.5])
+assert not store.flush_if_idle(), "flushed before the idle time"
+clock.advance(2.5)
+assert store.flush_if_idle() and sim_fs.read_text('/sd/new.dat').count('\n') == rows + 3
+print("✓ flush_if_idle() writes rows once adds pause")
+
+# --- Rotation flushes first
+rot = MyStore('rot.dat', auto_header=['n'], max_lines=50, flush_rows=20)
+for i in range(120): rot.add([i])
+rot.flush()
+segments = ['/sd/rot.dat.1', '/sd/rot.dat.2', '/sd/rot.dat']
+values = []
+for path in segments:
+    body = sim_fs.read_text(path).splitlines()
+    assert body[0] == 'time,mono_ms,n', (path, body[0])
+    values += [int(line.rsplit(',', 1)[1]) for line in body[1:]]
+assert values == list(range(120)), values
+print("✓ Rotation keeps every row in order (50 + 50 + 20)")
+
+# --- Transfers share the writer's store: a file at max_lines rotates once
+from HydraPurr import HydraPurr
+
+Settings.data_log_max_lines = 50  # as LickSensor's store uses it
+writer = MyStore(Settings.lick_data_filename, auto_header=['n'], max_lines=Settings.data_log_max_lines, flush_rows=1)
+for i in range(50): writer.add([i])
+assert HydraPurr().select_data_log(Settings.lick_data_filename) is writer
+writer.add([50])
+manifest = sim_fs.read_text(f'/sd/{Settings.lick_data_filename}.manifest').splitlines()
+assert [line.split(',')[1] for line in manifest[1:]] == [f'{Settings.lick_data_filename}.1'], manifest
+assert sim_fs.read_text(f'/sd/{Settings.lick_data_filename}').splitlines()[1].endswith(',50')
+print("✓ select_data_log() reuses the writer's store; a full file rotates once")
+
+from components import MySystemLog
+
+Settings.system_log_max_lines = 1000
+MySystemLog.setup_system_log(quiet=True, sync=MySystemLog.SYNC_ALWAYS)
+MySystemLog.set_rate_limit(0)
+for i in range(60): MySystemLog.info(f'line {i}')
+system_path = f'/sd/{Settings.system_log_filename}'
+system_store = HydraPurr().select_data_log(Settings.system_log_filename)
+assert len(system_store.read()) == 60 and f'{system_path}.1' not in sim_fs.list_files(), sim_fs.list_files()
+MySystemLog.info('after the transfer')
+assert sim_fs.read_text(system_path).splitlines()[-1].endswith('after the transfer')
+MySystemLog.teardown()
+print(f"✓ {Settings.system_log_filename} above data_log_max_lines is read for a transfer without rotating it")
+
+# --- A failed write keeps the rows for a retry, up to data_pending_max_bytes
+failing = MyStore('fail.dat', auto_header=['n'], max_lines=1000, flush_rows=5)
+failing.pending_max_bytes = 300
+sim_fs.set_failing(writes=True)
+for i in range(5): failing.add([i])
+assert not failing.flush_if_idle(clock.elapsed() * 1000 + 5000) and failing.rows_dropped == 0
+sim_fs.set_failing(writes=False)
+clock.advance(2.5)
+assert failing.flush_if_idle()
+assert [line.rsplit(',', 1)[1] for line in sim_fs.read_text('/sd/fail.dat').splitlines()[1:]] == [str(i) for i in range(5)]
+print("✓ Rows that failed to write are written by the next flush")
+
+sim_fs.set_failing(writes=True)
+for i in range(5, 15): failing.add([i])
+sim_fs.set_failing(writes=False)
+assert 0 < failing.rows_dropped <= 10 and failing._line_count == 15 - failing.rows_dropped, (failing.rows_dropped, failing._line_count)
+failing.add([15]); failing.flush()
+assert sim_fs.read_text('/sd/fail.dat').splitlines()[-1].endswith(',15')
+print(f"✓ {failing.rows_dropped} rows dropped (and off the line count) once more than {failing.pending_max_bytes} bytes were held")
+
+clock.uninstall()
+print("✓ Buffered store test passed")
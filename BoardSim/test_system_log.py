@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test the sync policies of MySystemLog's SD sink (see benchmark_system_log.py).
+
+Every policy must write every line; only the number of syncs, and so the
+time a log call blocks and the lines at risk on a power cut, may differ.
+The in-memory mirror must keep the most recent lines in order, and
+messages below the log level must not be formatted at all. Repeated lines
+are folded and floods from one source are rate limited, with every
+suppressed line counted.
+"""
+
+import os
+import sys
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, here)
+
+from benchmark_system_log import run_policy
+
+import Settings
+from components import MySystemLog
+
+lines, interval_ms, warn_every = 1000, 20, 100
+results = {sync: run_policy(sync, lines, interval_ms, warn_every) for sync in MySystemLog.SYNC_POLICIES}
+for r in results.values():
+    assert r['written'] == lines, f"{r['sync']}: {r['written']} of {lines} lines written"
+print(f"✓ All {len(results)} policies write all {lines} lines")
+
+assert results['always']['syncs'] == lines and results['always']['at_risk'] == 0
+assert results['lines']['syncs'] == lines // Settings.system_log_sync_lines
+assert results['lines']['at_risk'] == Settings.system_log_sync_lines - 1
+assert results['errors']['syncs'] == lines // warn_every
+assert results['time']['syncs'] == (lines - 1) * interval_ms // Settings.system_log_sync_ms
+assert results['never']['syncs'] == 0
+print("✓ Sync counts: " + ", ".join(f"{s} {r['syncs']}" for s, r in results.items()))
+
+always, batched = results['always']['ms_per_line'], results['lines']['ms_per_line']
+assert batched * 10 < always, (always, batched)
+print(f"✓ 'lines' policy: {always:.2f} -> {batched:.2f} ms per log call")
+
+# --- In-memory ring
+MySystemLog.set_rate_limit(0)
+MySystemLog.setup_system_log(quiet=True)
+MySystemLog.set_mem_max(50)
+assert MySystemLog.get_memory_log()[-1].endswith(f'line {lines - 1}'), "resize should keep the newest lines"
+for i in range(120): MySystemLog.info(f"[Test] ring {i}")
+memory = MySystemLog.get_memory_log()
+assert len(memory) == 50 and [m.rsplit(' ', 1)[1] for m in memory] == [str(i) for i in range(70, 120)], memory[:2]
+assert MySystemLog.get_memory_log(3) == memory[-3:] and list(MySystemLog.iter_memory_log(3)) == memory[-3:]
+MySystemLog.set_mem_max(10)
+assert MySystemLog.get_memory_log() == memory[-10:]
+MySystemLog.set_mem_max(500)
+print("✓ Memory ring keeps the last 50 of 120 lines in order and survives resizing")
+
+# --- Lazy formatting
+class Probe:
+    renders = 0
+    def __str__(self):
+        Probe.renders += 1
+        return 'probe'
+
+MySystemLog.set_system_log_level(MySystemLog.INFO)
+assert MySystemLog.enabled(MySystemLog.WARN) and not MySystemLog.enabled(MySystemLog.DEBUG)
+MySystemLog.debugf("[Test] %s %s", Probe(), 1)
+assert Probe.renders == 0, "debugf formatted a message below the level"
+MySystemLog.infof("[Test] %s %d", Probe(), 2)
+MySystemLog.infof("[Test] %d", 'not a number')  # bad format: arguments are appended instead
+memory = MySystemLog.get_memory_log(2)
+assert Probe.renders == 1 and memory[0].endswith('[Test] probe 2') and memory[1].endswith('[Test] %d not a number'), memory
+print("✓ debugf() skips formatting below the level; infof() renders once")
+
+# --- Repeat folding and rate limiting
+from sim_clock import VirtualClock
+clock = VirtualClock(cpu_scale=0).install()
+MySystemLog.set_repeat_ms(60000)
+for i in range(100): MySystemLog.info("[Test] same")
+MySystemLog.info("[Test] different")
+memory = MySystemLog.get_memory_log(3)
+assert memory[0].endswith('[Test] same') and memory[1].endswith('last message repeated 99 times'), memory
+for i in range(10):
+    MySystemLog.info("[Test] different")
+    clock.advance(5)
+assert MySystemLog.get_memory_log(1)[0].endswith('[Test] different')
+clock.advance(20)
+MySystemLog.sync_if_due()
+assert MySystemLog.get_memory_log(1)[0].endswith('repeated 10 times'), "repeats should be reported after repeat_ms"
+
+MySystemLog.set_rate_limit(30, 10000)
+before = MySystemLog.get_suppressed()
+for i in range(100):
+    MySystemLog.infof("[Main Loop] henk: state=%d licks=%d", i % 2, i)
+    if i == 50: MySystemLog.infof("[Main Loop] Cat switched %s", 'henk')
+    if i == 60: MySystemLog.warn(f"[Main Loop] warning {i}")
+    clock.advance(0.05)
+clock.advance(10)
+MySystemLog.sync_if_due()
+after = MySystemLog.get_suppressed()
+memory = MySystemLog.get_memory_log(33)
+assert sum(',[Main Loop] henk: state=' in m for m in memory) == 30 and after['rate_limited'] - before['rate_limited'] == 70, memory
+assert any('Cat switched henk' in m for m in memory) and any('warning 60' in m for m in memory)
+assert memory[-1].endswith('rate limit: 70 lines dropped from [Main Loop] henk: state=%d licks=%d'), memory[-1]
+assert MySystemLog.suppressed_summary() == f"log_suppressed,repeated,{after['repeated']},rate_limited,{after['rate_limited']}"
+clock.uninstall()
+MySystemLog.set_rate_limit(Settings.system_log_rate_lines, Settings.system_log_rate_window_ms)
+print("✓ 99 repeats folded into one line; 70 of 100 state lines dropped, other sources and WARN kept")
+print("✓ System log test passed")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test TimeUtil's cached timestamps and the mono_ms-only log time mode.
+
+Cached formatting must give the same strings as formatting every row, at
+lower cost. In 'mono' mode only anchor rows carry the date; data_reader must
+rebuild the same times as a 'wall' mode log, also when read in chunks.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, here)
+sys.path.insert(0, os.path.join(here, '..', 'ProcessLickData'))
+
+import simulator
+
+simulator.setup()
+
+import numpy as np
+import sim_fs
+from sim_clock import VirtualClock
+from components import MySD, MySystemLog, TimeUtil
+from components.MyStore import MyStore
+from library import data_reader
+
+clock = VirtualClock(cpu_scale=0).install()  # before anything logs: the timebase starts on the virtual clock
+MySD.mount_sd_card()
+
+
+def reference(epoch, delta_ms):
+    t = time.localtime(epoch + delta_ms // 1000)
+    return time.strftime('%Y-%m-%d %H:%M:%S', t) + f".{delta_ms % 1000:03d}"
+
+
+# --- 1. Cache gives the same strings
+rng = np.random.default_rng(5)
+deltas = np.cumsum(rng.integers(0, 400, 20000))
+for d in deltas:
+    assert TimeUtil.format_since(1_700_000_000, int(d)) == reference(1_700_000_000, int(d)), d
+print(f"✓ Cached format matches a full format for {len(deltas)} rows across {deltas[-1] // 1000} s")
+
+# --- 2. ... at lower cost (rows within the same second, as during a bout)
+n = 20000
+t0 = time.perf_counter()
+for i in range(n): TimeUtil.format_since(1_700_000_000, 5000 + i % 1000 // 40)
+cached_us = (time.perf_counter() - t0) / n * 1e6
+t0 = time.perf_counter()
+for i in range(n):
+    TimeUtil._cache_seconds = None
+    TimeUtil.format_since(1_700_000_000, 5000 + i % 1000 // 40)
+full_us = (time.perf_counter() - t0) / n * 1e6
+assert cached_us < full_us, (cached_us, full_us)
+print(f"✓ Timestamp: {full_us:.2f} us formatted in full -> {cached_us:.2f} us cached (host)")
+
+# --- 3. 'mono' mode: anchors only, readers rebuild the time
+wall = MyStore('wall.dat', auto_header=['n'], max_lines=None, flush_rows=1)
+mono = MyStore('mono.dat', auto_header=['n'], max_lines=None, flush_rows=1)
+mono._stamper = TimeUtil.Stamper(mode='mono', anchor_ms=10000)
+for i in range(200):
+    wall.add([i]); mono.add([i])
+    clock.advance(0.25 + (i % 7) * 0.1)
+
+MySystemLog.set_mirror_to_console(False)
+MySystemLog.setup_system_log(quiet=True)
+MySystemLog._stamper = TimeUtil.Stamper(mode='mono', anchor_ms=10000)
+for i in range(50):
+    MySystemLog.info(f'[Test] line {i}')
+    clock.advance(0.5)
+MySystemLog.teardown()
+clock.uninstall()
+
+rows = [line.split(',') for line in sim_fs.read_text('/sd/mono.dat').splitlines()[1:]]
+anchors = [r for r in rows if r[0]]
+span_s = (int(rows[-1][1]) - int(rows[0][1])) / 1000
+assert rows[0][0] and len(anchors) == int(span_s // 10) + 1, (len(anchors), span_s)
+log = [line.split(',', 1)[0] for line in sim_fs.read_text('/sd/system.log').splitlines()]
+assert log[0] and 2 <= sum(1 for t in log if t) <= 4, log
+print(f"✓ 'mono' mode: {len(anchors)} anchor rows in {len(rows)} lick rows, {sum(1 for t in log if t)} in {len(log)} log lines")
+
+for store in (mono, wall):
+    store.empty()
+    store.header(['n'], label=store.time_label)
+clock.install()
+mono.add(['first']); wall.add(['first'])
+assert sim_fs.read_text('/sd/mono.dat').splitlines()[1][0] != ',', "a new file must start with an anchor row"
+for i in range(300):
+    wall.add([i]); mono.add([i])
+    clock.advance(0.25 + (i % 7) * 0.1)
+clock.uninstall()
+sim_fs.uninstall()
+with tempfile.TemporaryDirectory() as tmp:
+    sim_fs.dump(tmp)
+    expected = data_reader.read_licks_file(os.path.join(tmp, 'wall.dat'))
+    rebuilt = data_reader.read_licks_file(os.path.join(tmp, 'mono.dat'))
+    assert rebuilt['time'].notna().all() and (rebuilt['time'] == expected['time']).all()
+    chunks = data_reader.iter_licks_chunks(os.path.join(tmp, 'mono.dat'), chunksize=17)
+    chunked = [t for chunk in chunks for t in chunk['time']]
+    assert chunked == list(expected['time'])
+print("✓ data_reader rebuilds every time from the anchors (whole file and in chunks)")
+print("✓ TimeUtil test passed")
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test the synthetic workload generator.
+
+1. Ground truth, licks.dat rows and detector output agree for a 2-cat workload
+   (benchmark_workload.detect / score).
+2. The same kind of workload, installed as live input, is picked up by the
+   unmodified main loop on the simulator.
+"""
+
+import os
+import sys
+import tempfile
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, here)
+
+import simulator
+
+simulator.setup()
+
+import sim_fs
+from benchmark_workload import detect, score
+from workload import Workload, CatProfile
+
+# --- 1. Offline: ground truth vs licks.dat vs detector -----------------------
+workload = Workload.generate(2, 1800, seed=3, visit_gap_s=120)
+print(workload.describe())
+assert workload.bouts and len(workload.tag_frames) > 0
+
+with tempfile.TemporaryDirectory() as tmp:
+    path = os.path.join(tmp, 'licks.dat')
+    workload.write_licks_dat(path)
+    with open(path) as f: lines = f.read().splitlines()
+assert lines[0] == 'time,mono_ms,cat_name,state,lick,bout,water'
+rows = [line.split(',') for line in lines[1:]]
+assert sum(1 for r in rows if r[4] != '0') == len(workload.licks)
+assert sum(1 for r in rows if r[4] == '0') == len(workload.bouts)
+assert [int(r[1]) for r in rows] == sorted(int(r[1]) for r in rows), "licks.dat rows out of order"
+print(f"✓ licks.dat: {len(rows)} rows for {len(workload.licks)} licks and {len(workload.bouts)} bouts")
+
+bouts, n, seconds = detect(workload, 1000)
+m = score(workload, bouts)
+assert m['recall'] == 1.0 and m['precision'] == 1.0, m
+assert m['exact_licks'] == m['matched'], m
+print(f"✓ Detector: {m['matched']}/{m['true']} bouts, exact lick counts, {n / seconds / 1e6:.1f} M samples/s")
+
+# --- 2. Live: main loop on the simulator --------------------------------------
+henk = CatProfile('henk', '61000000007E30010000000000', licks_per_bout=(5, 8), bouts_per_visit=(2, 2),
+                  bout_gap_s=(3, 4))
+live = Workload.generate(duration_s=40, seed=1, cats=[henk], visit_gap_s=2,
+                         max_bout_gap_ms=2000)
+settings = {'max_bout_gap_ms': 2000, 'deployment_bout_count': 100}
+# Deterministic clock: with cpu_scale a host pause becomes a long virtual stall
+simulator.run_main_loop(40, step_us=20, settings=settings, before_start=lambda clock: live.install(clock.monotonic()))
+
+logged = [line.split(',') for line in sim_fs.read_text('/sd/licks.dat').splitlines()[1:]]
+logged_licks = sum(1 for r in logged if r[2] == 'henk' and r[4] != '0')
+logged_bouts = sum(1 for r in logged if r[2] == 'henk' and r[4] == '0')
+assert logged_bouts == len(live.bouts), f"Expected {len(live.bouts)} bouts, station logged {logged_bouts}"
+assert logged_licks == len(live.licks), f"Expected {len(live.licks)} licks, station logged {logged_licks}"
+print(f"✓ Live: station logged {logged_licks} licks and {logged_bouts} bouts, as generated")
+print("✓ Workload test passed")
@@ -0,0 +1,338 @@
+"""
+Synthetic multi-cat lick workload.
+
+Workload.generate() schedules fountain visits for N cats. During a visit the
+cat's tag is read every tag_period_s (with dropouts) and the cat licks in one
+or more bouts. From that schedule the workload provides:
+
+- ground truth: every lick and every bout (cat, first onset, last offset);
+- live simulated input for the simulator: install(t0) drives the lick contact
+  (A1) and water sensor (A0) traces and queues RFID frames on the reader UART;
+- bulk input for the detector: samples(rate_hz) returns timestamp, state and
+  water arrays (NumPy) for BoutManager.process_samples;
+- licks.dat rows as the station would log them for the ground truth
+  (write_licks_dat).
+
+Times are in ms from the start of the workload; mono_ms = t0_ms + t.
+"""
+
+import bisect
+import random
+
+CONTACT_V, OPEN_V = 0.3, 3.0     # lick sensor voltage with and without tongue contact
+THRESHOLD_V = 2.0                # LickSensor.lick_threshold
+
+
+def rfid_frame(tag):
+    """WL-134 frame: STX, ASCII body, XOR checksum, inverted checksum, ETX."""
+    body = tag.encode('ascii')
+    checksum = 0
+    for b in body: checksum ^= b
+    return bytes([0x02]) + body + bytes([checksum, checksum ^ 0xFF, 0x03])
+
+
+def volts_to_raw(volts):
+    return max(0, min(65535, int(volts / 3.3 * 65535)))
+
+
+class CatProfile:
+    def __init__(self, name, tag, weight=1.0, lick_rate_hz=4.0, lick_ms=(80, 15),
+                 licks_per_bout=(4, 25), bouts_per_visit=(1, 3), bout_gap_s=(15, 45)):
+        """
+        :param name: Cat name as logged
+        :param tag: 26-character tag key sent by the reader
+        :param weight: Relative share of visits
+        :param lick_rate_hz: Licks per second within a bout
+        :param lick_ms: (mean, sd) of the contact duration
+        :param licks_per_bout: (min, max) licks in a bout
+        :param bouts_per_visit: (min, max) bouts in a visit
+        :param bout_gap_s: (min, max) pause between bouts of one visit
+        """
+        self.name = name
+        self.tag = tag
+        self.weight = weight
+        self.lick_rate_hz = lick_rate_hz
+        self.lick_ms = lick_ms
+        self.licks_per_bout = licks_per_bout
+        self.bouts_per_visit = bouts_per_visit
+        self.bout_gap_s = bout_gap_s
+
+
+def default_cats(n, seed=0):
+    """n cats with different lick rates and bout lengths."""
+    rng = random.Random(seed)
+    cats = []
+    for i in range(n):
+        tag = ''.join(rng.choice('0123456789ABCDEF') for _ in range(26))
+        cats.append(CatProfile(f'cat{i + 1}', tag, weight=rng.uniform(0.5, 1.5),
+                               lick_rate_hz=rng.uniform(3.0, 5.0),
+                               lick_ms=(rng.uniform(70, 100), 12),
+                               licks_per_bout=(3, rng.randint(10, 40))))
+    return cats
+
+
+class Workload:
+    def __init__(self, cats, duration_s, seed=0, t0_ms=1_000_000,
+                 visit_gap_s=300.0, tag_period_s=0.33, tag_dropout=0.1, tag_lead_s=1.0, tag_lag_s=2.0,
+                 contact_noise_v=0.05, glitch_rate_hz=0.01, glitch_ms=(2, 30),
+                 water_start_v=1.5, water_drift_v_per_h=-0.01, water_per_lick_v=-0.0002, water_noise_v=0.002,
+                 min_lick_ms=50, max_lick_ms=150, max_bout_gap_ms=12000, cat_timeout_ms=1000):
+        """
+        :param cats: List of CatProfile
+        :param duration_s: Length of the workload
+        :param visit_gap_s: Mean pause between visits (exponential; short pauses mean cats queue)
+        :param tag_period_s: Reader frame interval while a tag is in range
+        :param tag_dropout: Probability that a frame is lost
+        :param tag_lead_s, tag_lag_s: Tag in range before the first and after the last lick
+        :param contact_noise_v: Gaussian noise on the contact voltage (per sample)
+        :param glitch_rate_hz: Rate of spurious short contacts (glitch_ms long, rejected as licks)
+        :param water_*: Water sensor voltage: start, drift, drop per lick and noise
+        :param min_lick_ms, max_lick_ms: Generated lick durations stay inside this range
+        :param max_bout_gap_ms, cat_timeout_ms: Station settings used to place bout-close rows
+        """
+        self.cats = list(cats)
+        self.duration_ms = int(duration_s * 1000)
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.t0_ms = t0_ms
+        self.visit_gap_s = visit_gap_s
+        self.tag_period_s = tag_period_s
+        self.tag_dropout = tag_dropout
+        self.tag_lead_s = tag_lead_s
+        self.tag_lag_s = tag_lag_s
+        self.contact_noise_v = contact_noise_v
+        self.glitch_rate_hz = glitch_rate_hz
+        self.glitch_ms = glitch_ms
+        self.water_start_v = water_start_v
+        self.water_drift_v_per_h = water_drift_v_per_h
+        self.water_per_lick_v = water_per_lick_v
+        self.water_noise_v = water_noise_v
+        self.min_lick_ms = min_lick_ms
+        self.max_lick_ms = max_lick_ms
+        self.max_bout_gap_ms = max_bout_gap_ms
+        self.cat_timeout_ms = cat_timeout_ms
+
+        self.visits = []      # (cat, arrive_ms, leave_ms)
+        self.licks = []       # (onset_ms, duration_ms, cat), sorted by onset
+        self.bouts = []       # dicts: cat_name, start_ms, end_ms, lick_count, visit
+        self.tag_frames = []  # (t_ms, cat), sorted
+        self.glitches = []    # (onset_ms, duration_ms), sorted
+        self._onsets = []
+        self._offsets = []
+        self._contacts = []   # licks and glitches merged: (onset_ms, offset_ms)
+
+    @classmethod
+    def generate(cls, n_cats=3, duration_s=3600, seed=0, cats=None, **kwargs):
+        workload = cls(cats if cats is not None else default_cats(n_cats, seed), duration_s, seed=seed, **kwargs)
+        workload._schedule()
+        return workload
+
+    # ------------------------------------------------------------------
+    # Schedule
+    # ------------------------------------------------------------------
+    def _lick_duration(self, cat):
+        mean, sd = cat.lick_ms
+        lo, hi = self.min_lick_ms + 5, self.max_lick_ms - 5
+        return int(min(hi, max(lo, self.rng.gauss(mean, sd))))
+
+    def _schedule(self):
+        rng = self.rng
+        weights = [c.weight for c in self.cats]
+        t = rng.expovariate(1.0 / self.visit_gap_s) * 1000
+        while True:
+            cat = rng.choices(self.cats, weights)[0]
+            arrive = int(t)
+            cursor = arrive + self.tag_lead_s * 1000
+            bouts = []
+            for b in range(rng.randint(*cat.bouts_per_visit)):
+                if b: cursor += rng.uniform(*cat.bout_gap_s) * 1000
+                licks = []
+                for _ in range(rng.randint(*cat.licks_per_bout)):
+                    duration = self._lick_duration(cat)
+                    licks.append((int(cursor), duration))
+                    period = 1000 / cat.lick_rate_hz * rng.uniform(0.8, 1.2)
+                    cursor += max(period, duration + 40)
+                bouts.append(licks)
+            last_end = bouts[-1][-1][0] + bouts[-1][-1][1]
+            leave = int(last_end + self.tag_lag_s * 1000)
+            if leave > self.duration_ms: break
+            visit = len(self.visits)
+            self.visits.append((cat.name, arrive, leave))
+            for licks in bouts:
+                for onset, duration in licks: self.licks.append((onset, duration, cat.name))
+                self.bouts.append({'cat_name': cat.name, 'start_ms': licks[0][0],
+                                   'end_ms': licks[-1][0] + licks[-1][1],
+                                   'lick_count': len(licks), 'visit': visit})
+            frame_t = arrive
+            while frame_t <= leave:
+                if rng.random() >= self.tag_dropout: self.tag_frames.append((int(frame_t), cat.name))
+                frame_t += self.tag_period_s * 1000
+            t = leave + rng.expovariate(1.0 / self.visit_gap_s) * 1000
+
+        self._onsets = [onset for onset, _, _ in self.licks]
+        self._offsets = [onset + duration for onset, duration, _ in self.licks]
+        self._place_glitches()
+        contacts = [(onset, onset + duration) for onset, duration, _ in self.licks]
+        contacts += [(onset, onset + duration) for onset, duration in self.glitches]
+        contacts.sort()
+        self._contacts = contacts
+        self._contact_onsets = [c[0] for c in contacts]
+
+    def _place_glitches(self):
+        """Spurious contacts that keep clear of real licks."""
+        if self.glitch_rate_hz <= 0: return
+        rng = self.rng
+        t = rng.expovariate(self.glitch_rate_hz) * 1000
+        while t < self.duration_ms:
+            onset = int(t)
+            duration = rng.randint(*self.glitch_ms)
+            i = bisect.bisect_left(self._onsets, onset)
+            clear_before = i == 0 or self._offsets[i - 1] + 50 < onset
+            clear_after = i == len(self._onsets) or onset + duration + 50 < self._onsets[i]
+            if clear_before and clear_after: self.glitches.append((onset, duration))
+            t += rng.expovariate(self.glitch_rate_hz) * 1000
+
+    # ------------------------------------------------------------------
+    # Signals
+    # ------------------------------------------------------------------
+    def in_contact(self, t_ms):
+        i = bisect.bisect_right(self._contact_onsets, t_ms) - 1
+        return i >= 0 and t_ms < self._contacts[i][1]
+
+    def contact_volts(self, t_ms):
+        v = CONTACT_V if self.in_contact(t_ms) else OPEN_V
+        if self.contact_noise_v: v += self.rng.gauss(0, self.contact_noise_v)
+        return v
+
+    def water_volts(self, t_ms, noise=True):
+        licks_done = bisect.bisect_right(self._offsets, t_ms)
+        v = (self.water_start_v + self.water_drift_v_per_h * t_ms / 3_600_000
+             + self.water_per_lick_v * licks_done)
+        if noise and self.water_noise_v: v += self.rng.gauss(0, self.water_noise_v)
+        return v
+
+    def tag_of(self, cat_name):
+        for cat in self.cats:
+            if cat.name == cat_name: return cat.tag
+        return None
+
+    def samples(self, rate_hz=1000, start_ms=0, end_ms=None):
+        """
+        Sample the contact and water sensors at a fixed rate (NumPy arrays).
+
+        Returns (timestamps_ms int64 [mono], states uint8, water float64).
+        """
+        import numpy as np
+        end_ms = self.duration_ms if end_ms is None else end_ms
+        rng = np.random.default_rng(self.seed)
+        t = np.arange(start_ms, end_ms, 1000.0 / rate_hz)
+        onsets = np.array([c[0] for c in self._contacts], dtype=np.float64)
+        offsets = np.array([c[1] for c in self._contacts], dtype=np.float64)
+        i = np.searchsorted(onsets, t, side='right') - 1
+        contact = (i >= 0) & (t < offsets[np.maximum(i, 0)])
+        volts = np.where(contact, CONTACT_V, OPEN_V)
+        if self.contact_noise_v: volts = volts + rng.normal(0, self.contact_noise_v, len(t))
+        states = (volts < THRESHOLD_V).astype(np.uint8)
+        licks_done = np.searchsorted(np.array(self._offsets, dtype=np.float64), t, side='right')
+        water = (self.water_start_v + self.water_drift_v_per_h * t / 3_600_000
+                 + self.water_per_lick_v * licks_done)
+        if self.water_noise_v: water = water + rng.normal(0, self.water_noise_v, len(t))
+        return (t + self.t0_ms).astype(np.int64), states, water
+
+    def active_cats(self, timestamps_ms):
+        """Cat the station attributes each timestamp to (last tag read within cat_timeout_ms)."""
+        import numpy as np
+        frame_t = np.array([f[0] + self.t0_ms for f in self.tag_frames], dtype=np.int64)
+        names = ['unknown'] + [c.name for c in self.cats]
+        code_of = {name: i for i, name in enumerate(names)}
+        frame_code = np.array([code_of[f[1]] for f in self.tag_frames], dtype=np.int64)
+        i = np.searchsorted(frame_t, timestamps_ms, side='right') - 1
+        valid = (i >= 0) & (timestamps_ms - frame_t[np.maximum(i, 0)] < self.cat_timeout_ms)
+        codes = np.where(valid, frame_code[np.maximum(i, 0)], 0)
+        return codes, names
+
+    # ------------------------------------------------------------------
+    # Live input for the simulator
+    # ------------------------------------------------------------------
+    def install(self, t0_s, lick_pin=None, water_pin=None, rfid_pin=None):
+        """
+        Drive the simulated station, workload time 0 = virtual time t0_s.
+
+        Call before the main loop starts (e.g. from run_main_loop's before_start).
+        """
+        import analogio, board, busio
+        lick_pin = board.A1 if lick_pin is None else lick_pin
+        water_pin = board.A0 if water_pin is None else water_pin
+        rfid_pin = board.D9 if rfid_pin is None else rfid_pin
+        analogio.set_trace(lick_pin, lambda t: volts_to_raw(self.contact_volts((t - t0_s) * 1000)))
+        analogio.set_trace(water_pin, lambda t: volts_to_raw(self.water_volts((t - t0_s) * 1000)))
+        line = busio.serial_line(rfid_pin)
+        frames = {}
+        for t_ms, cat in self.tag_frames:
+            frame = frames.get(cat)
+            if frame is None: frame = frames[cat] = rfid_frame(self.tag_of(cat))
+            line.send(frame, at=t0_s + t_ms / 1000)
+
+    # ------------------------------------------------------------------
+    # licks.dat
+    # ------------------------------------------------------------------
+    def _release_ms(self):
+        """Per visit: when the station stops attributing licks to the cat."""
+        release = []
+        for v, (cat, arrive, leave) in enumerate(self.visits):
+            frames = [t for t, c in self.tag_frames if arrive <= t <= leave]
+            until = (frames[-1] if frames else arrive) + self.cat_timeout_ms
+            if v + 1 < len(self.visits):
+                next_cat, next_arrive, _ = self.visits[v + 1]
+                if next_cat != cat: until = min(until, next_arrive)
+            release.append(until)
+        return release
+
+    def licks_dat_rows(self, epoch_s=None):
+        """
+        Rows (time, mono_ms, cat_name, state, lick, bout, water) the station logs
+        for the ground truth: one row per lick (lick = licks so far in the bout)
+        and one row per closed bout (lick = 0). A bout closes max_bout_gap_ms
+        after its last lick, or earlier when the cat stops being attributed.
+        """
+        import time
+        epoch_s = time.time() - self.duration_ms / 1000 if epoch_s is None else epoch_s
+        release = self._release_ms()
+        bout_counts = {}
+        events = []
+        for bout in self.bouts:
+            cat = bout['cat_name']
+            lick_index = 0
+            for onset, duration, lick_cat in self.licks[bisect.bisect_left(self._onsets, bout['start_ms']):]:
+                if onset > bout['end_ms']: break
+                lick_index += 1
+                events.append((onset + duration, cat, lick_index))
+            close = min(bout['end_ms'] + self.max_bout_gap_ms, release[bout['visit']])
+            events.append((close, cat, 0))
+        events.sort(key=lambda e: (e[0], e[2] == 0))
+        rows = []
+        for t_ms, cat, lick_index in events:
+            if lick_index == 0: bout_counts[cat] = bout_counts.get(cat, 0) + 1
+            wall = epoch_s + t_ms / 1000
+            stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(int(wall))) + f'.{int(wall * 1000) % 1000:03d}'
+            rows.append([stamp, self.t0_ms + t_ms, cat, 0, lick_index, bout_counts.get(cat, 0),
+                         round(self.water_volts(t_ms), 6)])
+        return rows
+
+    def write_licks_dat(self, path, epoch_s=None):
+        with open(path, 'w') as f:
+            f.write('time,mono_ms,cat_name,state,lick,bout,water\n')
+            for row in self.licks_dat_rows(epoch_s):
+                f.write(','.join(str(x) for x in row) + '\n')
+
+    def write_ground_truth(self, path):
+        """Ground-truth bouts as CSV (mono_ms times)."""
+        with open(path, 'w') as f:
+            f.write('cat_name,start_ms,end_ms,lick_count\n')
+            for b in self.bouts:
+                f.write(f"{b['cat_name']},{self.t0_ms + b['start_ms']},{self.t0_ms + b['end_ms']},{b['lick_count']}\n")
+
+    def describe(self):
+        hours = self.duration_ms / 3_600_000
+        return (f"{len(self.cats)} cats, {hours:.2f} h: {len(self.visits)} visits, {len(self.bouts)} bouts, "
+                f"{len(self.licks)} licks, {len(self.tag_frames)} tag frames, {len(self.glitches)} glitches")
@@ -9,6 +9,7 @@ Key Features:
 - Analyze logged data using BoutDetection algorithm
 - Compare results with existing utils.process_licks()
 - Generate bout statistics and visualizations
+- Stream bout summaries from logs of any size with bounded memory
 - No hardware dependencies
 """
 
@@ -20,7 +21,7 @@ import pandas as pd
 board_code_path = os.path.join(os.path.dirname(__file__), '..', '..', 'BoardCode')
 sys.path.insert(0, board_code_path)
 
-from lib.BoutDetection import BoutManager
+from lib.BoutDetection import BoutManager, BoutTracker
 
 class BoutAnalyzer:
     """
@@ -41,16 +42,17 @@ class BoutAnalyzer:
         if settings:
             # Use board settings
             min_water_delta = getattr(settings, 'min_water_delta_per_bout', 0.1)
-            self.bout_manager = BoutManager(
-                min_lick_ms=settings.min_lick_ms,
-                max_lick_ms=settings.max_lick_ms,
-                min_licks_per_bout=settings.min_licks_per_bout,
-                max_bout_gap_ms=settings.max_bout_gap_ms,
-                min_water_delta=min_water_delta
-            )
+            self.tracker_kwargs = {
+                'min_lick_ms': settings.min_lick_ms,
+                'max_lick_ms': settings.max_lick_ms,
+                'min_licks_per_bout': settings.min_licks_per_bout,
+                'max_bout_gap_ms': settings.max_bout_gap_ms,
+                'min_water_delta': min_water_delta
+            }
         else:
             # Use defaults
-            self.bout_manager = BoutManager()
+            self.tracker_kwargs = {}
+        self.bout_manager = BoutManager(**self.tracker_kwargs)
     
     def analyze_dataframe(self, df, group_gap_ms=None, min_group_size=None, min_water_delta=None):
         """
@@ -94,6 +96,61 @@ class BoutAnalyzer:
             }
         return None
     
+    def stream_data_folder(self, folder_path, chunksize=5000):
+        """
+        Stream bout summaries from all lick log segments in a data folder.
+        
+        Segments are read oldest first (licks.dat.1, licks.dat.2, ..., licks.dat).
+        
+        Args:
+            folder_path: Path to data folder containing licks.dat
+            chunksize: Number of rows read from disk at a time
+            
+        Yields:
+            dict: Bout summaries (see iter_bout_summaries)
+        """
+        from library.data_reader import list_segments
+        
+        return self.iter_bout_summaries(list_segments(folder_path), chunksize=chunksize)
+    
+    def iter_bout_summaries(self, paths, chunksize=5000):
+        """
+        Replay lick logs through BoutTracker and yield bouts as they close.
+        
+        Rows are read in chunks, so memory use is bounded by chunksize and the
+        licks of the bouts in progress, not by the size of the logs. Each row
+        is a logged state change; it is confirmed past the debounce window and
+        quiet periods are closed at the time the board would have closed them.
+        A mono_ms that jumps backwards (reboot) ends all open bouts.
+        
+        Args:
+            paths: A licks.dat path or a list of paths, oldest first
+            chunksize: Number of rows read from disk at a time
+            
+        Yields:
+            dict: BoutTracker bout summaries (see BoutTracker._finalize_bout)
+        """
+        from library.data_reader import iter_licks_chunks
+        
+        replay = _LogReplay(self.tracker_kwargs)
+        for chunk in iter_licks_chunks(paths, chunksize=chunksize):
+            # Use mono_ms for timestamp if available, otherwise fall back to time
+            time_column = 'mono_ms' if 'mono_ms' in chunk.columns else 'time'
+            chunk = chunk.dropna(subset=['state', 'water', time_column])
+            if time_column == 'mono_ms':
+                times = chunk['mono_ms'].to_numpy()
+            else:
+                times = chunk['time'].to_numpy().astype('datetime64[ms]').astype('int64')
+            rows = zip(
+                chunk['cat_name'].to_numpy(),
+                chunk['state'].to_numpy().astype(int),
+                times,
+                chunk['water'].to_numpy(),
+            )
+            for cat_name, state, timestamp_ms, water in rows:
+                yield from replay.feed(str(cat_name), int(state), int(timestamp_ms), float(water))
+        yield from replay.finish()
+    
     def compare_with_existing(self, contents, group_gap_ms=None, min_group_size=None):
         """
         Compare results with existing utils.process_licks() function.
@@ -141,5 +198,89 @@ class BoutAnalyzer:
         """Get current bout info (proxy to bout_manager)"""
         return self.bout_manager.get_current_bout_info(cat_name)
 
+class _LogReplay:
+    """Feeds logged state changes to per-cat BoutTrackers, as the board would see them."""
+    
+    def __init__(self, tracker_kwargs):
+        self.tracker_kwargs = tracker_kwargs
+        self._start()
+    
+    def _start(self):
+        self.trackers = {}
+        self.active_cat = None
+        self.last_time = None
+        self.last_water = {}
+        self.reported = {}
+    
+    def _new_summary(self, tracker):
+        """Return the tracker's last bout summary if it has not been reported yet"""
+        summary = tracker.get_last_bout_summary()
+        if summary is None or self.reported.get(tracker.cat_name) is summary:
+            return None
+        self.reported[tracker.cat_name] = summary
+        return summary
+    
+    def _sample(self, tracker, state, timestamp_ms, water):
+        """Process one sample; return a summary if a bout closed"""
+        bout_closed = tracker.process_sample(state, timestamp_ms, water)[4]
+        return self._new_summary(tracker) if bout_closed else None
+    
+    def _close_quiet_bout(self, tracker, until_ms):
+        """Close the open bout if the board would have seen the quiet gap before until_ms"""
+        if tracker.state != 0 or tracker.lick_count == 0:
+            return None
+        close_ms = tracker.last_lick_end_ms + tracker.max_bout_gap_ms
+        if close_ms > until_ms:
+            return None
+        return self._sample(tracker, 0, close_ms, self.last_water.get(tracker.cat_name))
+    
+    def _end_bout(self, tracker, timestamp_ms):
+        """Force-end the bout of a cat that left (mirrors BoutManager.set_active_cat)"""
+        bouts_before = tracker.bout_count
+        tracker.end_bout(timestamp_ms, water_level=self.last_water.get(tracker.cat_name))
+        return self._new_summary(tracker) if tracker.bout_count > bouts_before else None
+    
+    def feed(self, cat_name, state, timestamp_ms, water):
+        """Replay one logged row; yield summaries of bouts it closes"""
+        if self.last_time is not None and timestamp_ms < self.last_time:
+            yield from self.finish()
+            self._start()
+        
+        tracker = self.trackers.get(cat_name)
+        if tracker is None:
+            tracker = BoutTracker(cat_name, **self.tracker_kwargs)
+            self.trackers[cat_name] = tracker
+        
+        if self.active_cat is not None and cat_name != self.active_cat:
+            previous = self.trackers[self.active_cat]
+            summary = self._close_quiet_bout(previous, timestamp_ms) or self._end_bout(previous, timestamp_ms)
+            if summary is not None:
+                yield summary
+        self.active_cat = cat_name
+        
+        summary = self._close_quiet_bout(tracker, timestamp_ms)
+        if summary is not None:
+            yield summary
+        
+        # The logged state holds until the next row: confirm it past the debounce window
+        for t in (timestamp_ms, timestamp_ms + tracker.debounce_ms):
+            summary = self._sample(tracker, state, t, water)
+            if summary is not None:
+                yield summary
+        
+        self.last_water[cat_name] = water
+        self.last_time = timestamp_ms
+    
+    def finish(self):
+        """Close all bouts still open at the end of the logs"""
+        if self.last_time is None:
+            return
+        for tracker in self.trackers.values():
+            summary = self._close_quiet_bout(tracker, float('inf'))
+            if summary is None and tracker.lick_count > 0:
+                summary = self._end_bout(tracker, self.last_time)
+            if summary is not None:
+                yield summary
+
 # Create analysis package
 __all__ = ['BoutAnalyzer']
\ No newline at end of file
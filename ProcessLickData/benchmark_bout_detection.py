@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark the vectorized BoutManager.process_dataframe engine against the
+row-by-row loop engine.
+
+Both engines run on every data folder and on a synthetic month built by
+repeating the recorded data back to back. Results are checked for equality
+before timings are reported.
+
+Usage: python benchmark_bout_detection.py [target_rows]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from library import data_reader
+
+board_code_path = os.path.join(os.path.dirname(__file__), '..', 'BoardCode')
+sys.path.insert(0, board_code_path)
+from lib.BoutDetection import BoutManager
+from lib import Settings
+
+# A station logs roughly this many rows per month
+target_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+
+def run_engine(manager, df, engine):
+    start = time.perf_counter()
+    events, summary = manager.process_dataframe(
+        df.copy(),
+        group_gap_ms=Settings.max_bout_gap_ms,
+        min_group_size=Settings.min_licks_per_bout,
+        min_water_delta=Settings.min_water_delta_per_bout,
+        engine=engine,
+    )
+    return events, summary, time.perf_counter() - start
+
+
+def compare(name, df):
+    manager = BoutManager()
+    loop_events, loop_summary, loop_s = run_engine(manager, df, 'loop')
+    np_events, np_summary, np_s = run_engine(manager, df, 'numpy')
+    pd.testing.assert_frame_equal(loop_events, np_events)
+    pd.testing.assert_frame_equal(loop_summary, np_summary)
+    speedup = loop_s / np_s if np_s > 0 else float('inf')
+    print(f"{name:<20} {len(df):>8} {len(np_summary):>6} {loop_s:>9.3f} {np_s:>9.4f} {speedup:>8.1f}x")
+
+
+def synthetic_month(frames, rows):
+    """Concatenate recordings, shifting mono_ms so time keeps increasing."""
+    parts = []
+    offset = 0
+    total = 0
+    while total < rows:
+        for frame in frames:
+            part = frame.copy()
+            part['mono_ms'] = part['mono_ms'] - part['mono_ms'].iloc[0] + offset
+            offset = int(part['mono_ms'].iloc[-1]) + 60 * 60 * 1000
+            parts.append(part)
+            total += len(part)
+    return pd.concat(parts, ignore_index=True).iloc[:rows]
+
+
+print(f"{'Data':<20} {'Rows':>8} {'Bouts':>6} {'Loop [s]':>9} {'NumPy [s]':>9} {'Speedup':>9}")
+print("-" * 66)
+
+frames = []
+for status in data_reader.list_data_folders():
+    if not status.has_licks:
+        continue
+    licks = data_reader.read_licks_file(status.path / "licks.dat")
+    if 'mono_ms' not in licks.columns or licks.empty:
+        continue
+    frames.append(licks)
+    compare(status.name, licks)
+
+if frames:
+    compare("synthetic month", synthetic_month(frames, target_rows))
+print("-" * 66)
+print("✓ Both engines produced identical events and summaries")
@@ -2,12 +2,22 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional, Union
+from typing import Iterator, List, Optional, Union
 from library import utils
+import numpy as np
 import pandas as pd
 import natsort
 
 
+# Packed lick records written by the board (BoardCode/lib/components/LickRecord.py)
+LICK_RECORD_SIZE = 10
+LICK_RECORD = np.dtype(
+    [("kind", "u1"), ("state", "u1"), ("dt_ms", "<u2"), ("lick", "<u2"), ("bout", "<u2"), ("water", "<i2")]
+)
+_LICK_STAMP = np.dtype([("kind", "u1"), ("pad", "u1"), ("a", "<u4"), ("b", "<u4")])
+_MAX_CAT_ID, _KIND_CLOCK, _KIND_HEADER, _KIND_NAME, _KIND_ANCHOR = 0xFB, 0xFC, 0xFD, 0xFE, 0xFF
+
+
 @dataclass(frozen=True)
 class DataFolderStatus:
     name: str
@@ -29,7 +39,7 @@ def list_data_folders(data_root: str | Path = "data") -> List[DataFolderStatus]:
 
     statuses: List[DataFolderStatus] = []
     for folder in natsort.natsorted(p for p in data_root.iterdir() if p.is_dir()):
-        has_licks = (folder / "licks.dat").is_file()
+        has_licks = (folder / "licks.dat").is_file() or (folder / "licks.bin").is_file()
         has_system_log = (folder / "system.log").is_file()
         statuses.append(
             DataFolderStatus(
@@ -61,6 +71,34 @@ class DataFolderContents:
     system_log: Optional[pd.DataFrame]
 
 
+def fill_time_from_mono(data: pd.DataFrame, carry: Optional[dict] = None) -> pd.DataFrame:
+    """
+    Fill empty times from mono_ms and the nearest anchor row of the same boot.
+
+    Logs written with log_time_mode = 'mono' only carry the wall time on
+    anchor rows. Within one boot wall time and mono_ms differ by a constant,
+    so every other row gets anchor_time + (mono_ms - anchor_mono_ms). A drop
+    in mono_ms marks a reboot. Pass the same `carry` dict for consecutive
+    chunks of one file to carry the last anchor over chunk borders.
+    """
+    if "time" not in data.columns or "mono_ms" not in data.columns or data.empty:
+        return data
+    mono = pd.to_numeric(data["mono_ms"], errors="coerce")
+    offset = data["time"] - pd.to_timedelta(mono, unit="ms")
+    boot = (mono.diff() < 0).cumsum()
+    if carry and carry.get("offset") is not None and mono.iloc[0] >= carry["mono"] and pd.isna(offset.iloc[0]):
+        offset.iloc[0] = carry["offset"]  # same boot as the end of the previous chunk
+    offset = offset.groupby(boot).transform(lambda s: s.ffill().bfill())
+    missing = data["time"].isna()
+    if missing.any():
+        data["time"] = data["time"].astype("datetime64[ns]")  # an all-empty chunk parses as seconds
+        data.loc[missing, "time"] = offset[missing] + pd.to_timedelta(mono[missing], unit="ms")
+    if carry is not None:
+        carry["offset"] = offset.iloc[-1] if pd.notna(offset.iloc[-1]) else None
+        carry["mono"] = mono.iloc[-1]
+    return data
+
+
 def read_licks_file(path: str | Path) -> pd.DataFrame:
     path = Path(path)
     data = pd.read_csv(path)
@@ -68,9 +106,129 @@ def read_licks_file(path: str | Path) -> pd.DataFrame:
         data["time"] = pd.to_datetime(
             data["time"], format="%Y-%m-%d %H:%M:%S.%f", errors="coerce"
         )
+        data = fill_time_from_mono(data)
     return data
 
 
+def decode_licks_binary(data: bytes) -> dict:
+    """
+    Decode packed lick records into NumPy column arrays.
+
+    Returns a dict with time (datetime64[ms]), mono_ms, cat_name (object),
+    state, lick, bout and water, one entry per data record.
+    """
+    n = len(data) // LICK_RECORD_SIZE
+    raw = np.frombuffer(data, dtype=np.uint8, count=n * LICK_RECORD_SIZE)
+    rec = raw.view(LICK_RECORD)
+    stamp = raw.view(_LICK_STAMP)
+    kind = rec["kind"]
+    index = np.arange(n)
+    is_data = kind <= _MAX_CAT_ID
+
+    # mono_ms: deltas accumulate from the last anchor record
+    cum = np.cumsum(np.where(is_data, rec["dt_ms"], 0).astype(np.int64))
+    is_anchor = kind == _KIND_ANCHOR
+    base = np.where(is_anchor, stamp["a"].astype(np.int64) - cum, 0)
+    last_anchor = np.maximum.accumulate(np.where(is_anchor, index, -1))
+    mono = np.where(last_anchor >= 0, base[last_anchor] + cum, cum)
+
+    # wall time: from the clock record of the writer session
+    is_clock = kind == _KIND_CLOCK
+    session = np.maximum.accumulate(np.where(is_clock, index, -1))
+    has_clock = session >= 0
+    boot_epoch = np.where(has_clock, stamp["a"][session].astype(np.int64), 0)
+    boot_mono = np.where(has_clock, stamp["b"][session].astype(np.int64), 0)
+    epoch_ms = boot_epoch * 1000 + np.maximum(mono - boot_mono, 0)
+
+    # cat names: per session, 8-byte chunks of consecutive name records of one id
+    names = {}
+    for i in np.flatnonzero(kind == _KIND_NAME):
+        key = (int(session[i]), int(rec["state"][i]))
+        chunk = raw[i * LICK_RECORD_SIZE + 2:(i + 1) * LICK_RECORD_SIZE].tobytes().rstrip(b"\x00").decode("utf-8")
+        continued = i > 0 and kind[i - 1] == _KIND_NAME and rec["state"][i - 1] == rec["state"][i]
+        names[key] = names.get(key, "") + chunk if continued else chunk
+
+    headers = np.flatnonzero(kind == _KIND_HEADER)
+    water_scale = int(stamp["b"][headers[0]]) & 0xFFFF if len(headers) else 1000  # <B4sBHH: scale in bytes 6-7
+    keys = session[is_data].astype(np.int64) * 256 + kind[is_data]
+    unique, inverse = np.unique(keys, return_inverse=True)
+    labels = np.array(
+        [names.get((int(k) // 256, int(k) % 256), str(int(k) % 256)) for k in unique], dtype=object
+    )
+    return {
+        "time": epoch_ms[is_data].astype("datetime64[ms]"),
+        "mono_ms": mono[is_data],
+        "cat_name": labels[inverse] if len(unique) else np.array([], dtype=object),
+        "state": rec["state"][is_data].astype(np.int64),
+        "lick": rec["lick"][is_data].astype(np.int64),
+        "bout": rec["bout"][is_data].astype(np.int64),
+        "water": rec["water"][is_data] / (water_scale or 1000),
+    }
+
+
+def read_licks_binary(path: str | Path) -> pd.DataFrame:
+    """Read a packed licks.bin file into the same columns as read_licks_file."""
+    return pd.DataFrame(decode_licks_binary(Path(path).read_bytes()))
+
+
+def read_manifest(folder: str | Path, filename: str = "licks.dat") -> Optional[pd.DataFrame]:
+    """
+    Read the rotation manifest the board keeps next to a log (name.manifest).
+
+    One row per rotated segment: index, segment, first_mono_ms, last_mono_ms
+    and lines (-1 where the board did not know the value). None if missing.
+    """
+    path = Path(folder) / f"{filename}.manifest"
+    if not path.is_file():
+        return None
+    return pd.read_csv(path)
+
+
+def list_segments(folder: str | Path, filename: str = "licks.dat") -> List[Path]:
+    """
+    Return rotation segments of a log, oldest first (name.1, name.2, ..., name).
+
+    Uses the rotation manifest when there is one; segments missing from it
+    (e.g. written by older firmware) are found by listing the folder.
+    """
+    folder = Path(folder)
+    rotated = {}
+    manifest = read_manifest(folder, filename)
+    if manifest is not None:
+        for index, segment in zip(manifest["index"], manifest["segment"]):
+            path = folder / segment
+            if path.is_file():
+                rotated[int(index)] = path
+    complete = manifest is not None and len(rotated) == len(manifest) and sorted(rotated) == list(range(1, len(rotated) + 1))
+    if not complete:
+        for path in folder.glob(f"{filename}.*"):
+            suffix = path.name[len(filename) + 1 :]
+            if suffix.isdigit():
+                rotated.setdefault(int(suffix), path)
+    segments = [path for _, path in sorted(rotated.items())]
+    current = folder / filename
+    if current.is_file():
+        segments.append(current)
+    return segments
+
+
+def iter_licks_chunks(
+    paths: Union[str, Path, List[Union[str, Path]]], chunksize: int = 5000
+) -> Iterator[pd.DataFrame]:
+    """Yield lick rows in DataFrame chunks of at most chunksize rows, file by file."""
+    if isinstance(paths, (str, Path)):
+        paths = [paths]
+    for path in paths:
+        carry: dict = {}
+        for chunk in pd.read_csv(path, chunksize=chunksize):
+            if "time" in chunk.columns:
+                chunk["time"] = pd.to_datetime(
+                    chunk["time"], format="%Y-%m-%d %H:%M:%S.%f", errors="coerce"
+                )
+                chunk = fill_time_from_mono(chunk, carry)
+            yield chunk
+
+
 def read_system_log(path: str | Path) -> pd.DataFrame:
     path = Path(path)
     rows = []
@@ -111,6 +269,7 @@ def read_system_log(path: str | Path) -> pd.DataFrame:
         )
         data["mono_ms"] = pd.to_numeric(data["mono_ms"], errors="coerce")
         data["ticks"] = pd.to_numeric(data["ticks"], errors="coerce")
+        data = fill_time_from_mono(data)
     return data
 
 
@@ -132,8 +291,14 @@ def read_data_folder(
     if folder_path is None:
         raise IndexError("data folder index out of range")
     licks_path = folder_path / "licks.dat"
+    binary_path = folder_path / "licks.bin"
     system_log_path = folder_path / "system.log"
-    licks = read_licks_file(licks_path) if licks_path.is_file() else None
+    if licks_path.is_file():
+        licks = read_licks_file(licks_path)
+    elif binary_path.is_file():
+        licks = read_licks_binary(binary_path)
+    else:
+        licks = None
     licks = check_time_increases(licks)
     system_log = read_system_log(system_log_path) if system_log_path.is_file() else None
     return DataFolderContents(
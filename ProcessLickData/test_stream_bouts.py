@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test that the streaming bout path gives the same bouts as process_dataframe.
+
+A data folder with a rotated lick log (licks.dat.1, licks.dat) is written
+with clean licks for one cat, so both engines must agree. It is read back
+with BoutAnalyzer.stream_data_folder in small chunks (bouts span chunk and
+file boundaries) and with process_dataframe on all segments at once. Rows
+without mono_ms must be skipped, not stop the stream.
+"""
+
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from analysis.BoutAnalyzer import BoutAnalyzer
+from library import data_reader
+
+lick_ms, period_ms = 80, 250
+bouts = [(10_000, 5), (40_000, 7), (70_000, 4), (100_000, 6)]   # (start mono_ms, licks)
+header = 'time,mono_ms,cat_name,state,lick,bout,water\n'
+
+
+def rows():
+    water = 1.5
+    for bout, (start, licks) in enumerate(bouts):
+        for i in range(licks):
+            onset = start + i * period_ms
+            water = round(water - 0.01, 5)
+            yield f',{onset},henk,1,{i + 1},{bout},{water}\n'
+            yield f',{onset + lick_ms},henk,0,{i + 1},{bout},{water}\n'
+        # An idle row logged without mono_ms (e.g. a row with only wall time)
+        yield f'2026-10-17 10:00:00.000,,henk,0,0,{bout + 1},{water}\n'
+
+
+folder = Path(tempfile.mkdtemp())
+lines = list(rows())
+split = len(lines) // 2 + 1      # the second bout spans both files
+(folder / 'licks.dat.1').write_text(header + ''.join(lines[:split]))
+(folder / 'licks.dat').write_text(header + ''.join(lines[split:]))
+
+analyzer = BoutAnalyzer()
+streamed = list(analyzer.stream_data_folder(folder, chunksize=7))
+assert len(streamed) == len(bouts), f"Expected {len(bouts)} streamed bouts, got {len(streamed)}"
+print(f"✓ Streamed {len(streamed)} bouts from {len(data_reader.list_segments(folder))} segments in chunks of 7 rows")
+
+licks = pd.concat([data_reader.read_licks_file(p) for p in data_reader.list_segments(folder)], ignore_index=True)
+events, summary = analyzer.analyze_dataframe(licks)
+assert len(summary) == len(streamed), f"process_dataframe found {len(summary)} bouts, streaming {len(streamed)}"
+assert [b['lick_count'] for b in streamed] == summary['n'].tolist() == [n for _, n in bouts]
+for bout, (start, _) in zip(streamed, bouts):
+    assert start <= bout['start_time'] < start + lick_ms, (bout['start_time'], start)   # confirmed past the debounce
+for group, bout in zip(summary['group'], streamed):
+    durations = events.loc[events['group'] == group, 'duration'].tolist()
+    assert bout['lick_durations'] == durations, (bout['lick_durations'], durations)
+print("✓ Same bouts, lick counts and lick durations as process_dataframe")
+print("✓ Streaming bout test passed")
@@ -44,6 +44,31 @@ try:
     result = manager.process_sample(1, 2000, 2.3, 'cat2')
     print(f"✅ BoutManager processed sample for cat2: {result['current_state']}")
     
+    # Test batch processing gives the same events as per-sample processing
+    from lib.BoutDetection import EVENT_RISE, EVENT_FALL, EVENT_LICK, EVENT_BOUT
+    states, timestamps = [], []
+    timestamp = 0
+    for lick in range(8):
+        for state, hold_ms in ((1, 100), (0, 300 if lick < 7 else 2000)):
+            for _ in range(hold_ms // 10):
+                states.append(state)
+                timestamps.append(timestamp)
+                timestamp += 10
+    single = BoutTracker("single", max_bout_gap_ms=1000)
+    expected = []
+    for i in range(len(states)):
+        prev, curr, dur, lick_added, bout_closed = single.process_sample(states[i], timestamps[i], 2.0)
+        if prev == 0 and curr == 1: expected.append((i, EVENT_RISE))
+        if prev == 1 and curr == 0: expected.append((i, EVENT_FALL))
+        if lick_added: expected.append((i, EVENT_LICK))
+        if bout_closed: expected.append((i, EVENT_BOUT))
+    batch = BoutTracker("batch", max_bout_gap_ms=1000)
+    events = batch.process_samples(states, timestamps, 2.0)
+    assert [(i, kind) for i, kind, _, _ in events] == expected, "Batch events differ"
+    assert batch.bout_count == single.bout_count == 1, "Expected one bout"
+    assert events[-1][3]['lick_count'] == 8, "Bout summary should hold 8 licks"
+    print(f"✅ process_samples matches process_sample ({len(events)} events)")
+    
     print("\n🎉 Core Algorithm Tests PASSED!\n")
     
 except Exception as e:
@@ -80,6 +105,14 @@ try:
         def mean(self, samples=10):
             return 2.5  # Mock water level
     
+    class MockMyADCAverager:
+        def __init__(self, adc, **kwargs):
+            self.adc = adc
+        def tick(self):
+            return True
+        def value(self):
+            return self.adc.mean()
+    
     class MockSettings:
         lick_data_filename = "test.dat"
         data_log_max_lines = 1000
@@ -94,6 +127,7 @@ try:
     sys.modules['components.MyStore'].MyStore = MockMyStore
     sys.modules['components.MyADC'] = type(sys)('components.MyADC')
     sys.modules['components.MyADC'].MyADC = MockMyADC
+    sys.modules['components.MyADC'].MyADCAverager = MockMyADCAverager
     sys.modules['Settings'] = MockSettings
     
     # Re-import with mocks